@@ -0,0 +1,184 @@
+"""
+Generator korpus sintetis untuk benchmark (deterministik per seed).
+
+- PDF ditulis manual (tanpa reportlab): font Helvetica standar, satu content stream per halaman,
+  dan anotasi /Link URI agar jalur `page.hyperlinks` ikut terukur.
+- DOCX dibuat dengan python-docx (sudah jadi dependency engine): banyak paragraf + tabel.
+- Response model sintetis (JSON dalam code fence / teks bebas) untuk `clean_json_text`.
+"""
+import io
+import json
+import random
+from typing import Dict, List, Tuple
+
+from docx import Document
+
+WORDS = (
+    "developed designed implemented led managed built optimized migrated automated delivered "
+    "python fastapi django react postgresql docker kubernetes aws terraform kafka redis "
+    "team stakeholders customers revenue latency pipeline service platform dashboard api "
+    "reduced increased improved by 30% 45% 2x across multiple regions within quarter budget "
+    "mengembangkan merancang memimpin tim sistem layanan pelanggan meningkatkan efisiensi"
+).split()
+
+HEADINGS = ["PROFESSIONAL SUMMARY", "WORK EXPERIENCE", "EDUCATION", "PROJECTS", "SKILLS", "CERTIFICATIONS"]
+
+LINK_LABELS = ["LinkedIn", "GitHub", "Portfolio", "Certificate", "Demo", "Publication"]
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+FONT_SIZE = 10
+LINE_HEIGHT = 14
+MARGIN = 72
+
+
+def _sentence(rng: random.Random, min_words: int = 8, max_words: int = 18) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_lines(rng: random.Random, links: int) -> List[Tuple[str, str]]:
+    """Baris (teks, url) satu halaman; url kosong berarti baris tanpa link."""
+    capacity = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+    lines = []
+    link_rows = set(rng.sample(range(capacity), min(links, capacity)))
+    for row in range(capacity):
+        if row in link_rows:
+            label = rng.choice(LINK_LABELS)
+            url = f"https://example.com/{label.lower()}/{rng.randint(1000, 9999)}"
+            lines.append((label, url))
+        elif row % 12 == 0:
+            lines.append((rng.choice(HEADINGS), ""))
+        else:
+            lines.append(("- " + _sentence(rng, 6, 12), ""))
+    return lines
+
+
+def make_pdf(pages: int, links_per_page: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: str) -> int:
+        objects.append(body.encode("latin-1"))
+        return len(objects)
+
+    catalog = add("")  # diisi setelah Pages diketahui
+    pages_obj = add("")
+    font = add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for _ in range(pages):
+        ops = ["BT", f"/F1 {FONT_SIZE} Tf"]
+        annots = []
+        y = PAGE_HEIGHT - MARGIN
+        for text, url in _page_lines(rng, links_per_page):
+            ops.append(f"1 0 0 1 {MARGIN} {y} Tm ({_pdf_escape(text)}) Tj")
+            if url:
+                # Lebar Helvetica rata-rata ~0.55 em; cukup untuk rect yang menutupi label
+                right = MARGIN + len(text) * FONT_SIZE * 0.55
+                annots.append(add(
+                    f"<< /Type /Annot /Subtype /Link /Border [0 0 0] "
+                    f"/Rect [{MARGIN} {y - 2} {right:.1f} {y + FONT_SIZE}] "
+                    f"/A << /S /URI /URI ({_pdf_escape(url)}) >> >>"
+                ))
+            y -= LINE_HEIGHT
+        ops.append("ET")
+        stream = "\n".join(ops)
+        content = add(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        annot_refs = " ".join(f"{a} 0 R" for a in annots)
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R /Annots [{annot_refs}] >>"
+        ))
+
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode("latin-1")
+    kids = " ".join(f"{p} 0 R" for p in page_ids)
+    objects[pages_obj - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int, tables: int, rows: int = 8, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    document = Document()
+    per_table = max(1, paragraphs // (tables + 1))
+    table_count = 0
+    for index in range(paragraphs):
+        if index % 15 == 0:
+            document.add_heading(rng.choice(HEADINGS).title(), level=2)
+        document.add_paragraph(_sentence(rng), style="List Bullet" if index % 3 else None)
+        if table_count < tables and index and index % per_table == 0:
+            table = document.add_table(rows=rows, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+            table_count += 1
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_model_response(items: int, fenced: bool, seed: int = 0) -> str:
+    """Response mirip output Gemini (AnalysisResponse + critical_gaps sebanyak `items`)."""
+    rng = random.Random(seed)
+    payload = {
+        "candidate_name": "Budi Santoso",
+        "overall_score": rng.randint(40, 95),
+        "overall_summary": " ".join(_sentence(rng) for _ in range(6)),
+        "ats_score": 80, "ats_detail": _sentence(rng),
+        "writing_score": 75, "writing_detail": _sentence(rng),
+        "skill_score": 70, "skill_detail": _sentence(rng),
+        "experience_score": 65, "experience_detail": _sentence(rng),
+        "critical_gaps": [{"gap": rng.choice(WORDS), "action": _sentence(rng)} for _ in range(items)],
+    }
+    body = json.dumps(payload, indent=2, ensure_ascii=False)
+    if fenced:
+        return f"Here is the analysis:\n```json\n{body}\n```\nLet me know if you need more."
+    return f"Sure! {body} Hope this helps."
+
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def build_corpus(seed: int = 0) -> Dict[str, List[Tuple[str, str, object]]]:
+    """
+    Korpus per target benchmark: {target: [(nama kasus, content_type, payload)]}.
+    Ukuran dipilih agar satu run lengkap selesai dalam hitungan menit.
+    """
+    extraction = []
+    for pages in (1, 5, 20):
+        for links in (0, 5, 25):
+            name = f"pdf_{pages}p_{links}links"
+            extraction.append((name, "application/pdf", make_pdf(pages, links, seed + pages * 31 + links)))
+    for paragraphs, tables in ((50, 0), (300, 5), (1500, 20)):
+        name = f"docx_{paragraphs}para_{tables}tables"
+        extraction.append((name, DOCX_TYPE, make_docx(paragraphs, tables, seed=seed + paragraphs + tables)))
+
+    rng = random.Random(seed)
+    sanitize = []
+    for size in (2_000, 20_000, 200_000):
+        chunks = []
+        while sum(len(c) for c in chunks) < size:
+            chunks.append(_sentence(rng) + rng.choice([" ", "\n", "\n\n", "\t  ", "   \n "]))
+        sanitize.append((f"text_{size // 1000}k", "text/plain", "".join(chunks)[:size]))
+
+    clean_json = []
+    for items in (3, 30, 300):
+        clean_json.append((f"fenced_{items}gaps", "text/plain", make_model_response(items, True, seed + items)))
+        clean_json.append((f"bare_{items}gaps", "text/plain", make_model_response(items, False, seed + items)))
+
+    return {"extract_text_from_bytes": extraction, "sanitize_content": sanitize, "clean_json_text": clean_json}
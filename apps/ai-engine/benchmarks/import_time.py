@@ -0,0 +1,79 @@
+"""
+Ukur waktu import aplikasi (`python -X importtime`) di proses baru.
+
+Jalankan dari apps/ai-engine:
+    python -m benchmarks.import_time                    # total + modul paling lambat
+    python -m benchmarks.import_time --max-seconds 1.5  # exit 1 jika melebihi budget
+
+Exit code 1 juga jika modul berat yang seharusnya lazy (SDK genai, pdfplumber) ikut ter-import
+saat `import main` — modul tersebut baru dimuat di lifespan (pre-warm) atau saat request pertama.
+"""
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+# Modul berat yang tidak dibutuhkan /health: tidak boleh dimuat saat import
+DEFAULT_LAZY = ("google.genai", "pdfplumber")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Jalankan `import <module>` dengan -X importtime; kembalikan (total detik, [(modul, self_us, cumulative_us)])."""
+    env = dict(os.environ)
+    # Import tidak butuh API key asli; nilai ini hanya mencegah validasi client gagal jika dibuat
+    env.setdefault("GEMINI_API_KEY", "import-time")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.getcwd(),
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"import {module} gagal (exit {result.returncode})")
+
+    rows = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        rows.append((name, int(self_us), int(cumulative_us)))
+        if name == module:
+            # Baris modul target mencakup seluruh import turunannya (tanpa startup interpreter)
+            total_us = int(cumulative_us)
+    return total_us / 1e6, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur waktu import aplikasi")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15, help="Jumlah modul (cumulative terbesar) yang ditampilkan")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Budget total import; exit 1 jika lewat")
+    parser.add_argument("--lazy", default=",".join(DEFAULT_LAZY),
+                        help="Modul (dipisah koma) yang tidak boleh ter-import; kosongkan untuk melewati cek")
+    args = parser.parse_args(argv)
+
+    total, rows = measure(args.module)
+    print(f"import {args.module}: {total:.3f}s ({len(rows)} modul)")
+    print(f"{'cumulative':>12} {'self':>10}  modul")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+
+    failed = False
+    loaded = {name for name, _, _ in rows}
+    eager: Dict[str, int] = {}
+    for lazy in filter(None, (name.strip() for name in args.lazy.split(","))):
+        if lazy in loaded:
+            eager[lazy] = next(cumulative for name, _, cumulative in rows if name == lazy)
+    for name, cumulative_us in eager.items():
+        print(f"FAIL: {name} ter-import saat import {args.module} ({cumulative_us / 1000:.1f}ms); seharusnya lazy")
+        failed = True
+    if args.max_seconds is not None and total > args.max_seconds:
+        print(f"FAIL: import {total:.3f}s melebihi budget {args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
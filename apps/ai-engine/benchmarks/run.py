@@ -0,0 +1,169 @@
+"""
+Micro-benchmark ekstraksi & post-processing response.
+
+Jalankan dari apps/ai-engine:
+    python -m benchmarks.run                      # ukur + bandingkan dengan baseline
+    python -m benchmarks.run --save               # ukur + tulis ulang baseline
+    python -m benchmarks.run --only clean_json_text --iterations 200
+
+Exit code 1 jika ada kasus yang p50 atau peak memory-nya naik melebihi --tolerance dari baseline.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import build_corpus
+from src.services.extractor import extract_text_from_bytes, EXTRACTOR_VERSION
+from src.services.ai_engine import sanitize_content, clean_json_text
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "baseline.json")
+
+TARGETS: Dict[str, Callable] = {
+    "extract_text_from_bytes": lambda payload, content_type: extract_text_from_bytes(payload, content_type),
+    "sanitize_content": lambda payload, content_type: sanitize_content(payload),
+    "clean_json_text": lambda payload, content_type: clean_json_text(payload),
+}
+
+# Iterasi default per target (ekstraksi PDF 20 halaman jauh lebih lambat dari regex)
+DEFAULT_ITERATIONS = {"extract_text_from_bytes": 10, "sanitize_content": 200, "clean_json_text": 500}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn: Callable, payload, content_type: str, iterations: int) -> Dict[str, float]:
+    size = len(payload)
+    fn(payload, content_type)  # warmup (import lazy, cache regex, dsb.)
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(payload, content_type)
+        samples.append(time.perf_counter() - start)
+
+    # Peak memory diukur terpisah: tracemalloc memperlambat eksekusi dan akan merusak angka latency
+    tracemalloc.start()
+    fn(payload, content_type)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    return {
+        "input_bytes": size,
+        "iterations": iterations,
+        "p50_ms": round(_percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "ops_per_sec": round(iterations / total, 2) if total else 0.0,
+        "mb_per_sec": round(size * iterations / total / 1_000_000, 3) if total else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(only: List[str], iterations: int, seed: int) -> Dict:
+    corpus = build_corpus(seed)
+    results: Dict[str, Dict] = {}
+    for target, cases in corpus.items():
+        if only and target not in only:
+            continue
+        fn = TARGETS[target]
+        results[target] = {}
+        for name, content_type, payload in cases:
+            stats = measure(fn, payload, content_type, iterations or DEFAULT_ITERATIONS[target])
+            results[target][name] = stats
+            print(f"{target:<24} {name:<28} p50={stats['p50_ms']:>10.3f}ms  p99={stats['p99_ms']:>10.3f}ms  "
+                  f"{stats['mb_per_sec']:>9.3f} MB/s  peak={stats['peak_memory_kb']:>9.1f} KB")
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "extractor_version": EXTRACTOR_VERSION,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# Selisih absolut minimum agar dianggap regresi (noise timer untuk kasus mikrodetik)
+MIN_DELTA = {"p50_ms": 0.05, "peak_memory_kb": 16.0}
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Daftar regresi: p50 atau peak memory naik lebih dari `tolerance` (rasio) dibanding baseline."""
+    regressions = []
+    for target, cases in current["results"].items():
+        for name, stats in cases.items():
+            base = baseline.get("results", {}).get(target, {}).get(name)
+            if not base:
+                continue
+            for metric in ("p50_ms", "peak_memory_kb"):
+                grew = stats[metric] - base[metric]
+                if base[metric] and grew > base[metric] * tolerance and grew > MIN_DELTA[metric]:
+                    regressions.append(
+                        f"{target}/{name}: {metric} {base[metric]} -> {stats[metric]} "
+                        f"(+{(stats[metric] / base[metric] - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ekstraksi & post-processing AI Engine")
+    parser.add_argument("--only", nargs="*", choices=sorted(TARGETS), default=[], help="Target yang diukur")
+    parser.add_argument("--iterations", type=int, default=0, help="Override jumlah iterasi per kasus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Path file baseline JSON")
+    parser.add_argument("--save", action="store_true", help="Tulis hasil sebagai baseline baru")
+    parser.add_argument("--output", help="Simpan hasil run ini ke file JSON (tanpa menimpa baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Batas kenaikan relatif sebelum dianggap regresi")
+    args = parser.parse_args(argv)
+
+    current = run(args.only, args.iterations, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Baseline disimpan ke {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Baseline {args.baseline} belum ada; jalankan dengan --save untuk membuatnya.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("extractor_version") != EXTRACTOR_VERSION:
+        print(f"Catatan: baseline dibuat dengan EXTRACTOR_VERSION {baseline['meta'].get('extractor_version')}, "
+              f"sekarang {EXTRACTOR_VERSION}.")
+
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regresi melebihi {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"\nTidak ada regresi melebihi {args.tolerance:.0%} dibanding baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
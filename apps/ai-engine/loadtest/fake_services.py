@@ -0,0 +1,309 @@
+"""
+Server palsu untuk load test: Gemini (generateContent / streamGenerateContent) dan Jina Reader.
+
+Jalankan dari apps/ai-engine:
+    python -m loadtest.fake_services --port 9100 --latency 2,8 --fast-latency 0.4,1.5 --rate-limit-rate 0.02
+
+Lalu arahkan engine ke server ini:
+    GEMINI_BASE_URL=http://127.0.0.1:9100 JINA_READER_URL=http://127.0.0.1:9100/reader/ uvicorn main:app
+
+Response Gemini dibangkitkan dari `responseSchema` di request, sehingga selalu valid untuk
+AnalysisResponse, ImprovedCVResult, maupun schema parsial (section/kriteria).
+Endpoint `cachedContents` (create/get/update/delete) ikut disimulasikan sebagai pengganti lokal
+context caching: `cachedContent` yang tidak dikenal/kedaluwarsa ditolak 404 seperti API aslinya.
+"""
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+WORDS = (
+    "built scalable services improved latency led team migrated platform automated pipeline "
+    "reduced cost delivered features mentored engineers designed api optimized queries"
+).split()
+
+
+class LatencyModel:
+    """Distribusi lognormal yang diparametrisasi dengan p50 & p99 (detik)."""
+
+    def __init__(self, p50: float, p99: float):
+        self.p50 = max(p50, 0.0)
+        self.p99 = max(p99, self.p50)
+        # z(0.99) = 2.326: sigma dipilih agar kuantil 99 jatuh tepat di p99
+        self.sigma = math.log(self.p99 / self.p50) / 2.326 if self.p50 > 0 and self.p99 > self.p50 else 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyModel":
+        p50, _, p99 = value.partition(",")
+        return cls(float(p50), float(p99 or p50))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.p50 <= 0:
+            return 0.0
+        return self.p50 * math.exp(rng.gauss(0.0, self.sigma)) if self.sigma else self.p50
+
+
+class FakeConfig:
+    def __init__(self, latency: LatencyModel, fast_latency: LatencyModel, jina_latency: LatencyModel,
+                 error_rate: float, rate_limit_rate: float, jina_error_rate: float, chunks: int, seed: int):
+        self.latency = latency
+        self.fast_latency = fast_latency
+        self.jina_latency = jina_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.jina_error_rate = jina_error_rate
+        self.chunks = chunks
+        self.rng = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+        # name -> {model, tokens, expires_at (monotonic)}
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.cache_ops: Dict[str, int] = {}
+
+
+def _schema_type(schema: Dict[str, Any]) -> str:
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if str(k).lower() != "null"), "string")
+    return str(kind or "").lower()
+
+
+def fake_value(schema: Optional[Dict[str, Any]], rng: random.Random, name: str = "") -> Any:
+    """Nilai acak yang valid untuk schema Gemini/JSON Schema (OBJECT, ARRAY, STRING, INTEGER, ...)."""
+    if not schema:
+        return ""
+    for key in ("anyOf", "oneOf"):
+        if schema.get(key):
+            options = [option for option in schema[key] if _schema_type(option) != "null"]
+            return fake_value(options[0] if options else None, rng, name)
+    if schema.get("enum"):
+        return rng.choice(schema["enum"])
+
+    kind = _schema_type(schema)
+    if kind == "object" or "properties" in schema:
+        return {key: fake_value(value, rng, key) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_value(schema.get("items"), rng, name) for _ in range(rng.randint(2, 4))]
+    if kind == "integer":
+        return rng.randint(40, 95)
+    if kind == "number":
+        return round(rng.uniform(40, 95), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if "name" in name:
+        return "Candidate " + rng.choice("ABCDEFGH")
+    if "email" in name:
+        return "candidate@example.com"
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+
+
+def _response_schema(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    config = body.get("generationConfig") or {}
+    return config.get("responseSchema") or config.get("responseJsonSchema")
+
+
+def _text_tokens(contents) -> int:
+    text = "".join(part.get("text", "") for content in contents for part in content.get("parts", []))
+    return len(text) // 4
+
+
+def _prompt_tokens(body: Dict[str, Any]) -> int:
+    system = body.get("systemInstruction")
+    return max(1, _text_tokens(body.get("contents", [])) + (_text_tokens([system]) if system else 0))
+
+
+def _parse_ttl(value: Optional[str], default: float = 3600.0) -> float:
+    return float(str(value).rstrip("s")) if value else default
+
+
+def _payload(text: str, model: str, prompt_tokens: int, final: bool = True, cached_tokens: int = 0) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}}
+    payload: Dict[str, Any] = {"candidates": [candidate], "modelVersion": model}
+    if final:
+        candidate["finishReason"] = "STOP"
+        output_tokens = max(1, len(text) // 4)
+        payload["usageMetadata"] = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        }
+        if cached_tokens:
+            payload["usageMetadata"]["cachedContentTokenCount"] = cached_tokens
+    return payload
+
+
+def _error(status: int, message: Optional[str] = None) -> JSONResponse:
+    if message:
+        codes = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND"}
+        body = {"error": {"code": status, "message": message, "status": codes.get(status, "UNKNOWN")}}
+    elif status == 429:
+        body = {"error": {
+            "code": 429, "message": "Resource has been exhausted (fake).", "status": "RESOURCE_EXHAUSTED",
+            "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}],
+        }}
+    else:
+        body = {"error": {"code": status, "message": "The model is overloaded (fake).", "status": "UNAVAILABLE"}}
+    return JSONResponse(body, status_code=status)
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake Gemini & Jina")
+
+    def _draw(model: str) -> Tuple[float, Optional[int]]:
+        config.calls[model] = config.calls.get(model, 0) + 1
+        latency = (config.fast_latency if "lite" in model else config.latency).sample(config.rng)
+        roll = config.rng.random()
+        if roll < config.rate_limit_rate:
+            # Kuota habis ditolak cepat, seperti API aslinya
+            return min(latency, 0.05), 429
+        if roll < config.rate_limit_rate + config.error_rate:
+            return latency, 503
+        return latency, None
+
+    @app.post("/{api_version}/models/{model_action}")
+    async def generate(api_version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        try:
+            body = await request.json()
+        except ClientDisconnect:
+            # Percobaan hedge yang kalah dibatalkan engine sebelum body terkirim
+            return PlainTextResponse("", status_code=499)
+        cached_tokens = 0
+        if body.get("cachedContent"):
+            cache = _live_cache(body["cachedContent"])
+            if cache is None:
+                return _error(404, f"CachedContent not found (or expired): {body['cachedContent']}")
+            if cache["model"] != f"models/{model}":
+                return _error(400, f"Model {model} does not match cached content model {cache['model']}.")
+            cached_tokens = cache["tokens"]
+        latency, status = _draw(model)
+        text = json.dumps(fake_value(_response_schema(body), config.rng), ensure_ascii=False)
+        prompt_tokens = _prompt_tokens(body) + cached_tokens
+
+        if action != "streamGenerateContent":
+            await asyncio.sleep(latency)
+            return _error(status) if status else _payload(text, model, prompt_tokens, cached_tokens=cached_tokens)
+
+        if status:
+            await asyncio.sleep(latency)
+            return _error(status)
+
+        async def events():
+            # Latency dibagi rata: time-to-first-token lalu sisa chunk
+            step = max(1, math.ceil(len(text) / config.chunks))
+            pieces = [text[i:i + step] for i in range(0, len(text), step)]
+            for index, piece in enumerate(pieces):
+                await asyncio.sleep(latency / len(pieces))
+                payload = _payload(piece, model, prompt_tokens, final=index == len(pieces) - 1, cached_tokens=cached_tokens)
+                yield f"data: {json.dumps(payload, ensure_ascii=False)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    def _live_cache(name: str) -> Optional[Dict[str, Any]]:
+        cache = config.caches.get(name)
+        if cache is not None and cache["expires_at"] <= time.monotonic():
+            del config.caches[name]
+            cache = None
+        return cache
+
+    def _cache_resource(name: str, cache: Dict[str, Any]) -> Dict[str, Any]:
+        expire = time.time() + cache["expires_at"] - time.monotonic()
+        return {
+            "name": name,
+            "model": cache["model"],
+            "displayName": cache["display_name"],
+            "expireTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expire)),
+            "usageMetadata": {"totalTokenCount": cache["tokens"]},
+        }
+
+    def _count_cache_op(op: str):
+        config.cache_ops[op] = config.cache_ops.get(op, 0) + 1
+
+    @app.post("/{api_version}/cachedContents")
+    async def create_cache(api_version: str, request: Request):
+        body = await request.json()
+        _count_cache_op("create")
+        contents = body.get("contents", []) + ([body["systemInstruction"]] if body.get("systemInstruction") else [])
+        name = f"cachedContents/fake-{config.cache_ops['create']}"
+        model = body.get("model", "")
+        config.caches[name] = {
+            "model": model if model.startswith("models/") else f"models/{model}",
+            "tokens": max(1, _text_tokens(contents)),
+            "display_name": body.get("displayName", ""),
+            "expires_at": time.monotonic() + _parse_ttl(body.get("ttl")),
+        }
+        return _cache_resource(name, config.caches[name])
+
+    @app.get("/{api_version}/cachedContents/{cache_id}")
+    async def get_cache(api_version: str, cache_id: str):
+        name = f"cachedContents/{cache_id}"
+        cache = _live_cache(name)
+        return _cache_resource(name, cache) if cache else _error(404, f"CachedContent not found: {name}")
+
+    @app.patch("/{api_version}/cachedContents/{cache_id}")
+    async def update_cache(api_version: str, cache_id: str, request: Request):
+        body = await request.json()
+        _count_cache_op("update")
+        name = f"cachedContents/{cache_id}"
+        cache = _live_cache(name)
+        if cache is None:
+            return _error(404, f"CachedContent not found: {name}")
+        cache["expires_at"] = time.monotonic() + _parse_ttl(body.get("ttl"))
+        return _cache_resource(name, cache)
+
+    @app.delete("/{api_version}/cachedContents/{cache_id}")
+    async def delete_cache(api_version: str, cache_id: str):
+        _count_cache_op("delete")
+        name = f"cachedContents/{cache_id}"
+        if config.caches.pop(name, None) is None:
+            return _error(404, f"CachedContent not found: {name}")
+        return {}
+
+    @app.get("/reader/{url:path}")
+    async def reader(url: str):
+        await asyncio.sleep(config.jina_latency.sample(config.rng))
+        if config.rng.random() < config.jina_error_rate:
+            return PlainTextResponse("Upstream error (fake).", status_code=502)
+        rng = random.Random(url)
+        lines = [f"# Job posting: {url}", "", "## Requirements"]
+        lines += [f"- {fake_value({'type': 'STRING'}, rng)}" for _ in range(8)]
+        lines += ["", "## Responsibilities"] + [f"- {fake_value({'type': 'STRING'}, rng)}" for _ in range(6)]
+        return PlainTextResponse("\n".join(lines))
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": config.calls, "cached_contents": len(config.caches), "cache_ops": config.cache_ops}
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server Gemini & Jina palsu untuk load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="2,8", help="p50,p99 latency REASONING_MODEL (detik)")
+    parser.add_argument("--fast-latency", default="0.4,1.5", help="p50,p99 latency model *-lite (detik)")
+    parser.add_argument("--jina-latency", default="0.5,2", help="p50,p99 latency Jina Reader (detik)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Porsi response 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Porsi response 429")
+    parser.add_argument("--jina-error-rate", type=float, default=0.0, help="Porsi response 502 dari reader")
+    parser.add_argument("--chunks", type=int, default=8, help="Jumlah chunk pada streamGenerateContent")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = FakeConfig(
+        LatencyModel.parse(args.latency), LatencyModel.parse(args.fast_latency), LatencyModel.parse(args.jina_latency),
+        args.error_rate, args.rate_limit_rate, args.jina_error_rate, args.chunks, args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Load test end-to-end AI Engine terhadap server Gemini & Jina palsu (tanpa memakai kuota).
+
+Jalankan dari apps/ai-engine:
+    python -m loadtest.run                                   # 50,100,200,500 request bersamaan ke /api/analyze
+    python -m loadtest.run --concurrency 50,200 --endpoint customize --latency 3,12 --rate-limit-rate 0.05
+    python -m loadtest.run --engine-url http://127.0.0.1:8000 --no-fakes   # engine yang sudah jalan
+
+Tanpa --engine-url, driver menjalankan fake_services dan `uvicorn main:app` sendiri dengan
+GEMINI_BASE_URL/JINA_READER_URL mengarah ke server palsu. Laporan per level concurrency:
+throughput, p50/p95/p99 latency, status code, saturasi threadpool, dan memori (engine + worker).
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.corpus import make_pdf, make_docx, DOCX_TYPE
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_METRIC_LINE = re.compile(r"^(ai_engine_(?:threadpool_\w+|process_resident_memory_bytes))\s+(\S+)$")
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _tree_rss_bytes(pid: int) -> Optional[int]:
+    """RSS proses + seluruh turunannya (worker ekstraksi) dari /proc; None di luar Linux."""
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            children.setdefault(parent, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total, stack = 0, [pid]
+    page = os.sysconf("SC_PAGE_SIZE")
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            continue
+        stack.extend(children.get(current, []))
+    return total
+
+
+def build_documents(count: int, seed: int) -> List[tuple]:
+    """CV berbeda-beda (hash file berbeda) agar cache ekstraksi/hasil tidak menyamarkan beban."""
+    documents = []
+    for index in range(count):
+        if index % 4 == 3:
+            documents.append((f"cv_{index}.docx", DOCX_TYPE, make_docx(40, 1, seed=seed + index)))
+        else:
+            documents.append((f"cv_{index}.pdf", "application/pdf", make_pdf(1 + index % 3, 3, seed=seed + index)))
+    return documents
+
+
+def build_request(endpoint: str, document: tuple, rng: random.Random, request_id: int, url_ratio: float, fake_jd_host: str):
+    """(path, form data) untuk satu request. JD dibuat unik per request agar tidak kena cache hasil."""
+    jd = f"Backend engineer #{request_id}: Python, FastAPI, PostgreSQL, Docker, Kubernetes, observability."
+    use_url = rng.random() < url_ratio
+    job_url = f"https://{fake_jd_host}/jobs/{request_id}"
+    if endpoint == "analyze":
+        data = {"job_url": job_url} if use_url else {"job_description": jd}
+        return "/api/analyze", data
+    if endpoint == "stream":
+        data = {"job_url": job_url} if use_url else {"job_description": jd}
+        return "/api/analyze/stream", data
+    if endpoint == "customize":
+        return "/api/customize", {"mode": "job_desc", "job_description": jd}
+    if endpoint == "multi":
+        return "/api/analyze/multi", {"job_descriptions": [jd, jd + " Go", jd + " AWS"]}
+    raise ValueError(endpoint)
+
+
+class RuntimeSampler:
+    """Polling /metrics (threadpool, RSS server) + /proc (RSS engine & worker) selama satu level."""
+
+    def __init__(self, client: httpx.AsyncClient, engine_url: str, pid: Optional[int], interval: float):
+        self.client = client
+        self.engine_url = engine_url
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+
+    async def _sample(self):
+        sample: Dict[str, float] = {}
+        try:
+            response = await self.client.get(f"{self.engine_url}/metrics", timeout=5)
+            for line in response.text.splitlines():
+                match = _METRIC_LINE.match(line)
+                if match:
+                    sample[match.group(1)] = float(match.group(2))
+        except httpx.HTTPError:
+            pass
+        if self.pid is not None:
+            rss = _tree_rss_bytes(self.pid)
+            if rss is not None:
+                sample["tree_rss_bytes"] = rss
+        self.samples.append(sample)
+
+    async def run(self):
+        while True:
+            await self._sample()
+            await asyncio.sleep(self.interval)
+
+    def summary(self) -> Dict[str, float]:
+        def peak(name):
+            values = [sample[name] for sample in self.samples if name in sample]
+            return max(values) if values else None
+
+        capacity = peak("ai_engine_threadpool_capacity")
+        busy = peak("ai_engine_threadpool_busy")
+        saturated = [
+            sample for sample in self.samples
+            if "ai_engine_threadpool_busy" in sample
+            and sample["ai_engine_threadpool_busy"] >= sample.get("ai_engine_threadpool_capacity", float("inf"))
+        ]
+        server_rss = peak("ai_engine_process_resident_memory_bytes")
+        tree_rss = peak("tree_rss_bytes")
+        return {
+            "threadpool_capacity": capacity,
+            "threadpool_peak_busy": busy,
+            "threadpool_peak_waiting": peak("ai_engine_threadpool_waiting"),
+            # Porsi sampel di mana semua thread terpakai
+            "threadpool_saturated_ratio": round(len(saturated) / len(self.samples), 3) if self.samples else None,
+            "server_peak_rss_mb": round(server_rss / 1_048_576, 1) if server_rss else None,
+            "tree_peak_rss_mb": round(tree_rss / 1_048_576, 1) if tree_rss else None,
+        }
+
+
+async def run_level(client: httpx.AsyncClient, engine_url: str, endpoint: str, concurrency: int, total: int,
+                    documents: List[tuple], seed: int, url_ratio: float, pid: Optional[int], interval: float,
+                    timeout: float, request_offset: int) -> Dict:
+    rng = random.Random(seed + concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(request_id: int):
+        filename, content_type, payload = documents[request_id % len(documents)]
+        path, data = build_request(endpoint, (filename, content_type, payload), rng, request_id, url_ratio, "jobs.example")
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{engine_url}{path}", data=data, files={"file": (filename, payload, content_type)}, timeout=timeout
+                )
+                # Streaming: latency dihitung sampai event terakhir diterima
+                status = str(response.status_code)
+                if endpoint == "stream" and response.status_code == 200 and "event: complete" not in response.text:
+                    status = "stream_error"
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == "200":
+            latencies.append(elapsed)
+
+    sampler = RuntimeSampler(client, engine_url, pid, interval)
+    sampler_task = asyncio.create_task(sampler.run())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(request_offset + index) for index in range(total)))
+    finally:
+        sampler_task.cancel()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "statuses": statuses,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_s": round(_percentile(latencies, 50), 3),
+        "p95_s": round(_percentile(latencies, 95), 3),
+        "p99_s": round(_percentile(latencies, 99), 3),
+        "max_s": round(max(latencies), 3) if latencies else 0.0,
+        **sampler.summary(),
+    }
+
+
+def _start(command: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(command, cwd=ENGINE_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def _wait_ready(url: str, deadline: float = 60.0):
+    started = time.monotonic()
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() - started < deadline:
+            try:
+                if (await client.get(url, timeout=2)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} tidak siap dalam {deadline:.0f} detik")
+
+
+def _print_level(result: Dict):
+    threadpool = f"{result['threadpool_peak_busy']}/{result['threadpool_capacity']}" \
+        if result["threadpool_capacity"] is not None else "-"
+    print(f"c={result['concurrency']:<4} ok={result['ok']:>4}/{result['requests']:<4} "
+          f"{result['throughput_rps']:>7.2f} req/s  p50={result['p50_s']:>7.3f}s  p95={result['p95_s']:>7.3f}s  "
+          f"p99={result['p99_s']:>7.3f}s  threads={threadpool} waiting<={result['threadpool_peak_waiting']}  "
+          f"rss={result['tree_peak_rss_mb'] or result['server_peak_rss_mb']} MB  status={result['statuses']}")
+
+
+async def run(args) -> Dict:
+    processes: List[subprocess.Popen] = []
+    engine_url = args.engine_url
+    engine_pid = None
+    env = dict(os.environ)
+
+    try:
+        if not args.no_fakes:
+            fake_port = _free_port()
+            processes.append(_start([
+                sys.executable, "-m", "loadtest.fake_services", "--port", str(fake_port),
+                "--latency", args.latency, "--fast-latency", args.fast_latency, "--jina-latency", args.jina_latency,
+                "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+                "--seed", str(args.seed),
+            ], env))
+            await _wait_ready(f"http://127.0.0.1:{fake_port}/stats")
+            env.update({
+                "GEMINI_BASE_URL": f"http://127.0.0.1:{fake_port}",
+                "JINA_READER_URL": f"http://127.0.0.1:{fake_port}/reader/",
+                "GEMINI_API_KEY": env.get("GEMINI_API_KEY") or "loadtest",
+            })
+
+        if not engine_url:
+            engine_port = _free_port()
+            if not args.keep_caches:
+                # Yang diukur adalah jalur kerja penuh, bukan hit cache
+                env.update({"LLM_CACHE_MODE": "off", "RESULT_CACHE_TTL": "0", "JD_CACHE_TTL": "0"})
+            if args.context_cache_min_tokens is not None:
+                # Explicit caching opt-in; template prompt saat ini di bawah minimum API,
+                # 0 memaksa siklus cached content ikut diuji
+                env["CONTEXT_CACHE_MODE"] = "explicit"
+                env["CONTEXT_CACHE_MIN_TOKENS"] = str(args.context_cache_min_tokens)
+            engine = _start([
+                sys.executable, "-m", "uvicorn", "main:app", "--port", str(engine_port),
+                "--log-level", "warning", "--backlog", "4096",
+            ], env)
+            processes.append(engine)
+            engine_pid = engine.pid
+            engine_url = f"http://127.0.0.1:{engine_port}"
+        await _wait_ready(f"{engine_url}/health")
+
+        documents = build_documents(args.documents, args.seed)
+        levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+        limits = httpx.Limits(max_connections=max(levels) + 10, max_keepalive_connections=max(levels) + 10)
+        results = []
+        offset = 0
+        async with httpx.AsyncClient(limits=limits) as client:
+            for level in levels:
+                total = args.requests or level * args.rounds
+                result = await run_level(
+                    client, engine_url, args.endpoint, level, total, documents, args.seed,
+                    args.url_ratio, engine_pid, args.sample_interval, args.timeout, offset,
+                )
+                offset += total
+                results.append(result)
+                _print_level(result)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "endpoint": args.endpoint,
+            "latency": args.latency,
+            "fast_latency": args.fast_latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "url_ratio": args.url_ratio,
+            "keep_caches": args.keep_caches,
+        },
+        "levels": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test end-to-end AI Engine dengan Gemini/Jina palsu")
+    parser.add_argument("--endpoint", choices=["analyze", "stream", "customize", "multi"], default="analyze")
+    parser.add_argument("--concurrency", default="50,100,200,500", help="Level concurrency, dipisah koma")
+    parser.add_argument("--rounds", type=int, default=2, help="Request per level = concurrency x rounds")
+    parser.add_argument("--requests", type=int, default=0, help="Override jumlah request per level")
+    parser.add_argument("--documents", type=int, default=40, help="Jumlah CV berbeda yang dipakai bergantian")
+    parser.add_argument("--url-ratio", type=float, default=0.2, help="Porsi request yang memakai job_url (Jina palsu)")
+    parser.add_argument("--latency", default="2,8", help="p50,p99 latency REASONING_MODEL palsu (detik)")
+    parser.add_argument("--fast-latency", default="0.4,1.5", help="p50,p99 latency FAST_MODEL palsu (detik)")
+    parser.add_argument("--jina-latency", default="0.5,2", help="p50,p99 latency Jina palsu (detik)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Porsi response 503 dari Gemini palsu")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Porsi response 429 dari Gemini palsu")
+    parser.add_argument("--engine-url", help="Pakai engine yang sudah berjalan (tidak di-spawn)")
+    parser.add_argument("--no-fakes", action="store_true", help="Jangan jalankan server palsu (engine sudah dikonfigurasi)")
+    parser.add_argument("--keep-caches", action="store_true", help="Biarkan cache LLM/hasil/JD aktif")
+    parser.add_argument("--context-cache-min-tokens", type=int, help="Aktifkan CONTEXT_CACHE_MODE=explicit dengan CONTEXT_CACHE_MIN_TOKENS ini")
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Interval polling /metrics (detik)")
+    parser.add_argument("--timeout", type=float, default=300, help="Timeout per request (detik)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Simpan laporan JSON ke file ini")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Laporan disimpan ke {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
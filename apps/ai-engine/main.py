@@ -1,17 +1,103 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import time
+# Waktu import modul aplikasi diukur dari sini (dilaporkan di /metrics: ai_engine_startup_seconds)
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.concurrency import run_in_threadpool
-from typing import Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List
+import os
 import json
+import asyncio
+import sys
 from datetime import datetime
 
 
-from src.schemas import AnalysisResponse, ImprovedCVResult
-from src.services.extractor import extract_text_from_bytes
-from src.services.ai_engine import analyze_cv, customize_cv 
-from src.services.scraper import scrape_job_with_jina
+from src.schemas import AnalysisResponse, ImprovedCVResult, QuickScoreResponse
+from src.services.extract_pool import extraction_pool, extract_upload
+from src.services.upload import (
+    receive_upload, SpooledUpload, BodySizeLimitMiddleware, MAX_UPLOAD_BYTES, UPLOAD_FORM_OVERHEAD_BYTES,
+)
+from src.services.jobs import job_queue, QueueFull
+from src.services.result_cache import result_cache, make_request_key, normalize_job_text, normalize_url
+from src.services.extract_cache import extraction_cache
+from src.services.llm_cache import llm_cache
+from src.services.ai_engine import (
+    analyze_cv, customize_cv, stream_analysis_events, analyze_cv_batch, analyze_cv_multi, section_cache, cv_quality_cache,
+    context_cache, warm_up,
+)
+from src.services.streaming import sse_event
+from src.services.skill_matcher import quick_score, get_skill_lexicon
+from src.services.deadline import start_deadline
+from src.services.metrics import (
+    registry, observe_runtime, start_request_timings, server_timing_header, HTTP_REQUEST_SECONDS, STARTUP_SECONDS,
+)
+from src.services.scraper import scrape_job_with_jina, start_http_client, close_http_client, jd_cache
+
+# Worker hasil spawn (SERVE_MODE=production) lebih dulu meng-import file ini sebagai __mp_main__,
+# lalu uvicorn meng-import "main" dengan cache modul yang sudah hangat: pakai angka yang pertama
+IMPORT_SECONDS = getattr(sys.modules.get("__mp_main__"), "IMPORT_SECONDS", time.perf_counter() - _IMPORT_STARTED)
+
+# --- KONFIGURASI SERVING ---
+# SERVE_MODE=production: WEB_CONCURRENCY worker process (tiap worker menjalankan lifespan & pool ekstraksi sendiri)
+# selain itu: satu proses dengan auto-reload (development)
+SERVE_MODE = os.getenv("SERVE_MODE", "development")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "2"))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# false: SDK genai, lexicon, dan worker ekstraksi baru dimuat saat request pertama (startup tercepat)
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "true").lower() == "true"
 
-app = FastAPI(title="CV Analyzer API", version="1.6.0")
+
+def warm_up_worker():
+    """Modul & object yang ditunda saat import dimuat di sini, sebelum worker menerima request."""
+    warm_up()
+    get_skill_lexicon()
+    if not extraction_pool.enabled:
+        # Ekstraksi berjalan di threadpool proses ini
+        import pdfplumber  # noqa: F401
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Uvicorn baru menerima request (termasuk /health) setelah blok ini selesai
+    started = time.perf_counter()
+    STARTUP_SECONDS.set(IMPORT_SECONDS, phase="import")
+    await start_http_client()
+    if STARTUP_PREWARM:
+        # Spawn worker ekstraksi & import SDK berjalan bersamaan
+        await asyncio.gather(extraction_pool.start(), run_in_threadpool(warm_up_worker))
+    await job_queue.start()
+    prewarm_seconds = time.perf_counter() - started
+    STARTUP_SECONDS.set(prewarm_seconds, phase="prewarm")
+    print(f"AI Engine worker {os.getpid()} ready: import {IMPORT_SECONDS:.2f}s, prewarm {prewarm_seconds:.2f}s")
+    yield
+    await job_queue.shutdown()
+    # Cached content milik worker ini dihapus (sisanya habis sendiri oleh TTL)
+    await context_cache.shutdown()
+    await close_http_client()
+    await extraction_pool.shutdown()
+
+app = FastAPI(title="CV Analyzer API", version="1.6.0", lifespan=lifespan)
+
+# Batas endpoint batch (banyak CV untuk satu JD)
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+# Satu CV terhadap banyak JD (perbandingan lowongan)
+MULTI_ANALYZE_MAX_TARGETS = int(os.getenv("MULTI_ANALYZE_MAX_TARGETS", "10"))
+# Quick-score murni lokal (tanpa LLM), jadi batas file bisa jauh lebih besar
+QUICK_SCORE_MAX_FILES = int(os.getenv("QUICK_SCORE_MAX_FILES", "200"))
+
+# Ukuran body dibatasi sebelum multipart di-parse: satu file per request, kecuali endpoint multi-file
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    default=MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+    limits={
+        "/api/analyze/batch": MAX_UPLOAD_BYTES * BATCH_MAX_FILES + UPLOAD_FORM_OVERHEAD_BYTES,
+        "/api/quick-score": MAX_UPLOAD_BYTES * QUICK_SCORE_MAX_FILES + UPLOAD_FORM_OVERHEAD_BYTES,
+    },
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,19 +107,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """
+    Histogram latency per route + header Server-Timing (upload, ekstraksi, scrape JD, tiap percobaan Gemini).
+    Untuk response streaming, header hanya memuat tahap yang selesai sebelum byte pertama dikirim.
+    """
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=str(response.status_code))
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Metrik format Prometheus (latency per tahap, token & retry Gemini per model, threadpool & memori)"""
+    observe_runtime()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.api_route("/health", methods=["GET", "HEAD"])
 async def health_check():
     """Health check endpoint for Docker healthcheck"""
     return {"status": "healthy", "service": "ai-engine"}
 
-@app.post("/api/analyze")
-async def analyze_endpoint(
-    file: UploadFile = File(...),
-    job_description: Optional[str] = Form(None),
-    job_url: Optional[str] = Form(None),
-    current_date: Optional[str] = Form(None) 
-):
-  
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Statistik cache ekstraksi & response LLM (hit/miss) untuk memantau pekerjaan yang dihemat"""
+    return {"extraction": extraction_cache.stats(), "llm": llm_cache.stats(), "job_description": jd_cache.stats(),
+            "results": result_cache.stats(), "customize_sections": section_cache.stats(),
+            "analysis_cv_quality": cv_quality_cache.stats(), "context": context_cache.stats()}
+
+async def resolve_job_description(job_description: Optional[str], job_url: Optional[str]) -> str:
+    """Prioritas: teks JD -> scraping URL -> AUTO_DETECT_ROLE."""
     final_jd = ""
     if job_description and job_description.strip():
         final_jd = job_description
@@ -62,43 +172,297 @@ async def analyze_endpoint(
     if not final_jd:
         final_jd = "AUTO_DETECT_ROLE"
 
-    
-    content = await file.read()
+    return final_jd
+
+
+async def cv_text_from_upload(upload: SpooledUpload) -> str:
     try:
-        cv_text = await run_in_threadpool(
-            extract_text_from_bytes, 
-            content, 
-            file.content_type
-        )
+        cv_text = await extract_upload(upload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Gagal membaca file: {str(e)}")
 
     if len(cv_text) < 50:
         raise HTTPException(status_code=400, detail="CV terlalu pendek atau kosong.")
 
-   
-    try:
-        
-        result = await analyze_cv(cv_text, final_jd, current_date)
-        
-        if not result:
-            raise HTTPException(status_code=500, detail="AI Analysis returned empty result.")
+    return cv_text
+
+
+async def read_cv_text(file: UploadFile) -> str:
+    # Upload dibaca sekali (hash + batas ukuran); file temp hanya dibuat untuk upload besar
+    async with await receive_upload(file) as upload:
+        return await cv_text_from_upload(upload)
+
+
+def _analysis_is_complete(result) -> bool:
+    # analyze_cv mengembalikan analisis kosong ("Error: ...") jika Gemini gagal; jangan di-cache
+    analysis = result.get("analysis", {}) if result else {}
+    return not str(analysis.get("overall_summary", "")).startswith("Error:")
+
+
+@app.post("/api/analyze")
+async def analyze_endpoint(
+    file: UploadFile = File(...),
+    job_description: Optional[str] = Form(None),
+    job_url: Optional[str] = Form(None),
+    current_date: Optional[str] = Form(None) 
+):
+    # Deadline end-to-end (upload + ekstraksi + Gemini); diwarisi task yang menjalankan `run`
+    start_deadline()
+    upload = await receive_upload(file)
+    # Teks JD diprioritaskan di atas URL (sama seperti resolve_job_description)
+    has_jd_text = bool(job_description and job_description.strip())
+    key = make_request_key(
+        "analyze", upload.sha256, current_date,
+        job_description=normalize_job_text(job_description) if has_jd_text else None,
+        job_url=None if has_jd_text else normalize_url(job_url),
+    )
+
+    async def run():
+        final_jd = await resolve_job_description(job_description, job_url)
+        cv_text = await cv_text_from_upload(upload)
+
+        try:
             
-        return result
+            result = await analyze_cv(cv_text, final_jd, current_date)
+            
+            if not result:
+                raise HTTPException(status_code=500, detail="AI Analysis returned empty result.")
+                
+            return result
 
-    except Exception as e:
-        print(f"AI Error: {e}")
-        raise HTTPException(status_code=500, detail=f"AI Engine Error: {str(e)}")
+        except Exception as e:
+            print(f"AI Error: {e}")
+            raise HTTPException(status_code=500, detail=f"AI Engine Error: {str(e)}")
 
+    # Request identik yang sedang berjalan/baru selesai tidak memicu panggilan Gemini lagi
+    return await result_cache.get_or_run(key, run, release=upload.cleanup, should_store=_analysis_is_complete)
 
-@app.post("/api/customize", response_model=ImprovedCVResult)
-async def customize_endpoint(
+
+@app.post("/api/analyze/stream")
+async def analyze_stream_endpoint(
     file: UploadFile = File(...),
-    mode: str = Form(...),
     job_description: Optional[str] = Form(None),
-    analysis_context: Optional[str] = Form(None),
+    job_url: Optional[str] = Form(None),
+    current_date: Optional[str] = Form(None)
+):
+    """
+    Sama seperti /api/analyze, tetapi hasil dikirim bertahap via Server-Sent Events:
+    extracted -> cv_data -> analysis_field (berulang) -> complete.
+    """
+    start_deadline()
+    final_jd = await resolve_job_description(job_description, job_url)
+    cv_text = await read_cv_text(file)
+
+    async def event_stream():
+        yield sse_event("extracted", {"characters": len(cv_text)})
+        try:
+            async for event, data in stream_analysis_events(cv_text, final_jd, current_date):
+                yield sse_event(event, data)
+        except Exception as e:
+            print(f"AI Stream Error: {e}")
+            yield sse_event("error", {"detail": f"AI Engine Error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _extract_for_batch(file: UploadFile) -> str:
+    async with await receive_upload(file) as upload:
+        cv_text = await extract_upload(upload)
+    if len(cv_text) < 50:
+        raise ValueError("CV terlalu pendek atau kosong.")
+    return cv_text
+
+
+@app.post("/api/analyze/batch")
+async def analyze_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    job_description: Optional[str] = Form(None),
+    job_url: Optional[str] = Form(None),
     current_date: Optional[str] = Form(None)
 ):
+    """
+    Scoring banyak CV terhadap satu JD. Response berupa NDJSON:
+    satu baris per kandidat (urutan selesai), lalu baris "summary" berisi ranking.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(400, f"Maksimal {BATCH_MAX_FILES} file per batch.")
+
+    final_jd = await resolve_job_description(job_description, job_url)
+
+    # Ekstraksi semua file paralel (process pool), file yang gagal dilaporkan per-kandidat
+    extracted = await asyncio.gather(*[_extract_for_batch(f) for f in files], return_exceptions=True)
+
+    cv_texts = {}
+    failures = []
+    for index, (file, result) in enumerate(zip(files, extracted)):
+        if isinstance(result, Exception):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            failures.append({"type": "error", "index": index, "filename": file.filename,
+                             "detail": f"Gagal membaca file: {detail}"})
+        else:
+            cv_texts[index] = result
+
+    async def ndjson_stream():
+        for failure in failures:
+            yield json.dumps(failure, ensure_ascii=False) + "\n"
+
+        ranking = []
+        async for index, analysis in analyze_cv_batch(cv_texts, final_jd, current_date, BATCH_MAX_CONCURRENCY):
+            filename = files[index].filename
+            ranking.append({
+                "index": index,
+                "filename": filename,
+                "candidate_name": analysis.candidate_name,
+                "overall_score": analysis.overall_score,
+            })
+            yield json.dumps({
+                "type": "result", "index": index, "filename": filename, "analysis": analysis.model_dump()
+            }, ensure_ascii=False) + "\n"
+
+        ranking.sort(key=lambda item: item["overall_score"], reverse=True)
+        yield json.dumps({
+            "type": "summary", "total": len(files), "scored": len(ranking),
+            "failed": len(failures), "ranking": ranking,
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+def _target_label(source: str, value: str) -> str:
+    if source == "url":
+        return value.strip()
+    first_line = next((line.strip() for line in value.splitlines() if line.strip()), "")
+    return first_line if len(first_line) <= 80 else first_line[:77] + "..."
+
+
+def compare_targets(scored: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Ringkasan side-by-side: skor per kriteria per lowongan, gap bersama vs gap khusus satu lowongan."""
+    criteria = ["overall_score", "ats_score", "writing_score", "skill_score", "experience_score"]
+    scores = [
+        {"index": item["index"], "label": item["label"], **{name: item["analysis"][name] for name in criteria}}
+        for item in scored
+    ]
+    scores.sort(key=lambda item: item["overall_score"], reverse=True)
+
+    # Gap dikelompokkan case-insensitive; urutan kemunculan pertama dipertahankan
+    gap_targets: Dict[str, Dict[str, Any]] = {}
+    for item in scored:
+        for gap in item["analysis"]["critical_gaps"]:
+            entry = gap_targets.setdefault(" ".join(gap["gap"].lower().split()), {"gap": gap["gap"], "targets": []})
+            if item["index"] not in entry["targets"]:
+                entry["targets"].append(item["index"])
+
+    common = [entry for entry in gap_targets.values() if len(entry["targets"]) > 1]
+    common.sort(key=lambda entry: len(entry["targets"]), reverse=True)
+    unique = {item["index"]: [] for item in scored}
+    for entry in gap_targets.values():
+        if len(entry["targets"]) == 1:
+            unique[entry["targets"][0]].append(entry["gap"])
+
+    return {
+        "criteria": criteria,
+        "scores": scores,
+        "best_match": scores[0]["index"] if scores else None,
+        "common_gaps": common,
+        "unique_gaps": unique,
+    }
+
+
+@app.post("/api/analyze/multi")
+async def analyze_multi_endpoint(
+    file: UploadFile = File(...),
+    job_descriptions: Optional[List[str]] = Form(None),
+    job_urls: Optional[List[str]] = Form(None),
+    current_date: Optional[str] = Form(None)
+):
+    """
+    Satu CV dibandingkan dengan beberapa lowongan sekaligus (teks JD dan/atau URL).
+    File diupload & diekstrak sekali, JD diambil paralel, scoring per JD paralel.
+    JD yang gagal diambil dilaporkan per-target tanpa menggagalkan target lain.
+    """
+    targets = [("text", jd) for jd in (job_descriptions or []) if jd and jd.strip()]
+    targets += [("url", url) for url in (job_urls or []) if url and url.strip()]
+    if not targets:
+        raise HTTPException(400, "Sertakan minimal satu job_descriptions atau job_urls.")
+    if len(targets) > MULTI_ANALYZE_MAX_TARGETS:
+        raise HTTPException(400, f"Maksimal {MULTI_ANALYZE_MAX_TARGETS} lowongan per request.")
+
+    start_deadline()
+    async with await receive_upload(file) as upload:
+        cv_text, *fetched = await asyncio.gather(
+            cv_text_from_upload(upload),
+            *(resolve_job_description(value if source == "text" else None, value if source == "url" else None)
+              for source, value in targets),
+            return_exceptions=True,
+        )
+    if isinstance(cv_text, Exception):
+        raise cv_text
+
+    job_descs, failed = {}, []
+    for index, ((source, value), result) in enumerate(zip(targets, fetched)):
+        if isinstance(result, Exception):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            failed.append({"index": index, "source": source, "label": _target_label(source, value), "detail": detail})
+        else:
+            job_descs[index] = result
+
+    cv_data, analyses = await analyze_cv_multi(cv_text, job_descs, current_date) if job_descs else (None, {})
+
+    scored = [
+        {"index": index, "source": targets[index][0], "label": _target_label(*targets[index]),
+         "analysis": analysis.model_dump()}
+        for index, analysis in analyses.items()
+    ]
+    return {
+        "total": len(targets),
+        "scored": len(scored),
+        "cv_data": cv_data.model_dump() if cv_data else None,
+        "results": scored,
+        "failed": failed,
+        "comparison": compare_targets(scored),
+    }
+
+
+@app.post("/api/quick-score")
+async def quick_score_endpoint(
+    files: List[UploadFile] = File(...),
+    job_description: Optional[str] = Form(None),
+    job_url: Optional[str] = Form(None)
+):
+    """
+    Pre-screening cepat tanpa LLM: skor skill, gap, dan kepadatan kata kunci ATS per CV,
+    diurutkan dari skor tertinggi. Shortlist-nya baru dikirim ke /api/analyze atau /api/analyze/batch.
+    """
+    if len(files) > QUICK_SCORE_MAX_FILES:
+        raise HTTPException(400, f"Maksimal {QUICK_SCORE_MAX_FILES} file per quick-score.")
+
+    final_jd = await resolve_job_description(job_description, job_url)
+    if final_jd == "AUTO_DETECT_ROLE":
+        raise HTTPException(400, "Quick-score wajib menyertakan job_description atau job_url.")
+
+    extracted = await asyncio.gather(*[_extract_for_batch(f) for f in files], return_exceptions=True)
+
+    def score_all():
+        scored, failed = [], []
+        for index, (file, result) in enumerate(zip(files, extracted)):
+            if isinstance(result, Exception):
+                detail = result.detail if isinstance(result, HTTPException) else str(result)
+                failed.append({"index": index, "filename": file.filename, "detail": f"Gagal membaca file: {detail}"})
+                continue
+            score: QuickScoreResponse = quick_score(result, final_jd)
+            scored.append({"index": index, "filename": file.filename, **score.model_dump()})
+        scored.sort(key=lambda item: (item["skill_score"], item["ats_keyword_density"]), reverse=True)
+        return scored, failed
+
+    results, failures = await run_in_threadpool(score_all)
+    return {"total": len(files), "scored": len(results), "results": results, "failed": failures}
+
+
+def resolve_customize_context(mode: str, job_description: Optional[str], analysis_context: Optional[str]) -> str:
     final_context = ""
     
     if mode == "job_desc":
@@ -114,25 +478,141 @@ async def customize_endpoint(
     else:
         raise HTTPException(400, "Mode tidak valid.")
 
-  
-    content = await file.read()
-    try:
-        cv_text = await run_in_threadpool(
-            extract_text_from_bytes, 
-            content, 
-            file.content_type
-        )
-    except Exception as e:
-        raise HTTPException(400, f"Gagal membaca file: {str(e)}")
+    return final_context
 
-    
+
+@app.post("/api/customize", response_model=ImprovedCVResult)
+async def customize_endpoint(
+    file: UploadFile = File(...),
+    mode: str = Form(...),
+    job_description: Optional[str] = Form(None),
+    analysis_context: Optional[str] = Form(None),
+    current_date: Optional[str] = Form(None)
+):
+    final_context = resolve_customize_context(mode, job_description, analysis_context)
+
+    start_deadline()
+    upload = await receive_upload(file)
+    key = make_request_key("customize", upload.sha256, current_date, mode=mode, context=normalize_job_text(final_context))
+
+    async def run():
+        try:
+            cv_text = await extract_upload(upload)
+        except Exception as e:
+            raise HTTPException(400, f"Gagal membaca file: {str(e)}")
+
+        try:
+            result = await customize_cv(cv_text, mode, final_context, current_date)
+            return result
+        except Exception as e:
+            print(f"Customize Error: {e}")
+            raise HTTPException(500, "Gagal meng-generate CV baru.")
+
+    return await result_cache.get_or_run(
+        key, run, release=upload.cleanup,
+        # customize_cv mengembalikan placeholder "Error Generating CV" jika Gemini gagal
+        should_store=lambda result: result.full_name != "Error Generating CV",
+    )
+
+# --- JOB API (submit/poll) ---
+# Request dijawab 202 segera; pekerjaan LLM dijalankan worker job_queue dengan kapasitas terbatas.
+
+def _validate_webhook_url(webhook_url: Optional[str]) -> Optional[str]:
+    if not webhook_url or not webhook_url.strip():
+        return None
+    webhook_url = webhook_url.strip()
+    if not webhook_url.startswith(("http://", "https://")):
+        raise HTTPException(400, "webhook_url harus berupa URL http(s).")
+    return webhook_url
+
+
+def _queue_full_response(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Antrean job penuh, coba lagi nanti.", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def _submit_job(kind: str, file: UploadFile, run, webhook_url: Optional[str]):
     try:
-        result = await customize_cv(cv_text, mode, final_context, current_date)
+        # Tolak sebelum isi upload diambil jika antrean sudah pasti penuh
+        job_queue.check_capacity()
+        # UploadFile ditutup begitu request selesai, jadi isinya diambil dulu; job yang menghapus file temp-nya
+        upload = await receive_upload(file)
+        job = job_queue.submit(kind, lambda: run(upload), webhook_url, cleanup=upload.cleanup)
+    except QueueFull as e:
+        return _queue_full_response(e.retry_after)
+
+    status_url = f"/api/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+
+@app.post("/api/jobs/analyze", status_code=202)
+async def submit_analyze_job(
+    file: UploadFile = File(...),
+    job_description: Optional[str] = Form(None),
+    job_url: Optional[str] = Form(None),
+    current_date: Optional[str] = Form(None),
+    webhook_url: Optional[str] = Form(None)
+):
+    """Versi asinkron /api/analyze: poll GET /api/jobs/{job_id} atau tunggu webhook."""
+    webhook_url = _validate_webhook_url(webhook_url)
+
+    async def run(upload: SpooledUpload):
+        final_jd = await resolve_job_description(job_description, job_url)
+        cv_text = await cv_text_from_upload(upload)
+        result = await analyze_cv(cv_text, final_jd, current_date)
+        if not result:
+            raise HTTPException(status_code=500, detail="AI Analysis returned empty result.")
         return result
-    except Exception as e:
-        print(f"Customize Error: {e}")
-        raise HTTPException(500, "Gagal meng-generate CV baru.")
+
+    return await _submit_job("analyze", file, run, webhook_url)
+
+
+@app.post("/api/jobs/customize", status_code=202)
+async def submit_customize_job(
+    file: UploadFile = File(...),
+    mode: str = Form(...),
+    job_description: Optional[str] = Form(None),
+    analysis_context: Optional[str] = Form(None),
+    current_date: Optional[str] = Form(None),
+    webhook_url: Optional[str] = Form(None)
+):
+    """Versi asinkron /api/customize: poll GET /api/jobs/{job_id} atau tunggu webhook."""
+    webhook_url = _validate_webhook_url(webhook_url)
+    final_context = resolve_customize_context(mode, job_description, analysis_context)
+
+    async def run(upload: SpooledUpload):
+        try:
+            cv_text = await extract_upload(upload)
+        except Exception as e:
+            raise HTTPException(400, f"Gagal membaca file: {str(e)}")
+        return await customize_cv(cv_text, mode, final_context, current_date)
+
+    return await _submit_job("customize", file, run, webhook_url)
+
+
+@app.get("/api/jobs/stats")
+async def job_stats():
+    return job_queue.stats()
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job tidak ditemukan atau hasilnya sudah kedaluwarsa.")
+    return job.to_dict()
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, timeout_keep_alive=30)
\ No newline at end of file
+    if SERVE_MODE == "production":
+        uvicorn.run("main:app", host=HOST, port=PORT, workers=WEB_CONCURRENCY, timeout_keep_alive=30)
+    else:
+        uvicorn.run("main:app", host=HOST, port=PORT, reload=True, timeout_keep_alive=30)
\ No newline at end of file
@@ -63,4 +63,14 @@ class ImprovedCVResult(BaseModel):
     education: List[CVEducation]
     projects: List[CVProject]
     certifications: Optional[List[str]] = None
-    section_labels: Optional[CVSectionLabels] = None
\ No newline at end of file
+    section_labels: Optional[CVSectionLabels] = None
+
+class QuickScoreResponse(BaseModel):
+    """Hasil quick-score lokal (tanpa LLM) berbasis lexicon skill"""
+    skill_score: int = Field(..., description="Weighted share of JD skills found in the CV, 0-100")
+    ats_keyword_density: float = Field(..., description="JD keyword occurrences in the CV per 100 words")
+    matched_skills: List[str] = Field(..., description="JD skills present in the CV, most frequent in the JD first")
+    missing_skills: List[str] = Field(..., description="JD skills absent from the CV, most frequent in the JD first")
+    critical_gaps: List[CriticalGap] = Field(..., description="Top missing skills with actionable advice")
+    jd_skill_count: int = Field(..., description="Distinct lexicon skills detected in the JD")
+    cv_skill_count: int = Field(..., description="Distinct lexicon skills detected in the CV")
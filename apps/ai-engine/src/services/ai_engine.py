@@ -2,24 +2,138 @@ import os
 import json
 import asyncio
 import re
+import time
+import hashlib
+from typing import List, Tuple
 from datetime import datetime
+from functools import lru_cache
+from pydantic import create_model
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from src.schemas import AnalysisResponse, ImprovedCVResult, CVContactInfo
+from src.services.lazy import lazy_import
+from src.schemas import AnalysisResponse, ImprovedCVResult, CVContactInfo, CVExperience
+from src.services.llm_cache import llm_cache, CachedResponse
+from src.services.result_cache import RequestResultCache, normalize_job_text
+from src.services.rate_limit import ModelLimiter, is_retryable, retry_after_hint, backoff_delay
+from src.services.streaming import PartialJSONFields
+from src.services.prompt_budget import (
+    estimate_tokens, distill_job_description, fit_to_budget, fit_cv_to_budget, jd_budget_for, cv_budget_for,
+    log_prompt_size,
+)
+from src.services.prompt_template import Prompt, PromptTemplate
+from src.services.context_cache import ContextCacheManager, GeminiCacheBackend, is_stale_cache_error
+from src.services.cv_parser import parse_cv_text, PARSED_FIELDS
+from src.services.metrics import (
+    observe_stage, record_gemini_attempt, record_usage,
+    GEMINI_RETRIES, GEMINI_FAILURES, GEMINI_HEDGES, GEMINI_FALLBACKS,
+)
+# SDK genai (~0.5 detik import) dimuat saat pertama dipakai atau saat pre-warm di lifespan
+genai = lazy_import("google.genai")
+types = lazy_import("google.genai.types")
+from src.services.deadline import (
+    DeadlineExceeded, MIN_ATTEMPT_BUDGET, REQUEST_DEADLINE, attempt_timeout, hedge_delay, hedged,
+    latency_tracker, remaining, should_fall_back, start_deadline,
+)
 
 load_dotenv()
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+# Endpoint Gemini alternatif (mis. server palsu loadtest/fake_services.py); kosong = API Google
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+_client = None
+
+
+def get_client():
+    """genai.Client dibuat saat pertama dipakai (bukan saat import modul)."""
+    global _client
+    if _client is None:
+        _client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None,
+        )
+    return _client
+
+
+# Prefix prompt statis (system_instruction) sebagai cached content Gemini, lihat context_cache.py
+context_cache = ContextCacheManager(GeminiCacheBackend(get_client))
+
+
+def warm_up():
+    """Pre-warm untuk lifespan: import SDK genai dan buat client sebelum request pertama."""
+    types.load()
+    get_client()
+
 
 # --- KONFIGURASI MODEL (MODEL ROUTING) ---
 FAST_MODEL = "gemini-2.5-flash-lite"  
 REASONING_MODEL = "gemini-2.5-flash" 
 
+# --- LIMIT PER MODEL (sesuaikan dengan kuota project Gemini) ---
+# MAX_CONCURRENCY: panggilan paralel maksimal, RPM: request per menit (0 = tanpa batas)
+MODEL_LIMITERS = {
+    FAST_MODEL: ModelLimiter(
+        int(os.getenv("FAST_MODEL_MAX_CONCURRENCY", "32")),
+        float(os.getenv("FAST_MODEL_RPM", "0")),
+    ),
+    REASONING_MODEL: ModelLimiter(
+        int(os.getenv("REASONING_MODEL_MAX_CONCURRENCY", "16")),
+        float(os.getenv("REASONING_MODEL_RPM", "0")),
+    ),
+}
+# --- PARSER CV LOKAL ---
+# "hybrid": parser lokal, LLM hanya untuk field yang confidence-nya rendah
+# "local": tanpa LLM sama sekali, "llm": selalu extract_data_only (perilaku lama)
+CV_PARSER_MODE = os.getenv("CV_PARSER_MODE", "hybrid")
+CV_PARSER_MIN_CONFIDENCE = float(os.getenv("CV_PARSER_MIN_CONFIDENCE", "0.7"))
+# --- ANALISIS CV ---
+# "split": writing/ATS (FAST_MODEL, di-cache per CV) paralel dengan skill/pengalaman/gap (REASONING_MODEL per JD)
+# "single": satu panggilan REASONING_MODEL untuk semua kriteria (perilaku lama)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "split")
+cv_quality_cache = RequestResultCache(
+    int(os.getenv("CV_QUALITY_CACHE_TTL", str(24 * 60 * 60))),
+    int(os.getenv("CV_QUALITY_CACHE_MAX_ENTRIES", "1000")),
+)
+# --- CUSTOMIZE CV ---
+# "sections": summary, tiap pengalaman, proyek & skill ditulis ulang paralel (panggilan kecil, di-cache per section)
+# "single": satu panggilan besar yang menghasilkan seluruh ImprovedCVResult (perilaku lama)
+CUSTOMIZE_MODE = os.getenv("CUSTOMIZE_MODE", "sections")
+# Hasil rewrite per section disimpan agar section yang tidak berubah tidak di-generate ulang
+section_cache = RequestResultCache(
+    int(os.getenv("SECTION_CACHE_TTL", str(24 * 60 * 60))),
+    int(os.getenv("SECTION_CACHE_MAX_ENTRIES", "2000")),
+)
+
+# Budget token input per model (prompt lengkap: instruksi template + CV + JD/konteks)
+MODEL_INPUT_BUDGETS = {
+    FAST_MODEL: int(os.getenv("FAST_MODEL_INPUT_BUDGET", "8000")),
+    REASONING_MODEL: int(os.getenv("REASONING_MODEL_INPUT_BUDGET", "12000")),
+}
+RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "30"))
+
 # Sanitasi Input
 def sanitize_content(text: str) -> str:
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
+def model_input_budget(model_name: str) -> int:
+    return MODEL_INPUT_BUDGETS.get(model_name, MODEL_INPUT_BUDGETS[REASONING_MODEL])
+
+def prepare_job_description(job_desc: str, model_name: str, reserved_tokens: int) -> str:
+    """
+    Bersihkan JD hasil scraping (navigasi, cookie banner, daftar lowongan lain, blok duplikat)
+    lalu potong per-section ke sisa budget model setelah `reserved_tokens` (instruksi template + CV).
+    """
+    if not job_desc or job_desc == "AUTO_DETECT_ROLE":
+        return job_desc
+    return distill_job_description(job_desc, jd_budget_for(model_input_budget(model_name), reserved_tokens))
+
+def prepare_cv(cv_text: str, limits: List[Tuple[str, int]]) -> str:
+    """
+    CV siap prompt (sanitize), dipangkas per section bila melebihi sisa budget.
+    `limits`: [(model, token instruksi template + JD/konteks)] untuk setiap prompt yang memuat CV ini.
+    """
+    budget = min(cv_budget_for(model_input_budget(model_name), reserved) for model_name, reserved in limits)
+    # Section CV dikenali dari teks per-baris, jadi pemangkasan dilakukan sebelum sanitize_content
+    return sanitize_content(fit_cv_to_budget(cv_text, budget))
+
 # Smart JSON Parsing
 def clean_json_text(text: str) -> str:
     try:
@@ -36,61 +150,302 @@ def clean_json_text(text: str) -> str:
     except Exception:
         return text
 
+def parse_json_response(text: str, schema):
+    """Fallback saat `response.parsed` kosong: ambil blok JSON dari teks lalu validasi ke schema."""
+    with observe_stage("json_fallback_parse"):
+        return schema(**json.loads(clean_json_text(text)))
+
+def _limiter_for(model_name: str) -> ModelLimiter:
+    limiter = MODEL_LIMITERS.get(model_name)
+    if limiter is None:
+        limiter = MODEL_LIMITERS.setdefault(model_name, ModelLimiter(16, 0))
+    return limiter
+
+
+def _has_free_slot(limiter: ModelLimiter) -> bool:
+    # Hedge hanya dikirim jika tidak perlu antre di limiter (tidak menambah beban saat kuota sudah penuh)
+    return limiter.max_concurrency <= 0 or limiter.in_flight < limiter.max_concurrency
+
+
+def _route_model(model_name: str) -> str:
+    """Alihkan ke FAST_MODEL jika sisa deadline kemungkinan tidak cukup untuk model berat."""
+    if model_name != FAST_MODEL and should_fall_back(model_name):
+        print(f"Gemini Fallback: {model_name} -> {FAST_MODEL} (sisa deadline {remaining():.1f}s)")
+        GEMINI_FALLBACKS.inc(model=model_name)
+        return FAST_MODEL
+    return model_name
+
+
+async def _call_model(contents, config, model_name, attempt, hedge=False):
+    limiter = _limiter_for(model_name)
+    if hedge:
+        GEMINI_HEDGES.inc(model=model_name)
+    # Native async client: tidak menahan thread executor selama menunggu Gemini
+    async with limiter:
+        # Durasi diukur setelah slot limiter didapat: waktu antre tidak dihitung sebagai latency model
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await get_client().aio.models.generate_content(
+                model=model_name, # Menggunakan model yang di-inject
+                contents=contents,
+                config=config
+            )
+            outcome = "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            record_gemini_attempt(model_name, attempt, elapsed, outcome, hedge)
+            if outcome == "ok":
+                latency_tracker.observe(model_name, elapsed)
+    record_usage(model_name, getattr(response, "usage_metadata", None))
+    return response
+
+
+async def _call_cached(contents, config, model_name, attempt, hedge=False):
+    """`_call_model` dengan prefix statis dari cached content jika handle-nya siap; handle yang sudah tidak ada dikirim ulang inline."""
+    cached_config = context_cache.apply(model_name, config)
+    if cached_config is config:
+        return await _call_model(contents, config, model_name, attempt, hedge)
+    try:
+        return await _call_model(contents, cached_config, model_name, attempt, hedge)
+    except Exception as e:
+        if not is_stale_cache_error(e):
+            raise
+        # Cached content sudah dihapus/kedaluwarsa di server: buang handle, jangan gagalkan request
+        print(f"Context Cache rejected ({cached_config.cached_content}): {e}")
+        context_cache.invalidate(cached_config)
+        return await _call_model(contents, config, model_name, attempt, hedge)
+
+
+async def _close_stream(stream):
+    aclose = getattr(stream, "aclose", None)
+    if aclose is None:
+        return
+    try:
+        await aclose()
+    except Exception as e:
+        print(f"Gemini Stream close failed: {e}")
+
+
+def prompt_request(prompt: Prompt, config) -> dict:
+    """
+    contents + config untuk `generate_with_retry`/`stream_with_retry`: instruksi statis template
+    dikirim sebagai system_instruction (prefix identik antar request, bisa di-cache), data request di contents.
+    """
+    return {
+        "contents": [types.Content(role="user", parts=[types.Part.from_text(text=prompt.text)])],
+        "config": config.model_copy(update={"system_instruction": prompt.instructions}),
+    }
+
+
 # [MODIFIED] Menambahkan parameter `model_name`
 async def generate_with_retry(contents, config, model_name, retries=3):
     """
     Melakukan panggilan ke AI dengan auto-retry.
     Sekarang menerima `model_name` secara dinamis.
+    Response untuk prompt yang identik dilayani dari `llm_cache` (lihat LLM_CACHE_MODE).
+    Setiap percobaan dibatasi GEMINI_ATTEMPT_TIMEOUT dan sisa deadline request (lihat deadline.py);
+    percobaan yang melewati percentile latency model di-hedge dengan panggilan kedua.
     """
+    cache_key, cached = await llm_cache.lookup(model_name, contents, config)
+    if cached is not None:
+        return cached
+
     last_exception = None
     for attempt in range(retries):
         try:
-            response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=model_name, # Menggunakan model yang di-inject
-                contents=contents,
-                config=config
+            effective_model = _route_model(model_name)
+            timeout = attempt_timeout()
+            limiter = _limiter_for(effective_model)
+            response = await hedged(
+                lambda hedge: _call_cached(contents, config, effective_model, attempt + 1, hedge),
+                hedge_delay(effective_model),
+                timeout,
+                can_hedge=lambda: _has_free_slot(limiter),
             )
+            # Jawaban model fallback tidak disimpan sebagai jawaban model yang diminta
+            if effective_model == model_name:
+                await llm_cache.store(cache_key, config, response)
             return response
+        except DeadlineExceeded as e:
+            print(f"Gemini API ({model_name}) Attempt {attempt+1}/{retries} skipped: {e}")
+            last_exception = e
+            break
         except Exception as e:
             print(f"Gemini API ({model_name}) Attempt {attempt+1}/{retries} failed: {e}")
             last_exception = e
+            if not is_retryable(e):
+                break
             if attempt < retries - 1:
-                await asyncio.sleep(1 * (2 ** attempt))
+                delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY, retry_after_hint(e))
+                left = remaining()
+                if left is not None and delay + MIN_ATTEMPT_BUDGET >= left:
+                    # Tidak ada waktu untuk percobaan berikutnya; gagal cepat daripada menunggu sia-sia
+                    break
+                GEMINI_RETRIES.inc(model=model_name)
+                await asyncio.sleep(delay)
     
+    GEMINI_FAILURES.inc(model=model_name)
     raise last_exception
 
-async def extract_data_only(cv_text: str) -> ImprovedCVResult:
-    clean_cv = sanitize_content(cv_text)
+async def _produce_stream(contents, config, model_name, attempt, timeout, queue: asyncio.Queue):
+    """
+    Tarik chunk stream model ke `queue` selama memegang slot limiter, lalu kirim None sebagai akhir stream
+    (juga saat gagal). Slot dilepas begitu model selesai, tidak menunggu consumer (SSE lambat) membaca.
+    Mengembalikan usage_metadata; error percobaan diteruskan lewat task ini.
+    """
+    usage = None
+    try:
+        async with _limiter_for(model_name):
+            started = time.perf_counter()
+            stream = None
+            try:
+                stream = await asyncio.wait_for(
+                    get_client().aio.models.generate_content_stream(
+                        model=model_name,
+                        contents=contents,
+                        config=config
+                    ),
+                    timeout,
+                )
+                while True:
+                    left = timeout - (time.perf_counter() - started)
+                    try:
+                        if left <= 0:
+                            raise asyncio.TimeoutError()
+                        chunk = await asyncio.wait_for(stream.__anext__(), left)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise DeadlineExceeded(f"Stream model tidak mengirim chunk dalam {timeout:.1f} detik.")
+                    # usage_metadata lengkap ada di chunk terakhir
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.text:
+                        queue.put_nowait(chunk.text)
+            except Exception:
+                record_gemini_attempt(model_name, attempt, time.perf_counter() - started, "error")
+                raise
+            finally:
+                if stream is not None:
+                    await _close_stream(stream)
+            record_gemini_attempt(model_name, attempt, time.perf_counter() - started)
+    finally:
+        queue.put_nowait(None)
+    return usage
 
-    prompt_text = f"""
-    You are a strict data parser. 
-    Extract the following CV text into a structured JSON format matching this schema.
-    
-    RULES:
+async def stream_with_retry(contents, config, model_name, retries=3):
+    """
+    Versi streaming dari `generate_with_retry`: yield potongan teks begitu model menghasilkannya.
+    Retry hanya dilakukan sebelum chunk pertama terkirim (setelahnya error diteruskan ke caller).
+    Setiap chunk ditunggu paling lama sisa timeout percobaan: stream yang macet ditutup dengan
+    DeadlineExceeded (slot limiter dilepas, percobaan berikutnya bisa dialihkan ke FAST_MODEL).
+    Chunk ditarik oleh task terpisah (`_produce_stream`) sehingga consumer yang lambat tidak menahan slot limiter.
+    """
+    cache_key, cached = await llm_cache.lookup(model_name, contents, config)
+    if cached is not None:
+        yield cached.text
+        return
+
+    for attempt in range(retries):
+        chunks = []
+        usage = None
+        effective_model = model_name
+        call_config = config
+        try:
+            effective_model = _route_model(model_name)
+            timeout = attempt_timeout()
+            call_config = context_cache.apply(effective_model, config)
+            queue: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.create_task(
+                _produce_stream(contents, call_config, effective_model, attempt + 1, timeout, queue)
+            )
+            try:
+                while True:
+                    text = await queue.get()
+                    if text is None:
+                        break
+                    chunks.append(text)
+                    yield text
+                usage = await producer
+            finally:
+                # Caller berhenti membaca (disconnect) atau dibatalkan: hentikan stream model
+                if not producer.done():
+                    producer.cancel()
+                    await asyncio.gather(producer, return_exceptions=True)
+            record_usage(effective_model, usage)
+            if effective_model == model_name:
+                await llm_cache.store(cache_key, config, CachedResponse("".join(chunks)))
+            return
+        except Exception as e:
+            print(f"Gemini Stream ({effective_model}) Attempt {attempt+1}/{retries} failed: {e}")
+            if call_config is not config and not chunks and is_stale_cache_error(e) and attempt < retries - 1:
+                # Cached content ditolak (dihapus/kedaluwarsa di server): ulangi dengan prefix inline
+                context_cache.invalidate(call_config)
+                continue
+            delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY, retry_after_hint(e))
+            left = remaining()
+            # Stream macet sebelum chunk pertama tetap di-retry selama sisa deadline request cukup
+            no_time = left is not None and delay + MIN_ATTEMPT_BUDGET >= left
+            if chunks or no_time or not is_retryable(e) or attempt >= retries - 1:
+                GEMINI_FAILURES.inc(model=model_name)
+                raise
+            GEMINI_RETRIES.inc(model=model_name)
+            await asyncio.sleep(delay)
+
+# --- TEMPLATE PROMPT ---
+# Instruksi statis lebih dulu (system_instruction, identik di setiap request), data request (tanggal, JD, CV)
+# di bagian akhir: prefix yang sama tidak diproses ulang model (implicit caching / context_cache).
+EXTRACTION_RULES = """RULES:
     1. DO NOT rewrite, improve, or change the content. Extract it exactly as is.
     2. If a field is missing, use an empty string "" or empty list [].
     3. HYPERLINKS: If you find text in format "Text [URL]", render it as HTML: <a href='URL'>Text</a>.
-    4. Do not use markdown for links, use strictly HTML <a> tags.
+    4. Do not use markdown for links, use strictly HTML <a> tags."""
+
+EXTRACT_TEMPLATE = PromptTemplate("extract", f"""
+    You are a strict data parser. 
+    Extract the CV TEXT given in the request into a structured JSON format matching this schema.
     
-    CV TEXT:
-    {clean_cv}
+    {EXTRACTION_RULES}
 
     OUTPUT SCHEMA: ImprovedCVResult (JSON)
-    """
+    """, """
+    CV TEXT:
+    {cv}
+    """)
+
+EXTRACT_FIELDS_TEMPLATE = PromptTemplate("extract_fields", f"""
+    You are a strict data parser. 
+    Extract ONLY the FIELDS listed in the request from the CV TEXT given in the request.
+    
+    {EXTRACTION_RULES}
+
+    OUTPUT SCHEMA: JSON object with exactly the listed fields (same shape as ImprovedCVResult)
+    """, """
+    FIELDS: {fields}
+
+    CV TEXT:
+    {cv}
+    """)
+
+
+async def extract_data_only(cv_text: str) -> ImprovedCVResult:
+    clean_cv = sanitize_content(cv_text)
+
     try:
         
         response = await generate_with_retry(
-            contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt_text)])],
-            config=types.GenerateContentConfig(
+            **prompt_request(EXTRACT_TEMPLATE.render(cv=clean_cv), types.GenerateContentConfig(
                 response_mime_type="application/json", 
                 response_schema=ImprovedCVResult,
                 temperature=0.0
-            ),
+            )),
             model_name=FAST_MODEL # <--- Explicitly use Fast Model
         )
         if response.parsed: return response.parsed
-        return ImprovedCVResult(**json.loads(clean_json_text(response.text)))
+        return parse_json_response(response.text, ImprovedCVResult)
     except Exception as e:
         print(f"Extract Error: {e}")
         return ImprovedCVResult(
@@ -100,175 +455,472 @@ async def extract_data_only(cv_text: str) -> ImprovedCVResult:
         )
 
 
-async def analyze_cv(cv_text: str, job_desc: str, current_date: str = None):
-    
-    if not current_date:
-        current_date = datetime.now().strftime("%Y-%m-%d")
+@lru_cache(maxsize=64)
+def _partial_cv_schema(fields: tuple):
+    """Schema ImprovedCVResult yang hanya berisi `fields` (output model lebih pendek)."""
+    return create_model(
+        "PartialCVResult",
+        **{field: (ImprovedCVResult.model_fields[field].annotation, ...) for field in fields}
+    )
 
+
+async def extract_fields_only(cv_text: str, fields: list) -> dict:
+    """Seperti `extract_data_only`, tetapi model hanya mengisi field yang diminta."""
     clean_cv = sanitize_content(cv_text)
+    schema = _partial_cv_schema(tuple(fields))
 
-    is_auto_detect = False
-    final_job_desc = job_desc
+    response = await generate_with_retry(
+        **prompt_request(EXTRACT_FIELDS_TEMPLATE.render(fields=", ".join(fields), cv=clean_cv), types.GenerateContentConfig(
+            response_mime_type="application/json", 
+            response_schema=schema,
+            temperature=0.0
+        )),
+        model_name=FAST_MODEL
+    )
+    parsed = response.parsed or parse_json_response(response.text, schema)
+    return parsed.model_dump()
+
+
+async def structure_cv(cv_text: str) -> ImprovedCVResult:
+    """
+    Ubah teks CV (output extractor, masih per-baris) menjadi ImprovedCVResult.
+    Parser lokal dipakai lebih dulu; FAST_MODEL hanya dipanggil untuk section yang tidak yakin.
+    """
+    if CV_PARSER_MODE == "llm":
+        return await extract_data_only(cv_text)
+
+    parsed = parse_cv_text(cv_text)
+    low_fields = parsed.low_confidence_fields(CV_PARSER_MIN_CONFIDENCE)
+    if not low_fields or CV_PARSER_MODE == "local":
+        return parsed.result
+
+    # Struktur CV tidak dikenali sama sekali: lebih murah satu ekstraksi penuh
+    if len(low_fields) > len(PARSED_FIELDS) // 2:
+        return await extract_data_only(cv_text)
+
+    try:
+        merged = parsed.result.model_dump()
+        merged.update(await extract_fields_only(cv_text, low_fields))
+        return ImprovedCVResult(**merged)
+    except Exception as e:
+        print(f"Partial Extract Error ({', '.join(low_fields)}): {e}")
+        return parsed.result
+
+
+def resolve_analysis_target(job_desc: str):
+    """Mengembalikan (is_auto_detect, final_job_desc) dari input JD / flag AUTO_DETECT_ROLE."""
     # Logic pengecekan flag dari main.py
     if not job_desc or job_desc.strip() == "" or job_desc == "AUTO_DETECT_ROLE":
-        is_auto_detect = True
         # Placeholder sementara agar variabel tidak kosong
-        final_job_desc = "DYNAMIC_INFERENCE_MODE"
-
-    async def _perform_analysis():
-        if is_auto_detect:
-            # Logic: 1. Baca CV -> 2. Tentukan Role -> 3. Nilai berdasarkan Role itu
-            role_context_instruction = """
-            *** NO JOB DESCRIPTION PROVIDED - AUTO-INFERENCE MODE ***
-            1. **IDENTIFY ROLE**: First, deep-read the candidate's CV to determine their primary professional role (e.g., "Senior Business Development Manager", "Junior Data Analyst", "Marketing Specialist").
-            2. **ESTABLISH STANDARD**: Mentally retrieve the standard industry Job Description and requirements for that SPECIFIC identified role.
-            3. **ANALYZE**: Score and evaluate the candidate SOLELY based on how well they fit the standard requirements for the role you identified in step 1.
-            
-            *IMPORTANT*: In the 'overall_summary', explicitly state: "Analyzed based on inferred role: [Insert Role Name]"
-            """
-            
-            # Kita kosongkan field JOB DESCRIPTION di prompt agar AI fokus ke instruksi di atas
-            jd_display = "Not Provided (Please infer role from CV as instructed above)"
-        else:
-            # Jika ada JD asli (Url/Text), gunakan instruksi standar
-            role_context_instruction = "Analyze the candidate CV strictly against the provided JOB DESCRIPTION below."
-            jd_display = final_job_desc
-        
-        prompt_text = f"""
-        You are a Senior Technical Recruiter and CV Expert.
-        {role_context_instruction}. Use "You" to address the candidate directly.
-
-        *** TIME CONTEXT (CRITICAL) ***:
-        - Today's Date is: **{current_date}**.
-        - Any experience listed with a year equal to or before the current year ({current_date.split('-')[0]}) is VALID.
-        - DO NOT flag "{current_date.split('-')[0]}" (Current Year) as a "future date error".
-        - "Present" or "Current" means valid up to today.
-
-        *** LANGUAGE INSTRUCTION (CRITICAL) ***:
-        1. **DETECT LANGUAGE**: Identify the dominant language used in the "CANDIDATE CV CONTENT".
-        2. **OUTPUT LANGUAGE**: 
-           - IF the CV is in **Indonesian** -> ALL your feedback, summaries, details, and action items MUST be in **INDONESIAN**.
-           - IF the CV is in **English** -> ALL your feedback, summaries, details, and action items MUST be in **ENGLISH**.
-        3. Do not mix languages (e.g., do not write English feedback for an Indonesian CV).
-
-        JOB DESCRIPTION:
-        {jd_display}
-
-        CANDIDATE CV CONTENT:
-        {clean_cv}
-
-        Please perform a deep analysis based on these 6 specific criteria:
-        1. **Candidate Overview**:
-           - Extract the candidate's full name.
-           - Give an overall score (1-100).
-           - Provide detailed feedback summarizing strengths and weaknesses.
-        
-        2. **Writing Style (Score 0-100)**: 
-           - Check for clarity, grammar, and typos.
-        
-        3. **CV Format & ATS (Score 0-100)**: 
-           - Is the format ATS-friendly?
-        
-        4. **Skill Match (Score 0-100)**: 
-           - How well do the hard skills and soft skills match the Job Description? Mostly focus on the hard skills.
-        
-        5. **Experience & Projects (Score 0-100)**:
-           - **CRITICAL SCORING LOGIC**: Score STRICTLY based on **Relevance to the Job Description**, not just general seniority.
-           - **Domain Alignment Check**: 
-             - If the candidate has senior experience in a **different field** (e.g., Candidate is an ML Engineer, Job is Business Dev), the score MUST be **LOW (under 50)**.
-             - If the candidate's past projects directly solve the problems listed in the JD, the score should be **HIGH**.
-           - Define the main seniority level relative to the specific JD (Junior, Mid, Senior, Lead). 
-           - CHECK DATES CAREFULLY: Do not incorrectly mark valid recent dates as future errors based on the 'Today's Date' provided above.
-
-        6. **Keyword Relevance & Critical Gaps (Score 0-100)**:
-           - Identify critical gaps.
-           - **CRITICAL INSTRUCTION**: For EACH gap identified, provide a specific "action". 
-             Example: Gap="Docker", Action="Build a simple microservice using Docker."
-
-        *** REQUIRED JSON OUTPUT FORMAT ***
-        You MUST output strictly JSON matching the AnalysisResponse schema.
-
-        """
-        
+        return True, "DYNAMIC_INFERENCE_MODE"
+    return False, job_desc
+
+
+ANALYSIS_LANGUAGE_RULES = """*** LANGUAGE INSTRUCTION (CRITICAL) ***:
+    1. **DETECT LANGUAGE**: Identify the dominant language used in the "CANDIDATE CV CONTENT".
+    2. **OUTPUT LANGUAGE**: 
+       - IF the CV is in **Indonesian** -> ALL your feedback, summaries, details, and action items MUST be in **INDONESIAN**.
+       - IF the CV is in **English** -> ALL your feedback, summaries, details, and action items MUST be in **ENGLISH**.
+    3. Do not mix languages (e.g., do not write English feedback for an Indonesian CV)."""
+
+
+# Instruksi konteks role per varian template: JD diberikan ("job") atau role di-infer dari CV ("auto")
+ANALYSIS_ROLE_CONTEXT = {
+    "job": "Analyze the candidate CV strictly against the provided JOB DESCRIPTION in the request.",
+    # Logic: 1. Baca CV -> 2. Tentukan Role -> 3. Nilai berdasarkan Role itu
+    "auto": """
+    *** NO JOB DESCRIPTION PROVIDED - AUTO-INFERENCE MODE ***
+    1. **IDENTIFY ROLE**: First, deep-read the candidate's CV to determine their primary professional role (e.g., "Senior Business Development Manager", "Junior Data Analyst", "Marketing Specialist").
+    2. **ESTABLISH STANDARD**: Mentally retrieve the standard industry Job Description and requirements for that SPECIFIC identified role.
+    3. **ANALYZE**: Score and evaluate the candidate SOLELY based on how well they fit the standard requirements for the role you identified in step 1.
+    
+    *IMPORTANT*: In the 'overall_summary', explicitly state: "Analyzed based on inferred role: [Insert Role Name]"
+    """,
+}
+
+ANALYSIS_TIME_RULES = """*** TIME CONTEXT (CRITICAL) ***:
+    - Today's Date is the TODAY'S DATE given in the request.
+    - Any experience listed with a year equal to or before the current year is VALID.
+    - DO NOT flag the current year as a "future date error".
+    - "Present" or "Current" means valid up to today."""
+
+EXPERIENCE_CRITERIA = """**CRITICAL SCORING LOGIC**: Score STRICTLY based on **Relevance to the Job Description**, not just general seniority.
+       - **Domain Alignment Check**: 
+         - If the candidate has senior experience in a **different field** (e.g., Candidate is an ML Engineer, Job is Business Dev), the score MUST be **LOW (under 50)**.
+         - If the candidate's past projects directly solve the problems listed in the JD, the score should be **HIGH**.
+       - Define the main seniority level relative to the specific JD (Junior, Mid, Senior, Lead). 
+       - CHECK DATES CAREFULLY: Do not incorrectly mark valid recent dates as future errors based on the TODAY'S DATE provided."""
+
+GAP_CRITERIA = """Identify critical gaps.
+       - **CRITICAL INSTRUCTION**: For EACH gap identified, provide a specific "action". 
+         Example: Gap="Docker", Action="Build a simple microservice using Docker.\""""
+
+ANALYSIS_REQUEST = """
+    TODAY'S DATE: {current_date} (current year: {current_year})
+
+    JOB DESCRIPTION:
+    {job_desc}
+
+    CANDIDATE CV CONTENT:
+    {cv}
+    """
+
+
+def _analysis_instructions(role_context_instruction: str) -> str:
+    return f"""
+    You are a Senior Technical Recruiter and CV Expert.
+    {role_context_instruction}
+    Use "You" to address the candidate directly.
+
+    {ANALYSIS_TIME_RULES}
+
+    {ANALYSIS_LANGUAGE_RULES}
+
+    Please perform a deep analysis based on these 6 specific criteria:
+    1. **Candidate Overview**:
+       - Extract the candidate's full name.
+       - Give an overall score (1-100).
+       - Provide detailed feedback summarizing strengths and weaknesses.
+    
+    2. **Writing Style (Score 0-100)**: 
+       - Check for clarity, grammar, and typos.
+    
+    3. **CV Format & ATS (Score 0-100)**: 
+       - Is the format ATS-friendly?
+    
+    4. **Skill Match (Score 0-100)**: 
+       - How well do the hard skills and soft skills match the Job Description? Mostly focus on the hard skills.
+    
+    5. **Experience & Projects (Score 0-100)**:
+       - {EXPERIENCE_CRITERIA}
+
+    6. **Keyword Relevance & Critical Gaps (Score 0-100)**:
+       - {GAP_CRITERIA}
+
+    *** REQUIRED JSON OUTPUT FORMAT ***
+    You MUST output strictly JSON matching the AnalysisResponse schema.
+    """
+
+
+def _job_fit_instructions(role_context_instruction: str) -> str:
+    return f"""
+    You are a Senior Technical Recruiter and CV Expert.
+    {role_context_instruction}
+    Use "You" to address the candidate directly.
+
+    {ANALYSIS_TIME_RULES}
+
+    {ANALYSIS_LANGUAGE_RULES}
+
+    Writing style and ATS format are evaluated separately; focus ONLY on fit for the job:
+    1. **Overall Summary**:
+       - Provide detailed feedback summarizing strengths and weaknesses for this job.
+    
+    2. **Skill Match (Score 0-100)**: 
+       - How well do the hard skills and soft skills match the Job Description? Mostly focus on the hard skills.
+    
+    3. **Experience & Projects (Score 0-100)**:
+       - {EXPERIENCE_CRITERIA}
+
+    4. **Critical Gaps**:
+       - {GAP_CRITERIA}
+
+    *** REQUIRED JSON OUTPUT FORMAT ***
+    Output strictly JSON with: overall_summary, skill_score, skill_detail, experience_score, experience_detail, critical_gaps.
+    """
+
+
+ANALYSIS_TEMPLATES = {
+    variant: PromptTemplate(f"analysis:{variant}", _analysis_instructions(role.strip()), ANALYSIS_REQUEST)
+    for variant, role in ANALYSIS_ROLE_CONTEXT.items()
+}
+JOB_FIT_TEMPLATES = {
+    variant: PromptTemplate(f"job_fit:{variant}", _job_fit_instructions(role.strip()), ANALYSIS_REQUEST)
+    for variant, role in ANALYSIS_ROLE_CONTEXT.items()
+}
+
+CV_QUALITY_TEMPLATE = PromptTemplate("cv_quality", f"""
+    You are a Senior Technical Recruiter and CV Expert. Evaluate ONLY the quality of the CV document itself,
+    independent of any job. Use "You" to address the candidate directly.
+
+    {ANALYSIS_LANGUAGE_RULES}
+
+    Evaluate:
+    1. **Candidate Name**: Extract the candidate's full name.
+    2. **Writing Style (Score 0-100)**: 
+       - Check for clarity, grammar, and typos.
+    3. **CV Format & ATS (Score 0-100)**: 
+       - Is the format ATS-friendly?
+
+    *** REQUIRED JSON OUTPUT FORMAT ***
+    Output strictly JSON with: candidate_name, writing_score, writing_detail, ats_score, ats_detail.
+    """, """
+    CANDIDATE CV CONTENT:
+    {cv}
+    """)
+
+
+def analysis_role_context(job_desc: str):
+    """(varian template, teks JD yang ditampilkan di prompt) untuk JD asli maupun AUTO_DETECT_ROLE."""
+    is_auto_detect, final_job_desc = resolve_analysis_target(job_desc)
+    if is_auto_detect:
+        # Kita kosongkan field JOB DESCRIPTION di prompt agar AI fokus ke instruksi auto-inference
+        return "auto", "Not Provided (Please infer role from CV as instructed)"
+    return "job", final_job_desc
+
+
+def _render_analysis(templates: dict, clean_cv: str, job_desc: str, current_date: str) -> Prompt:
+    variant, jd_display = analysis_role_context(job_desc)
+    return templates[variant].render(
+        current_date=current_date, current_year=current_date.split('-')[0], job_desc=jd_display, cv=clean_cv
+    )
+
+
+def build_analysis_prompt(clean_cv: str, job_desc: str, current_date: str) -> Prompt:
+    return _render_analysis(ANALYSIS_TEMPLATES, clean_cv, job_desc, current_date)
+
+
+def analysis_config(schema=AnalysisResponse) -> "types.GenerateContentConfig":
+    return types.GenerateContentConfig(
+        response_mime_type="application/json", 
+        response_schema=schema,
+        temperature=0.0,
+        top_p=0.1,
+        top_k=20
+    )
+
+
+# --- ANALISIS PER KRITERIA ---
+# Writing & ATS hanya menilai CV (tidak bergantung JD) -> FAST_MODEL, di-cache per hash CV.
+# Skill, pengalaman, gap & ringkasan bergantung JD -> REASONING_MODEL per JD.
+CV_ONLY_FIELDS = ("candidate_name", "writing_score", "writing_detail", "ats_score", "ats_detail")
+JOB_FIT_FIELDS = ("overall_summary", "skill_score", "skill_detail", "experience_score", "experience_detail", "critical_gaps")
+
+
+@lru_cache(maxsize=8)
+def _partial_analysis_schema(fields: tuple):
+    return create_model(
+        "PartialAnalysisResponse",
+        **{field: (AnalysisResponse.model_fields[field].annotation, ...) for field in fields}
+    )
+
+
+def build_cv_quality_prompt(clean_cv: str) -> Prompt:
+    return CV_QUALITY_TEMPLATE.render(cv=clean_cv)
+
+
+def build_job_fit_prompt(clean_cv: str, job_desc: str, current_date: str) -> Prompt:
+    return _render_analysis(JOB_FIT_TEMPLATES, clean_cv, job_desc, current_date)
+
+
+async def assess_cv_quality(clean_cv: str) -> dict:
+    """Writing & ATS (tidak bergantung JD). Re-analyze CV yang sama terhadap JD baru tidak memanggil model lagi."""
+    schema = _partial_analysis_schema(CV_ONLY_FIELDS)
+
+    async def run():
+        response = await generate_with_retry(
+            **prompt_request(build_cv_quality_prompt(clean_cv), analysis_config(schema)),
+            model_name=FAST_MODEL
+        )
+        parsed = response.parsed or parse_json_response(response.text, schema)
+        return parsed.model_dump()
+
+    key = hashlib.sha256(f"{FAST_MODEL}\n{clean_cv}".encode("utf-8")).hexdigest()
+    return await cv_quality_cache.get_or_run(key, run)
+
+
+async def assess_job_fit(clean_cv: str, job_desc: str, current_date: str) -> dict:
+    schema = _partial_analysis_schema(JOB_FIT_FIELDS)
+    response = await generate_with_retry(
+        **prompt_request(build_job_fit_prompt(clean_cv, job_desc, current_date), analysis_config(schema)),
+        model_name=REASONING_MODEL
+    )
+    parsed = response.parsed or parse_json_response(response.text, schema)
+    return parsed.model_dump()
+
+
+def empty_analysis(error: Exception) -> AnalysisResponse:
+    return AnalysisResponse(
+        candidate_name="Unknown", overall_score=0, overall_summary=f"Error: {str(error)}",
+        writing_score=0, writing_detail="", ats_score=0, ats_detail="",
+        skill_score=0, skill_detail="", experience_score=0, experience_detail="",
+        keyword_score=0, critical_gaps=[]
+    )
+
+
+def compute_overall_score(analysis_res: AnalysisResponse) -> int:
+    avg_score = (
+        analysis_res.ats_score + 
+        analysis_res.writing_score + 
+        analysis_res.skill_score + 
+        analysis_res.experience_score
+    ) / 4
+    return int(round(avg_score))
+
+
+async def perform_analysis(clean_cv: str, job_desc: str, current_date: str) -> AnalysisResponse:
+    """Scoring CV terhadap JD (overall_score sudah dihitung ulang)."""
+    if ANALYSIS_MODE == "split":
         try:
-            
-            response = await generate_with_retry(
-                contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt_text)])],
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json", 
-                    response_schema=AnalysisResponse,
-                    temperature=0.0,
-                    top_p=0.1,
-                    top_k=20
-                ),
-                model_name=REASONING_MODEL 
+            # Kedua tahap paralel; tahap CV-only biasanya sudah ada di cache
+            quality, fit = await asyncio.gather(
+                assess_cv_quality(clean_cv),
+                assess_job_fit(clean_cv, job_desc, current_date)
             )
-            if response.parsed: 
-                return response.parsed
-            else:
-                return AnalysisResponse(**json.loads(clean_json_text(response.text)))
-                
+            analysis_res = AnalysisResponse(overall_score=0, **quality, **fit)
         except Exception as e:
             print(f"Analyze Error: {e}")
-            return AnalysisResponse(
-                candidate_name="Unknown", overall_score=0, overall_summary=f"Error: {str(e)}",
-                writing_score=0, writing_detail="", ats_score=0, ats_detail="",
-                skill_score=0, skill_detail="", experience_score=0, experience_detail="",
-                keyword_score=0, critical_gaps=[]
-            )
+            analysis_res = empty_analysis(e)
+        analysis_res.overall_score = compute_overall_score(analysis_res)
+        return analysis_res
+
+    prompt = build_analysis_prompt(clean_cv, job_desc, current_date)
+    
+    try:
+        
+        response = await generate_with_retry(
+            **prompt_request(prompt, analysis_config()),
+            model_name=REASONING_MODEL 
+        )
+        if response.parsed: 
+            analysis_res = response.parsed
+        else:
+            analysis_res = parse_json_response(response.text, AnalysisResponse)
+            
+    except Exception as e:
+        print(f"Analyze Error: {e}")
+        analysis_res = empty_analysis(e)
+
+    analysis_res.overall_score = compute_overall_score(analysis_res)
+    return analysis_res
+
+
+def _analysis_static_tokens() -> int:
+    """Bagian tetap prompt analisis terbesar di REASONING_MODEL (varian job / auto-detect)."""
+    templates = JOB_FIT_TEMPLATES if ANALYSIS_MODE == "split" else ANALYSIS_TEMPLATES
+    return max(template.static_tokens for template in templates.values())
+
+
+def _analysis_cv_limits(job_desc: str) -> List[Tuple[str, int]]:
+    """Semua prompt analisis yang memuat CV; di mode split tahap cv_quality berjalan di FAST_MODEL."""
+    limits = [(REASONING_MODEL, _analysis_static_tokens() + estimate_tokens(job_desc))]
+    if ANALYSIS_MODE == "split":
+        limits.append((FAST_MODEL, CV_QUALITY_TEMPLATE.static_tokens))
+    return limits
+
+
+def _analysis_cv_reserve(cv_tokens: int) -> int:
+    """Token CV yang perlu disisakan untuk JD: di mode split CV tidak pernah melebihi budget tahap cv_quality."""
+    if ANALYSIS_MODE == "split":
+        return min(cv_tokens, cv_budget_for(model_input_budget(FAST_MODEL), CV_QUALITY_TEMPLATE.static_tokens))
+    return cv_tokens
+
+
+def prepare_analysis_inputs(cv_text: str, job_desc: str, label: str) -> Tuple[str, str]:
+    """
+    (clean_cv, job_desc) untuk prompt analisis dengan budget prompt utuh: JD mendapat sisa budget
+    setelah instruksi + CV, lalu CV dipangkas per section bila total masih melebihi budget.
+    """
+    static = _analysis_static_tokens()
+    full_cv = estimate_tokens(sanitize_content(cv_text))
+    prepared_jd = prepare_job_description(job_desc, REASONING_MODEL, static + _analysis_cv_reserve(full_cv))
+    clean_cv = prepare_cv(cv_text, _analysis_cv_limits(prepared_jd))
+    log_prompt_size(
+        label,
+        static + full_cv + estimate_tokens(job_desc),
+        static + estimate_tokens(clean_cv) + estimate_tokens(prepared_jd),
+        model_input_budget(REASONING_MODEL),
+    )
+    return clean_cv, prepared_jd
+
+
+async def analyze_cv(cv_text: str, job_desc: str, current_date: str = None):
+    
+    if not current_date:
+        current_date = datetime.now().strftime("%Y-%m-%d")
+
+    clean_cv, job_desc = prepare_analysis_inputs(cv_text, job_desc, "analyze")
 
     # Eksekusi Paralel:
     # 1. Analisis butuh waktu lama & otak kuat -> REASONING_MODEL
     # 2. Ekstraksi data butuh cepat -> FAST_MODEL
     analysis_res, original_data = await asyncio.gather(
-        _perform_analysis(),
-        extract_data_only(clean_cv)
+        perform_analysis(clean_cv, job_desc, current_date),
+        # Parser lokal butuh teks per-baris (sebelum sanitize_content)
+        structure_cv(cv_text)
     )
 
-    avg_score = (
-        analysis_res.ats_score + 
-        analysis_res.writing_score + 
-        analysis_res.skill_score + 
-        analysis_res.experience_score
-    ) / 4
-    analysis_res.overall_score = int(round(avg_score))
-
     return {
         "analysis": analysis_res.model_dump(),
         "cv_data": original_data.model_dump()
     }
 
-async def customize_cv(cv_text: str, mode: str, context_data: str, current_date: str = None):
-    
+async def analyze_cv_multi(cv_text: str, job_descs: dict, current_date: str = None):
+    """
+    Satu CV terhadap banyak JD: CV di-sanitize & distrukturkan sekali (bagian yang tidak bergantung JD),
+    scoring per JD berjalan paralel. Mengembalikan (cv_data, {key: AnalysisResponse}).
+    """
     if not current_date:
         current_date = datetime.now().strftime("%Y-%m-%d")
 
-    clean_cv = sanitize_content(cv_text)
+    static = _analysis_static_tokens()
+    full_cv = estimate_tokens(sanitize_content(cv_text))
+    keys = list(job_descs)
+    prepared = [prepare_job_description(job_descs[key], REASONING_MODEL, static + _analysis_cv_reserve(full_cv)) for key in keys]
+    # Satu CV dipakai untuk semua JD: harus muat bersama JD terpanjang
+    longest_jd = max(prepared, key=estimate_tokens, default="")
+    clean_cv = prepare_cv(cv_text, _analysis_cv_limits(longest_jd))
+    log_prompt_size(
+        "analyze_multi",
+        static + full_cv + max((estimate_tokens(job_descs[key]) for key in keys), default=0),
+        static + estimate_tokens(clean_cv) + estimate_tokens(longest_jd),
+        model_input_budget(REASONING_MODEL),
+    )
+
+    original_data, *analyses = await asyncio.gather(
+        structure_cv(cv_text),
+        *(perform_analysis(clean_cv, job_desc, current_date) for job_desc in prepared)
+    )
+    return original_data, dict(zip(keys, analyses))
+
 
+def customize_target(mode: str, context_data: str, cv_text: str) -> Tuple[str, str, str]:
+    """
+    (mode_context, goal, clean_cv) untuk prompt customize dengan budget prompt utuh di REASONING_MODEL:
+    JD / feedback analisis mendapat sisa budget setelah instruksi + CV, lalu CV dipangkas bila masih melebihi.
+    """
+    static = CUSTOMIZE_TEMPLATE.static_tokens
+    full_cv = estimate_tokens(sanitize_content(cv_text))
     if mode == 'job_desc':
-        mode_context = f"TARGET JOB DESCRIPTION: {context_data}"
+        context = prepare_job_description(context_data, REASONING_MODEL, static + full_cv)
+        mode_context = f"TARGET JOB DESCRIPTION: {context}"
         goal = "Tailor the CV keywords to match the Target Job, but PRESERVE the candidate's history."
     else: 
-        mode_context = f"ANALYSIS FEEDBACK: {context_data}"
+        # Feedback analisis (semua field AnalysisResponse) bisa sepanjang JD: dipangkas per section juga
+        context = fit_to_budget(context_data, jd_budget_for(model_input_budget(REASONING_MODEL), static + full_cv))
+        mode_context = f"ANALYSIS FEEDBACK: {context}"
         goal = "Improve the CV based on the weakness analysis provided."
 
-    prompt_text = f"""
-    You are an Expert Resume Writer. Your task is to REWRITE the candidate's CV to be world-class, ATS-friendly, and high-impact.
-    
-    CONTEXT:
-    - Today's Date: {current_date}
-    - {mode_context}
-    
-    GOAL: {goal}
+    reserved = static + estimate_tokens(mode_context) + estimate_tokens(goal)
+    clean_cv = prepare_cv(cv_text, [(REASONING_MODEL, reserved)])
+    log_prompt_size(
+        "customize",
+        reserved - estimate_tokens(context) + estimate_tokens(context_data) + full_cv,
+        reserved + estimate_tokens(clean_cv),
+        model_input_budget(REASONING_MODEL),
+    )
+    return mode_context, goal, clean_cv
 
-    ORIGINAL CV CONTENT:
-    {clean_cv}
+
+CUSTOMIZE_TEMPLATE = PromptTemplate("customize", """
+    You are an Expert Resume Writer. Your task is to REWRITE the candidate's CV to be world-class, ATS-friendly, and high-impact.
+    The request gives the CONTEXT (today's date and the target), the GOAL and the ORIGINAL CV CONTENT.
     
     *** CRITICAL RULES ***:
     1. **NO DELETION**: Preserve all work history.
     2. **NO HALLUCINATIONS**: Do not invent skills.
     3. **LINKS**: Preserve all URLs. Convert "Text [URL]" to <a href='URL'>Text</a>.
-    3. **DATE ACCURACY**: Ensure dates are formatted correctly relative to today ({current_date}). 
+    3. **DATE ACCURACY**: Ensure dates are formatted correctly relative to today (Today's Date in the CONTEXT). 
        If a job is current, ensure it is clear (e.g., "Jan 2024 - Present").
     4. **LANGUAGE CONSISTENCY (IMPORTANT)**: 
        - Detect the language of the 'ORIGINAL CV CONTENT'.
@@ -282,26 +934,345 @@ async def customize_cv(cv_text: str, mode: str, context_data: str, current_date:
     3. Skills: Re-organize based on priority.
 
     OUTPUT: Strictly JSON matching the ImprovedCVResult schema.
-    """
+    """, """
+    CONTEXT:
+    - Today's Date: {current_date}
+    - {mode_context}
+    
+    GOAL: {goal}
+
+    ORIGINAL CV CONTENT:
+    {cv}
+    """)
+
+
+def error_cv_result(error: Exception) -> ImprovedCVResult:
+    return ImprovedCVResult(
+        full_name="Error Generating CV", professional_summary=f"AI Error: {str(error)}",
+        contact_info=CVContactInfo(email="", phone="", location=""),
+        hard_skills=[], soft_skills=[], work_experience=[], education=[], projects=[]
+    )
+
+
+async def customize_cv(cv_text: str, mode: str, context_data: str, current_date: str = None):
+    
+    if not current_date:
+        current_date = datetime.now().strftime("%Y-%m-%d")
+
+    mode_context, goal, clean_cv = customize_target(mode, context_data, cv_text)
+
+    if CUSTOMIZE_MODE == "sections":
+        # Parser lokal butuh teks per-baris, bukan versi yang sudah di-sanitize
+        return await customize_cv_sections(cv_text, mode_context, goal, current_date)
+
+    prompt = CUSTOMIZE_TEMPLATE.render(current_date=current_date, mode_context=mode_context, goal=goal, cv=clean_cv)
 
     try:
         # [ROUTING] Customize CV memerlukan kemampuan menulis yang baik (Creative/Reasoning)
         
         response = await generate_with_retry(
-            contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt_text)])],
-            config=types.GenerateContentConfig(
+            **prompt_request(prompt, types.GenerateContentConfig(
                 response_mime_type="application/json", 
                 response_schema=ImprovedCVResult,
                 temperature=0.2 # Sedikit kreativitas untuk penulisan
-            ),
+            )),
             model_name=REASONING_MODEL # <--- Explicitly use Strong Model
         )
         if response.parsed: return response.parsed
-        return ImprovedCVResult(**json.loads(clean_json_text(response.text)))
+        return parse_json_response(response.text, ImprovedCVResult)
     except Exception as e:
         print(f"Customize Error: {e}")
-        return ImprovedCVResult(
-            full_name="Error Generating CV", professional_summary=f"AI Error: {str(e)}",
-            contact_info=CVContactInfo(email="", phone="", location=""),
-            hard_skills=[], soft_skills=[], work_experience=[], education=[], projects=[]
-        )
\ No newline at end of file
+        return error_cv_result(e)
+
+
+# --- CUSTOMIZE PER SECTION ---
+SECTION_TASKS = {
+    "summary": (
+        "Rewrite the professional summary: metric-driven, 3-4 sentences, aligned with the target. "
+        "If professional_summary is empty, write a new one using ONLY the other CV facts in the section."
+    ),
+    "experience": (
+        "Rewrite the achievements of this ONE work experience entry using the Google XYZ formula "
+        "(Accomplished X as measured by Y, by doing Z). Keep title, company and location; "
+        "format dates relative to today (e.g., \"Jan 2024 - Present\" for a current job)."
+    ),
+    "projects": "Rewrite the description and highlights of each project to show impact. Keep every project and its name.",
+    "skills": "Re-organize hard and soft skills by priority for the target (most relevant first). Do not add new skills.",
+}
+
+
+# Menyusun ulang daftar skill cukup dengan model cepat; menulis ulang teks butuh REASONING_MODEL
+SECTION_MODELS = {"summary": REASONING_MODEL, "experience": REASONING_MODEL, "projects": REASONING_MODEL, "skills": FAST_MODEL}
+SECTION_SCHEMAS = {
+    "summary": ("professional_summary",),
+    "projects": ("projects",),
+    "skills": ("hard_skills", "soft_skills"),
+}
+
+
+# Satu template per section: TASK ikut prefix statis, hanya isi section & target yang berubah
+SECTION_TEMPLATES = {
+    section: PromptTemplate(f"section:{section}", f"""
+    You are an Expert Resume Writer rewriting ONE section of a candidate's CV to be world-class, ATS-friendly, and high-impact.
+    The request gives the CONTEXT (today's date and the target), the GOAL and the ORIGINAL SECTION (JSON).
+
+    TASK: {task}
+    
+    *** CRITICAL RULES ***:
+    1. **NO DELETION**: Preserve every entry and fact in the section.
+    2. **NO HALLUCINATIONS**: Do not invent skills, employers, numbers or dates.
+    3. **LINKS**: Preserve all URLs and existing <a href='URL'>Text</a> tags.
+    4. **LANGUAGE CONSISTENCY (IMPORTANT)**: Write in the SAME language as the original section
+       (Indonesian stays Indonesian, English stays English).
+
+    OUTPUT: Strictly JSON matching the given schema.
+    """, """
+    CONTEXT:
+    - Today's Date: {current_date}
+    - {mode_context}
+    
+    GOAL: {goal}
+
+    ORIGINAL SECTION (JSON):
+    {content}
+    """)
+    for section, task in SECTION_TASKS.items()
+}
+
+
+def build_section_prompt(section: str, content: str, mode_context: str, goal: str, current_date: str) -> Prompt:
+    return SECTION_TEMPLATES[section].render(
+        current_date=current_date, mode_context=mode_context, goal=goal, content=content
+    )
+
+
+def _section_key(section: str, content: str, mode_context: str, goal: str, current_date: str) -> str:
+    # Key tidak bergantung pada section lain: mengubah satu pengalaman hanya me-regenerate pengalaman itu
+    payload = json.dumps({
+        "section": section,
+        "content": content,
+        "target": normalize_job_text(mode_context),
+        "goal": goal,
+        "date": current_date,
+        "model": SECTION_MODELS[section],
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def rewrite_section(section: str, original: dict, mode_context: str, goal: str, current_date: str) -> dict:
+    """Tulis ulang satu section (dict field -> nilai). Hasil di-cache di `section_cache`."""
+    content = json.dumps(original, ensure_ascii=False, sort_keys=True)
+    schema = CVExperience if section == "experience" else _partial_cv_schema(SECTION_SCHEMAS[section])
+
+    async def run():
+        response = await generate_with_retry(
+            **prompt_request(build_section_prompt(section, content, mode_context, goal, current_date), types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                temperature=0.2
+            )),
+            model_name=SECTION_MODELS[section]
+        )
+        parsed = response.parsed or parse_json_response(response.text, schema)
+        return parsed.model_dump()
+
+    return await section_cache.get_or_run(_section_key(section, content, mode_context, goal, current_date), run)
+
+
+def _merge_experience(original: CVExperience, rewritten: dict) -> CVExperience:
+    # Identitas entri (jabatan, perusahaan) tidak boleh hilang walau model mengosongkannya
+    return CVExperience(
+        title=rewritten.get("title") or original.title,
+        company=rewritten.get("company") or original.company,
+        dates=rewritten.get("dates") or original.dates,
+        achievements=rewritten.get("achievements") or original.achievements,
+        location=rewritten.get("location") or original.location,
+    )
+
+
+def _summary_source(cv: ImprovedCVResult) -> dict:
+    """
+    Isi section summary. CV tanpa summary tetap mendapat summary (seperti customize monolitik):
+    fakta ringkas dari CV terstruktur menjadi bahan, termasuk contoh achievement agar bahasanya sama.
+    """
+    if cv.professional_summary.strip():
+        return {"professional_summary": cv.professional_summary}
+    return {
+        "professional_summary": "",
+        "work_experience": [
+            {"title": e.title, "company": e.company, "dates": e.dates, "achievements": e.achievements[:2]}
+            for e in cv.work_experience
+        ],
+        "education": [{"institution": e.institution, "degree": e.degree, "year": e.year} for e in cv.education],
+        "projects": [project.name for project in cv.projects],
+        "hard_skills": cv.hard_skills,
+        "soft_skills": cv.soft_skills,
+    }
+
+
+async def customize_cv_sections(cv_text: str, mode_context: str, goal: str, current_date: str) -> ImprovedCVResult:
+    """
+    Customize tanpa satu output raksasa: CV distrukturkan sekali, lalu summary, tiap pengalaman,
+    proyek, dan skill ditulis ulang sebagai panggilan paralel yang lebih kecil, kemudian digabung.
+    Section yang gagal memakai isi aslinya; jika semua gagal hasilnya "Error Generating CV".
+    """
+    try:
+        cv = await structure_cv(cv_text)
+    except Exception as e:
+        print(f"Customize Error: {e}")
+        return error_cv_result(e)
+
+    jobs = [("summary", None, _summary_source(cv))]
+    for index, experience in enumerate(cv.work_experience):
+        jobs.append(("experience", index, experience.model_dump()))
+    if cv.projects:
+        jobs.append(("projects", None, {"projects": [project.model_dump() for project in cv.projects]}))
+    if cv.hard_skills or cv.soft_skills:
+        jobs.append(("skills", None, {"hard_skills": cv.hard_skills, "soft_skills": cv.soft_skills}))
+    results = await asyncio.gather(
+        *(rewrite_section(section, original, mode_context, goal, current_date) for section, _, original in jobs),
+        return_exceptions=True,
+    )
+
+    merged = cv.model_dump()
+    experiences = list(cv.work_experience)
+    failures = []
+    for (section, index, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            print(f"Customize Section Error ({section}{'' if index is None else f' #{index}'}): {result}")
+            failures.append(result)
+        elif section == "experience":
+            experiences[index] = _merge_experience(experiences[index], result)
+        elif section == "projects":
+            # Proyek yang hilang dari output model dipertahankan dari versi asli
+            projects = result.get("projects") or []
+            merged["projects"] = projects if len(projects) >= len(cv.projects) else [p.model_dump() for p in cv.projects]
+        else:
+            merged.update({field: value for field, value in result.items() if value})
+
+    if len(failures) == len(jobs):
+        return error_cv_result(failures[0])
+    merged["work_experience"] = [experience.model_dump() for experience in experiences]
+    return ImprovedCVResult(**merged)
+
+async def stream_analysis_events(cv_text: str, job_desc: str, current_date: str = None):
+    """
+    Varian streaming dari `analyze_cv`. Yield tuple (event, data):
+    - "cv_data": hasil `structure_cv` (parser lokal / FAST_MODEL, biasanya selesai lebih dulu)
+    - "analysis_field": setiap field AnalysisResponse begitu selesai di-stream REASONING_MODEL
+    - "complete": analisis final + overall_score yang dihitung ulang
+    """
+    if not current_date:
+        current_date = datetime.now().strftime("%Y-%m-%d")
+
+    clean_cv, job_desc = prepare_analysis_inputs(cv_text, job_desc, "analyze_stream")
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _extract():
+        original_data = await structure_cv(cv_text)
+        await queue.put(("cv_data", original_data.model_dump()))
+        return original_data
+
+    split = ANALYSIS_MODE == "split"
+
+    async def _quality():
+        # Tahap CV-only (sering dari cache) dikirim per field begitu selesai
+        quality = await assess_cv_quality(clean_cv)
+        for field, value in quality.items():
+            await queue.put(("analysis_field", {"field": field, "value": value}))
+        return quality
+
+    async def _analyze():
+        if split:
+            prompt = build_job_fit_prompt(clean_cv, job_desc, current_date)
+            schema = _partial_analysis_schema(JOB_FIT_FIELDS)
+        else:
+            prompt = build_analysis_prompt(clean_cv, job_desc, current_date)
+            schema = AnalysisResponse
+        fields = PartialJSONFields()
+        async for chunk in stream_with_retry(
+            **prompt_request(prompt, analysis_config(schema)),
+            model_name=REASONING_MODEL
+        ):
+            for field, value in fields.feed(chunk):
+                await queue.put(("analysis_field", {"field": field, "value": value}))
+        return parse_json_response(fields.buffer, schema)
+
+    extract_task = asyncio.create_task(_extract())
+    analyze_task = asyncio.create_task(_analyze())
+    quality_task = asyncio.create_task(_quality()) if split else None
+    tasks = [task for task in (extract_task, analyze_task, quality_task) if task is not None]
+    pending = set(tasks)
+
+    try:
+        while pending:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+            pending -= done
+
+        # Kosongkan sisa event yang masuk bersamaan dengan selesainya task
+        while not queue.empty():
+            yield queue.get_nowait()
+
+        try:
+            if split:
+                analysis_res = AnalysisResponse(
+                    overall_score=0, **quality_task.result(), **analyze_task.result().model_dump()
+                )
+            else:
+                analysis_res = analyze_task.result()
+        except Exception as e:
+            print(f"Analyze Stream Error: {e}")
+            analysis_res = empty_analysis(e)
+        analysis_res.overall_score = compute_overall_score(analysis_res)
+        yield ("complete", {
+            "overall_score": analysis_res.overall_score,
+            "analysis": analysis_res.model_dump(),
+            "cv_data": extract_task.result().model_dump(),
+        })
+    finally:
+        # Client disconnect: hentikan panggilan model yang masih berjalan
+        for task in tasks:
+            task.cancel()
+
+
+async def analyze_cv_batch(cv_texts: dict, job_desc: str, current_date: str = None, max_concurrency: int = 8):
+    """
+    Scoring banyak CV terhadap satu JD. JD disiapkan sekali, panggilan model dibatasi
+    `max_concurrency`, dan hasil di-yield sesuai urutan selesai: (key, AnalysisResponse).
+    """
+    if not current_date:
+        current_date = datetime.now().strftime("%Y-%m-%d")
+
+    # JD disiapkan sekali untuk semua kandidat, dengan budget untuk CV terpanjang di batch;
+    # setiap CV lalu dipangkas sendiri-sendiri ke sisa budget setelah JD tersebut
+    static = _analysis_static_tokens()
+    longest_cv = max((estimate_tokens(sanitize_content(text)) for text in cv_texts.values()), default=0)
+    prepared_jd = prepare_job_description(job_desc, REASONING_MODEL, static + _analysis_cv_reserve(longest_cv))
+    limits = _analysis_cv_limits(prepared_jd)
+    clean_cvs = {key: prepare_cv(text, limits) for key, text in cv_texts.items()}
+    log_prompt_size(
+        "analyze_batch",
+        static + longest_cv + estimate_tokens(job_desc),
+        static + max((estimate_tokens(text) for text in clean_cvs.values()), default=0) + estimate_tokens(prepared_jd),
+        model_input_budget(REASONING_MODEL),
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _score(key, clean_cv):
+        async with semaphore:
+            # Deadline per kandidat dimulai saat scoring-nya mulai, bukan saat batch dikirim
+            start_deadline(REQUEST_DEADLINE)
+            return key, await perform_analysis(clean_cv, prepared_jd, current_date)
+
+    tasks = [asyncio.create_task(_score(key, text)) for key, text in clean_cvs.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,216 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict
+
+from src.services.lazy import lazy_import
+from src.services.prompt_budget import estimate_tokens
+from src.services.rate_limit import error_status
+
+types = lazy_import("google.genai.types")
+
+# --- KONFIGURASI CONTEXT CACHING ---
+# "off" (default): instruksi tetap dikirim inline sebagai prefix stabil (implicit caching Gemini tetap berlaku).
+# "explicit" (opt-in): instruksi statis (system_instruction) didaftarkan sebagai cached content per model.
+CONTEXT_CACHE_MODE = os.getenv("CONTEXT_CACHE_MODE", "off")
+# TTL cached content di Gemini (detik); handle yang masih dipakai diperpanjang sebelum habis
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "3600"))
+# Handle di-refresh jika sisa TTL-nya di bawah margin ini saat dipakai
+CONTEXT_CACHE_REFRESH_MARGIN = int(os.getenv("CONTEXT_CACHE_REFRESH_MARGIN", "600"))
+# Batas minimal token API untuk explicit caching; instruksi yang lebih pendek selalu dikirim inline
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+CONTEXT_CACHE_MAX_ENTRIES = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "32"))
+# Jeda sebelum mencoba membuat ulang cache yang gagal dibuat (detik)
+CONTEXT_CACHE_RETRY_AFTER = 300
+# Handle yang sisa umurnya di bawah ini tidak dipakai lagi (bisa habis di tengah request)
+MIN_HANDLE_LIFETIME = 30
+
+# Pesan API untuk cached content yang sudah dihapus/kedaluwarsa (status 404, atau 400/403 dengan pesan ini)
+_STALE_CACHE_MESSAGE = re.compile(r"cached\s*content.*(not\s*found|expired|does not exist)", re.IGNORECASE | re.DOTALL)
+
+
+def is_stale_cache_error(error: Exception) -> bool:
+    """True hanya jika API menolak `cached_content` karena tidak ada lagi; error lain tetap diteruskan."""
+    status = error_status(error)
+    if status == 404:
+        return True
+    return status in (400, 403) and bool(_STALE_CACHE_MESSAGE.search(str(error)))
+
+
+class CacheHandle:
+    def __init__(self, name: str, model_name: str, expires_at: float):
+        self.name = name
+        self.model_name = model_name
+        self.expires_at = expires_at
+        self.uses = 0
+
+
+class GeminiCacheBackend:
+    """Cached content via `client.aio.caches` (Gemini API atau server palsu loadtest/fake_services.py)."""
+
+    def __init__(self, client_factory: Callable):
+        self._client_factory = client_factory
+
+    async def create(self, model_name: str, instructions: str, ttl: int) -> str:
+        cached = await self._client_factory().aio.caches.create(
+            model=model_name,
+            config=types.CreateCachedContentConfig(
+                system_instruction=instructions,
+                ttl=f"{ttl}s",
+                display_name=f"ai-engine-{hashlib.sha256(instructions.encode('utf-8')).hexdigest()[:12]}",
+            ),
+        )
+        return cached.name
+
+    async def refresh(self, name: str, ttl: int):
+        await self._client_factory().aio.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{ttl}s"))
+
+    async def delete(self, name: str):
+        await self._client_factory().aio.caches.delete(name=name)
+
+
+class ContextCacheManager:
+    """
+    Siklus hidup handle cached content untuk prefix prompt statis:
+    - create: saat prefix pertama kali dipakai, di background (request itu tetap dikirim inline)
+    - refresh: TTL diperpanjang saat handle dipakai dan sisa umurnya < CONTEXT_CACHE_REFRESH_MARGIN
+    - expire: handle yang tidak dipakai dibiarkan habis oleh TTL; LRU di atas MAX_ENTRIES & shutdown dihapus
+    Handle per proses (tiap worker web membuat miliknya sendiri) dan per model (cache terikat ke model).
+    """
+
+    def __init__(self, backend, mode: str = CONTEXT_CACHE_MODE, ttl: int = CONTEXT_CACHE_TTL,
+                 refresh_margin: int = CONTEXT_CACHE_REFRESH_MARGIN, min_tokens: int = CONTEXT_CACHE_MIN_TOKENS,
+                 max_entries: int = CONTEXT_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.mode = mode
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl // 2)
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self._handles: "OrderedDict[str, CacheHandle]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._failed_until: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.too_small = 0
+        self.created = 0
+        self.refreshed = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "explicit"
+
+    @staticmethod
+    def _key(model_name: str, instructions: str) -> str:
+        return hashlib.sha256(f"{model_name}\n{instructions}".encode("utf-8")).hexdigest()
+
+    def apply(self, model_name: str, config):
+        """
+        Config untuk satu panggilan `model_name`: system_instruction diganti `cached_content` jika
+        handle untuk prefix tersebut siap; selain itu config dikembalikan apa adanya.
+        Harus dipanggil dari event loop (pembuatan/refresh handle dijadwalkan sebagai task).
+        """
+        instructions = getattr(config, "system_instruction", None)
+        if not self.enabled or not isinstance(instructions, str) or not instructions:
+            return config
+        if estimate_tokens(instructions) < self.min_tokens:
+            self.too_small += 1
+            return config
+
+        key = self._key(model_name, instructions)
+        now = time.monotonic()
+        handle = self._handles.get(key)
+        if handle is not None and handle.expires_at - now < MIN_HANDLE_LIFETIME:
+            del self._handles[key]
+            self.expired += 1
+            handle = None
+        if handle is None:
+            self.misses += 1
+            self._schedule(key, lambda: self._create(key, model_name, instructions))
+            return config
+
+        self.hits += 1
+        handle.uses += 1
+        self._handles.move_to_end(key)
+        if handle.expires_at - now < self.refresh_margin:
+            self._schedule(key, lambda: self._refresh(handle))
+        return config.model_copy(update={"system_instruction": None, "cached_content": handle.name})
+
+    def invalidate(self, config):
+        """Buang handle yang ditolak API (sudah dihapus/kedaluwarsa di server); akan dibuat ulang saat dipakai."""
+        name = getattr(config, "cached_content", None)
+        for key, handle in list(self._handles.items()):
+            if handle.name == name:
+                del self._handles[key]
+                self.invalidated += 1
+
+    def _schedule(self, key: str, factory: Callable):
+        if key in self._pending or self._failed_until.get(key, 0) > time.monotonic():
+            return
+        task = asyncio.get_running_loop().create_task(factory())
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _create(self, key: str, model_name: str, instructions: str):
+        started = time.monotonic()
+        try:
+            name = await self.backend.create(model_name, instructions, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            self._failed_until[key] = time.monotonic() + CONTEXT_CACHE_RETRY_AFTER
+            print(f"Context Cache create failed ({model_name}): {e}")
+            return
+        self._failed_until.pop(key, None)
+        # Umur dihitung dari sebelum request create: tidak pernah lebih optimis dari TTL di server
+        self._handles[key] = CacheHandle(name, model_name, started + self.ttl)
+        self.created += 1
+        while len(self._handles) > self.max_entries:
+            _, evicted = self._handles.popitem(last=False)
+            await self._delete(evicted)
+
+    async def _refresh(self, handle: CacheHandle):
+        started = time.monotonic()
+        try:
+            await self.backend.refresh(handle.name, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"Context Cache refresh failed ({handle.name}): {e}")
+            return
+        handle.expires_at = started + self.ttl
+        self.refreshed += 1
+
+    async def _delete(self, handle: CacheHandle):
+        try:
+            await self.backend.delete(handle.name)
+        except Exception as e:
+            # Tetap aman: TTL di server akan menghapusnya
+            print(f"Context Cache delete failed ({handle.name}): {e}")
+
+    async def shutdown(self):
+        for task in list(self._pending.values()):
+            task.cancel()
+        handles = list(self._handles.values())
+        self._handles.clear()
+        await asyncio.gather(*(self._delete(handle) for handle in handles))
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "entries": len(self._handles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "too_small": self.too_small,
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "expired": self.expired,
+            "invalidated": self.invalidated,
+            "errors": self.errors,
+            "min_tokens": self.min_tokens,
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,422 @@
+import re
+from typing import List, Dict, Optional, Tuple
+
+from src.schemas import (
+    ImprovedCVResult, CVContactInfo, CVExperience, CVEducation, CVProject
+)
+
+# Field ImprovedCVResult yang diberi skor confidence oleh parser
+PARSED_FIELDS = [
+    "full_name", "professional_summary", "contact_info", "hard_skills", "soft_skills",
+    "work_experience", "education", "projects", "certifications",
+]
+
+# Sinonim heading section (EN + ID), dibandingkan dalam lowercase tanpa ":" di akhir
+SECTION_HEADINGS = {
+    "summary": [
+        "summary", "professional summary", "profile", "professional profile", "about me", "about",
+        "objective", "career objective", "ringkasan", "profil", "tentang saya", "ringkasan profil",
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment history",
+        "work history", "career history", "experiences", "pengalaman", "pengalaman kerja",
+        "riwayat pekerjaan", "pengalaman profesional",
+    ],
+    "education": [
+        "education", "academic background", "educational background", "pendidikan",
+        "riwayat pendidikan", "latar belakang pendidikan",
+    ],
+    "skills": [
+        "skills", "technical skills", "hard skills", "core skills", "key skills", "skills & tools",
+        "skills and tools", "tools", "tech stack", "technologies", "competencies", "keahlian",
+        "kemampuan", "keterampilan", "keahlian teknis",
+    ],
+    "soft_skills": ["soft skills", "interpersonal skills", "soft skill"],
+    "projects": [
+        "projects", "personal projects", "portfolio", "selected projects", "key projects",
+        "proyek", "projek", "portofolio",
+    ],
+    "certifications": [
+        "certifications", "certification", "certificates", "licenses & certifications",
+        "licenses and certifications", "sertifikasi", "sertifikat",
+    ],
+    # Section yang dikenali agar tidak tercampur ke section lain, tapi tidak dipetakan ke schema
+    "other": [
+        "languages", "bahasa", "awards", "achievements", "penghargaan", "organizations",
+        "organisasi", "volunteer", "volunteering", "interests", "hobbies", "references",
+        "publications", "courses", "training", "pelatihan",
+    ],
+}
+_HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# Judul dokumen & heading blok header (EN + ID) yang sering muncul sebelum/di sekitar nama kandidat
+CV_TITLE_PHRASES = {
+    "curriculum vitae", "curriculum vitae et studiorum", "resume", "résumé", "cv", "my cv", "my resume",
+    "professional resume", "personal resume", "daftar riwayat hidup", "riwayat hidup", "biodata",
+    "biodata diri", "data diri", "data pribadi", "identitas diri", "personal data", "personal details",
+    "personal information", "informasi pribadi", "contact", "contact information", "contact details",
+    "kontak", "informasi kontak", "lamaran kerja", "surat lamaran", "cover letter",
+}
+_TITLE_PREFIX = re.compile(
+    r"^(?:" + "|".join(sorted((re.escape(t) for t in CV_TITLE_PHRASES), key=len, reverse=True)) + r")\s*[-–—:|]",
+    re.IGNORECASE,
+)
+
+SOFT_SKILL_TERMS = {
+    "communication", "leadership", "teamwork", "team work", "collaboration", "problem solving",
+    "problem-solving", "critical thinking", "time management", "adaptability", "creativity",
+    "public speaking", "negotiation", "presentation", "attention to detail", "management",
+    "komunikasi", "kepemimpinan", "kerja sama tim", "kerjasama tim", "pemecahan masalah",
+    "berpikir kritis", "manajemen waktu", "adaptasi", "kreativitas", "negosiasi",
+}
+
+_MONTH = (
+    r"(?:jan(?:uary|uari)?|feb(?:ruary|ruari)?|mar(?:ch|et)?|apr(?:il)?|ma[yi]|jun(?:e|i)?|"
+    r"jul(?:y|i)?|aug(?:ust)?|agu(?:stus)?|agt|sep(?:t(?:ember)?)?|oct(?:ober)?|okt(?:ober)?|"
+    r"nov(?:ember)?|dec(?:ember)?|des(?:ember)?)\.?"
+)
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+_PRESENT = r"(?:present|current|now|sekarang|saat ini|ongoing)"
+DATE_RANGE = re.compile(
+    rf"({_DATE})\s*(?:-|–|—|to|until|sampai|s/d|hingga)\s*({_DATE}|{_PRESENT})", re.IGNORECASE
+)
+SINGLE_YEAR = re.compile(r"\b(19|20)\d{2}\b")
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?:\+?\d[\d\s().-]{7,}\d)")
+URL = re.compile(r"https?://[^\s\]\)]+|(?:www\.)?(?:linkedin\.com|github\.com)/[^\s\]\)]+", re.IGNORECASE)
+LINKED_TEXT = re.compile(r"(\S[^\[\]]*?)\s\[((?:https?://|mailto:|tel:)[^\]]+)\]")
+BULLET = re.compile(r"^\s*(?:[•\-\*▪●◦‣·–]|\d+[.)])\s+")
+SEPARATORS = re.compile(r"\s+(?:\||·|•|—|–|-|@|at|di)\s+|,\s+", re.IGNORECASE)
+INSTITUTION = re.compile(
+    r"universit|institut|college|school|polytechnic|politeknik|sekolah|academy|akademi|\bsma\b|\bsmk\b|\bstt\b|\bstie\b",
+    re.IGNORECASE,
+)
+DEGREE = re.compile(
+    r"bachelor|master|ph\.?d|doctor|diploma|associate|sarjana|magister|\bs[123]\b|\bd[34]\b|"
+    r"\bb\.?\s?(?:sc|s|a|eng|comp)\b|\bm\.?\s?(?:sc|s|a|eng|ba)\b|\bmba\b",
+    re.IGNORECASE,
+)
+
+
+class ParsedCV:
+    def __init__(self, result: ImprovedCVResult, confidence: Dict[str, float]):
+        self.result = result
+        self.confidence = confidence
+
+    def low_confidence_fields(self, threshold: float) -> List[str]:
+        return [field for field in PARSED_FIELDS if self.confidence.get(field, 0.0) < threshold]
+
+
+def render_links(text: str) -> str:
+    """"Text [URL]" -> <a href='URL'>Text</a> (aturan yang sama dengan prompt extract_data_only)."""
+    return LINKED_TEXT.sub(lambda m: f"<a href='{m.group(2)}'>{m.group(1)}</a>", text)
+
+
+def _strip_links(text: str) -> str:
+    return re.sub(r"\s\[(?:https?://|mailto:|tel:)[^\]]+\]", "", text)
+
+
+def _heading_of(line: str) -> Optional[str]:
+    key = re.sub(r"[:\s]+$", "", line.strip()).lower()
+    key = re.sub(r"\s+", " ", key)
+    if len(key) > 40:
+        return None
+    return _HEADING_LOOKUP.get(key)
+
+
+def split_sections(lines: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Kembalikan (baris header sebelum section pertama, {section: baris})."""
+    header: List[str] = []
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in lines:
+        section = _heading_of(line)
+        if section is not None:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        if current is None:
+            header.append(line)
+        else:
+            sections[current].append(line)
+    return header, sections
+
+
+def section_blocks(lines: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    Seperti `split_sections`, tetapi urutan dokumen & baris heading asli dipertahankan:
+    [(section, baris blok termasuk heading)]. Blok header sebelum section pertama memakai section None.
+    """
+    blocks: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+    for line in lines:
+        section = _heading_of(line)
+        if section is not None:
+            blocks.append((section, [line]))
+        else:
+            blocks[-1][1].append(line)
+    return [(section, block) for section, block in blocks if block]
+
+
+def _is_title_or_heading(line: str) -> bool:
+    """Judul dokumen ("Curriculum Vitae", "Daftar Riwayat Hidup - ...") atau heading section, bukan nama."""
+    text = _strip_links(line).strip()
+    key = re.sub(r"\s+", " ", re.sub(r"[:\s]+$", "", text)).lower()
+    return key in CV_TITLE_PHRASES or _heading_of(text) is not None or bool(_TITLE_PREFIX.match(text))
+
+
+def _looks_like_name(line: str) -> bool:
+    text = _strip_links(line).strip()
+    words = text.split()
+    if not 2 <= len(words) <= 5:
+        return False
+    if EMAIL.search(text) or re.search(r"\d", text):
+        return False
+    return all(re.match(r"^[A-Za-zÀ-ÿ.'-]+$", word) for word in words)
+
+
+def parse_contact(header: List[str], all_lines: List[str]) -> Tuple[CVContactInfo, float]:
+    text = "\n".join(header) if header else "\n".join(all_lines[:8])
+    full_text = "\n".join(all_lines)
+
+    email_match = EMAIL.search(text) or EMAIL.search(full_text)
+    email = email_match.group(0) if email_match else ""
+
+    phone = ""
+    for match in PHONE.finditer(text):
+        digits = re.sub(r"\D", "", match.group(0))
+        # Minimal 9 digit: rentang tahun (mis. "2019 - 2023") tidak terbaca sebagai nomor telepon
+        if 9 <= len(digits) <= 15:
+            phone = match.group(0).strip()
+            break
+
+    linkedin = None
+    portfolio = None
+    for url in URL.findall(text):
+        if "linkedin.com" in url.lower():
+            linkedin = linkedin or url
+        elif "mailto:" not in url.lower():
+            portfolio = portfolio or url
+
+    location = ""
+    for line in header[:6]:
+        for segment in re.split(r"\s*[|•·]\s*", _strip_links(line)):
+            segment = segment.strip()
+            if (re.match(r"^[A-Z][A-Za-zÀ-ÿ .'-]+,\s*[A-Z][A-Za-zÀ-ÿ .'-]+$", segment)
+                    and not EMAIL.search(segment)):
+                location = segment
+                break
+        if location:
+            break
+
+    confidence = 0.9 if email else (0.6 if phone else 0.3)
+    return CVContactInfo(
+        email=email, phone=phone, location=location, linkedin=linkedin, portfolio=portfolio
+    ), confidence
+
+
+def _split_header(text: str) -> List[str]:
+    return [part.strip() for part in SEPARATORS.split(text) if part and part.strip()]
+
+
+def _extract_dates(lines: List[str]) -> Tuple[str, List[str]]:
+    dates = ""
+    remaining = []
+    for line in lines:
+        match = DATE_RANGE.search(line)
+        if match and not dates:
+            dates = match.group(0).strip()
+            line = (line[:match.start()] + line[match.end():]).strip(" |,()-–—")
+        if line:
+            remaining.append(line)
+    return dates, remaining
+
+
+def _group_entries(lines: List[str]) -> List[Tuple[List[str], List[str]]]:
+    """Kelompokkan baris menjadi (baris header, bullet). Entry baru dimulai saat header muncul setelah bullet."""
+    entries: List[Tuple[List[str], List[str]]] = []
+    head: List[str] = []
+    bullets: List[str] = []
+    for line in lines:
+        if BULLET.match(line):
+            bullets.append(BULLET.sub("", line).strip())
+            continue
+        starts_new = bool(bullets) or (head and DATE_RANGE.search(line) and any(DATE_RANGE.search(h) for h in head))
+        if starts_new and head:
+            entries.append((head, bullets))
+            head, bullets = [], []
+        head.append(line)
+    if head or bullets:
+        entries.append((head, bullets))
+    return entries
+
+
+def parse_experience(lines: List[str]) -> Tuple[List[CVExperience], float]:
+    experiences = []
+    complete = 0
+    for head, bullets in _group_entries(lines):
+        dates, rest = _extract_dates(head)
+        parts = [p for line in rest for p in _split_header(line)]
+        title = parts[0] if parts else ""
+        company = parts[1] if len(parts) > 1 else ""
+        location = parts[2] if len(parts) > 2 else None
+        # Header lebih dari 2 baris tanpa bullet: baris tambahan dianggap deskripsi
+        achievements = bullets or [line for line in rest[2:]]
+        if title and company and dates:
+            complete += 1
+        experiences.append(CVExperience(
+            title=render_links(title), company=render_links(company), dates=dates,
+            achievements=[render_links(a) for a in achievements], location=location,
+        ))
+
+    if not experiences:
+        return [], 0.2 if lines else 0.0
+    return experiences, 0.9 * complete / len(experiences)
+
+
+def parse_education(lines: List[str]) -> Tuple[List[CVEducation], float]:
+    education = []
+    current: Optional[Dict[str, str]] = None
+    for line in lines:
+        text = BULLET.sub("", line).strip()
+        if INSTITUTION.search(text) and (current is None or current["institution"]):
+            if current is not None:
+                education.append(current)
+            current = {"institution": "", "degree": "", "year": ""}
+        if current is None:
+            current = {"institution": "", "degree": "", "year": ""}
+
+        range_match = DATE_RANGE.search(text)
+        year_match = range_match or SINGLE_YEAR.search(text)
+        if year_match and not current["year"]:
+            current["year"] = year_match.group(0).strip()
+            text = (text[:year_match.start()] + text[year_match.end():]).strip(" |,()-–—")
+
+        for part in _split_header(text) or [text]:
+            if INSTITUTION.search(part) and not current["institution"]:
+                current["institution"] = part
+            elif DEGREE.search(part) and not current["degree"]:
+                current["degree"] = part
+    if current is not None:
+        education.append(current)
+
+    entries = [
+        CVEducation(institution=e["institution"], degree=e["degree"], year=e["year"])
+        for e in education if e["institution"] or e["degree"]
+    ]
+    if not entries:
+        return [], 0.2 if lines else 0.0
+    complete = sum(1 for e in entries if e.institution and e.degree)
+    return entries, 0.9 * complete / len(entries)
+
+
+def parse_projects(lines: List[str]) -> Tuple[List[CVProject], float]:
+    projects = []
+    for head, bullets in _group_entries(lines):
+        if not head:
+            continue
+        name_line = head[0]
+        # "Nama Proyek - deskripsi singkat" dalam satu baris
+        match = re.search(r"\s[-–—:|]\s", name_line)
+        if match:
+            name, inline_description = name_line[:match.start()], name_line[match.end():]
+        else:
+            name, inline_description = name_line, ""
+        description = " ".join([inline_description] + head[1:]).strip()
+        projects.append(CVProject(
+            name=render_links(name.strip()),
+            description=render_links(description),
+            highlights=[render_links(b) for b in bullets],
+        ))
+    if not projects:
+        return [], 0.2 if lines else 0.0
+    return projects, 0.8
+
+
+def parse_skills(lines: List[str]) -> List[str]:
+    skills = []
+    for line in lines:
+        text = BULLET.sub("", line).strip()
+        # "Languages: Python, Go" -> ambil daftar setelah label kategori
+        if ":" in text and not URL.search(text):
+            text = text.split(":", 1)[1]
+        for item in re.split(r"\s*[,;|•·]\s*", text):
+            item = item.strip(" .")
+            if item and len(item) <= 60 and item.lower() not in (s.lower() for s in skills):
+                skills.append(render_links(item))
+    return skills
+
+
+def parse_cv_text(cv_text: str) -> ParsedCV:
+    """
+    Parser struktural berbasis aturan untuk output line-oriented extractor.
+    Menghasilkan ImprovedCVResult + skor confidence per field (0..1).
+    """
+    lines = [line.strip() for line in cv_text.splitlines() if line.strip()]
+    header, sections = split_sections(lines)
+    confidence: Dict[str, float] = {}
+    recognised = len([s for s in sections if s != "other"])
+
+    def _absent_confidence() -> float:
+        # Section tidak ditemukan padahal struktur CV jelas -> kemungkinan memang tidak ada
+        return 0.75 if recognised >= 3 else 0.3
+
+    # Judul dokumen dilewati; jika hanya judul yang ada, nama diserahkan ke fallback LLM (confidence rendah)
+    candidates = [line for line in header if not _is_title_or_heading(line)][:3]
+    name_line = next((line for line in candidates if _looks_like_name(line)), "")
+    full_name = _strip_links(name_line).strip()
+    confidence["full_name"] = 0.9 if full_name else 0.2
+
+    contact, confidence["contact_info"] = parse_contact(header, lines)
+
+    summary_lines = sections.get("summary")
+    if summary_lines:
+        summary = render_links(" ".join(summary_lines))
+        confidence["professional_summary"] = 0.9
+    else:
+        summary = ""
+        confidence["professional_summary"] = _absent_confidence()
+
+    if "experience" in sections:
+        work_experience, confidence["work_experience"] = parse_experience(sections["experience"])
+    else:
+        work_experience, confidence["work_experience"] = [], _absent_confidence()
+
+    if "education" in sections:
+        education, confidence["education"] = parse_education(sections["education"])
+    else:
+        education, confidence["education"] = [], _absent_confidence()
+
+    if "projects" in sections:
+        projects, confidence["projects"] = parse_projects(sections["projects"])
+    else:
+        projects, confidence["projects"] = [], _absent_confidence()
+
+    skills = parse_skills(sections.get("skills", []))
+    explicit_soft = parse_skills(sections.get("soft_skills", []))
+    soft_skills = explicit_soft + [s for s in skills if s.lower() in SOFT_SKILL_TERMS and s not in explicit_soft]
+    hard_skills = [s for s in skills if s not in soft_skills]
+    if "skills" in sections:
+        confidence["hard_skills"] = 0.85 if len(hard_skills) >= 3 else 0.4
+    else:
+        confidence["hard_skills"] = 0.3
+    confidence["soft_skills"] = 0.9 if explicit_soft else (0.75 if "skills" in sections else 0.3)
+
+    if "certifications" in sections:
+        certifications = [render_links(BULLET.sub("", line).strip()) for line in sections["certifications"]]
+        confidence["certifications"] = 0.9
+    else:
+        certifications = None
+        confidence["certifications"] = 0.8
+
+    result = ImprovedCVResult(
+        full_name=full_name,
+        professional_summary=summary,
+        contact_info=contact,
+        hard_skills=hard_skills,
+        soft_skills=soft_skills,
+        work_experience=work_experience,
+        education=education,
+        projects=projects,
+        certifications=certifications,
+    )
+    return ParsedCV(result, confidence)
@@ -0,0 +1,150 @@
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+# --- KONFIGURASI DEADLINE & HEDGING ---
+# Batas waktu end-to-end satu request/job (detik) yang diteruskan ke setiap panggilan model
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "120"))
+# Batas waktu satu percobaan panggilan Gemini (tetap dijepit oleh sisa deadline)
+GEMINI_ATTEMPT_TIMEOUT = float(os.getenv("GEMINI_ATTEMPT_TIMEOUT", "60"))
+# Percentile latency setelah mana percobaan kedua (hedge) dikirim; 0 = hedging nonaktif
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+# Jumlah sampel minimal sebelum percentile dianggap valid (sebelum itu tidak ada hedge)
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+# Sisa budget (detik) di bawah mana model berat diganti FAST_MODEL, jika belum ada data latency
+GEMINI_FALLBACK_BUDGET = float(os.getenv("GEMINI_FALLBACK_BUDGET", "20"))
+# Sisa budget minimal untuk memulai percobaan baru
+MIN_ATTEMPT_BUDGET = 1.0
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Sisa waktu (detik) sampai deadline request aktif; None jika tidak ada deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def start_deadline(seconds: float = REQUEST_DEADLINE, deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Pasang deadline di context saat ini (tanpa reset): dipakai di awal endpoint/task,
+    task turunan (create_task/gather) ikut mewarisinya. Deadline yang sudah ada tidak diperpanjang.
+    """
+    if deadline is None:
+        if seconds <= 0:
+            return _deadline.get()
+        deadline = time.monotonic() + seconds
+    existing = _deadline.get()
+    if existing is not None:
+        deadline = min(existing, deadline)
+    _deadline.set(deadline)
+    return deadline
+
+
+@contextmanager
+def deadline_scope(seconds: float = REQUEST_DEADLINE):
+    """Seperti `start_deadline`, tetapi dikembalikan setelah blok selesai (mis. loop worker job)."""
+    token = _deadline.set(_deadline.get())
+    try:
+        start_deadline(seconds)
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def attempt_timeout(limit: float = GEMINI_ATTEMPT_TIMEOUT) -> float:
+    """Timeout satu percobaan: batas per-percobaan dijepit ke sisa deadline."""
+    left = remaining()
+    if left is None:
+        return limit
+    if left < MIN_ATTEMPT_BUDGET:
+        raise DeadlineExceeded("Deadline request habis sebelum panggilan model.")
+    return min(limit, left)
+
+
+class LatencyTracker:
+    """Jendela latency terbaru per model (percobaan sukses) untuk menentukan kapan hedge dikirim."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, model_name: str, seconds: float):
+        samples = self._samples.get(model_name)
+        if samples is None:
+            samples = self._samples[model_name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, model_name: str, pct: float, min_samples: int = GEMINI_HEDGE_MIN_SAMPLES) -> Optional[float]:
+        samples = self._samples.get(model_name)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+latency_tracker = LatencyTracker()
+
+
+def hedge_delay(model_name: str) -> Optional[float]:
+    if GEMINI_HEDGE_PERCENTILE <= 0:
+        return None
+    return latency_tracker.percentile(model_name, GEMINI_HEDGE_PERCENTILE)
+
+
+def should_fall_back(model_name: str) -> bool:
+    """
+    True jika sisa deadline kemungkinan tidak cukup untuk `model_name`:
+    di bawah p50 latency model tersebut (jika sudah ada data) atau di bawah GEMINI_FALLBACK_BUDGET.
+    """
+    left = remaining()
+    if left is None:
+        return False
+    typical = latency_tracker.percentile(model_name, 50)
+    return left < (typical if typical is not None else GEMINI_FALLBACK_BUDGET)
+
+
+async def hedged(call: Callable[[bool], Awaitable], delay: Optional[float], timeout: float,
+                 can_hedge: Callable[[], bool] = lambda: True):
+    """
+    Jalankan `call(False)`; jika belum selesai setelah `delay` detik, jalankan `call(True)` (hedge)
+    dan ambil hasil yang sukses lebih dulu. Sisa task dibatalkan. Timeout total = `timeout`.
+    """
+    started = time.monotonic()
+    tasks = {asyncio.create_task(call(False))}
+    hedge_sent = False
+    last_error: Optional[BaseException] = None
+    try:
+        while tasks:
+            left = timeout - (time.monotonic() - started)
+            if left <= 0:
+                raise asyncio.TimeoutError(f"Panggilan model melebihi {timeout:.1f} detik.")
+            wait_for = left
+            if not hedge_sent and delay is not None:
+                wait_for = min(left, max(0.0, delay - (time.monotonic() - started)))
+
+            done, _ = await asyncio.wait(tasks, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+
+            if not hedge_sent and delay is not None and time.monotonic() - started >= delay:
+                hedge_sent = True
+                if tasks and can_hedge():
+                    tasks.add(asyncio.create_task(call(True)))
+        raise last_error
+    finally:
+        for task in tasks:
+            task.cancel()
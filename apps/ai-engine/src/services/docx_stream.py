@@ -0,0 +1,222 @@
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+# Namespace WordprocessingML (transitional + strict) dan relationship
+W_NAMESPACES = {
+    "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "http://purl.oclc.org/ooxml/wordprocessingml/main",
+}
+R_NAMESPACES = {
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "http://purl.oclc.org/ooxml/officeDocument/relationships",
+}
+MC_NAMESPACE = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+PACKAGE_RELS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+DOCUMENT_PART = "word/document.xml"
+CELL_SEPARATOR = " | "
+
+_R_ID_KEYS = {(namespace, "id") for namespace in R_NAMESPACES}
+_FIELD_HYPERLINK = re.compile(r'HYPERLINK\s+"([^"]+)"', re.IGNORECASE)
+
+
+def _split_tag(tag: str):
+    if tag.startswith("{"):
+        namespace, _, local = tag[1:].partition("}")
+        return namespace, local
+    return "", tag
+
+
+def _rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def read_relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, Dict[str, str]]:
+    """rId -> {type, target}. Target internal di-resolve relatif ke folder part."""
+    path = _rels_path(part)
+    if path not in archive.namelist():
+        return {}
+    with archive.open(path) as handle:
+        root = ET.parse(handle).getroot()
+
+    rels = {}
+    folder = posixpath.dirname(part)
+    for rel in root.iter(f"{{{PACKAGE_RELS_NAMESPACE}}}Relationship"):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") != "External":
+            target = posixpath.normpath(posixpath.join(folder, target)) if not target.startswith("/") else target[1:]
+        rels[rel.get("Id")] = {"type": rel.get("Type", "").rsplit("/", 1)[-1], "target": target}
+    return rels
+
+
+class _Paragraph:
+    def __init__(self):
+        self.parts: List[str] = []
+        # Posisi awal teks tiap hyperlink yang sedang terbuka + URL-nya
+        self.links: List[tuple] = []
+        self.field_url: Optional[str] = None
+        self.field_start = 0
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class _Cell:
+    def __init__(self):
+        self.lines: List[str] = []
+
+
+def _append_link(paragraph: _Paragraph, start: int, url: Optional[str]):
+    if not url:
+        return
+    label = "".join(paragraph.parts[start:]).strip()
+    # Label yang sudah berupa URL tidak perlu diulang (sama seperti dedupe di pdf_layout)
+    if label and label.rstrip("/") not in (url.rstrip("/"), url.replace("mailto:", "", 1)):
+        paragraph.parts.append(f" [{url}]")
+    elif not label:
+        paragraph.parts.append(f"[{url}]")
+
+
+def _link_target(elem, local: str, rels: Dict[str, Dict[str, str]]) -> Optional[str]:
+    if local == "fldSimple":
+        instr = next((v for k, v in elem.attrib.items() if _split_tag(k)[1] == "instr"), "")
+        match = _FIELD_HYPERLINK.search(instr)
+        return match.group(1) if match else None
+    # w:hyperlink r:id -> target eksternal; w:anchor (bookmark internal) diabaikan
+    rel_id = next((v for k, v in elem.attrib.items() if _split_tag(k) in _R_ID_KEYS), None)
+    rel = rels.get(rel_id)
+    return rel["target"] if rel and rel["type"] == "hyperlink" else None
+
+
+def iter_part_lines(archive: zipfile.ZipFile, part: str):
+    """
+    Yield baris teks satu part (document/header/footer) sesuai urutan dokumen.
+    - paragraf -> satu baris (line break di dalam paragraf dipertahankan)
+    - baris tabel -> sel digabung " | "; tabel bersarang diratakan ke dalam selnya
+    - text box (w:txbxContent) -> paragraf tersendiri; salinan VML di mc:Fallback dilewati
+    - hyperlink (w:hyperlink r:id / field HYPERLINK) -> "Teks [URL]"
+    Elemen yang sudah diproses di-clear sehingga memori tidak tumbuh mengikuti ukuran dokumen.
+    """
+    rels = read_relationships(archive, part)
+    paragraphs: List[_Paragraph] = []
+    cells: List[_Cell] = []
+    rows: List[List[str]] = []
+    fallback_depth = 0
+    depth = 0
+    body, body_depth = None, 0
+
+    with archive.open(part) as handle:
+        for event, elem in ET.iterparse(handle, events=("start", "end")):
+            namespace, local = _split_tag(elem.tag)
+
+            if event == "start":
+                depth += 1
+                if namespace == MC_NAMESPACE and local == "Fallback":
+                    fallback_depth += 1
+                if fallback_depth or namespace not in W_NAMESPACES:
+                    continue
+                if local == "body" or (depth == 1 and local in ("hdr", "ftr")):
+                    body, body_depth = elem, depth
+                elif local == "p":
+                    paragraphs.append(_Paragraph())
+                elif local == "tc":
+                    cells.append(_Cell())
+                elif local == "tr":
+                    rows.append([])
+                elif local in ("hyperlink", "fldSimple") and paragraphs:
+                    paragraph = paragraphs[-1]
+                    paragraph.links.append((len(paragraph.parts), _link_target(elem, local, rels)))
+                continue
+
+            depth -= 1
+            if namespace == MC_NAMESPACE and local == "Fallback":
+                fallback_depth -= 1
+                elem.clear()
+                continue
+            if fallback_depth or namespace not in W_NAMESPACES:
+                continue
+
+            if local == "t" and paragraphs:
+                paragraphs[-1].parts.append(elem.text or "")
+            elif local in ("tab", "ptab") and paragraphs:
+                paragraphs[-1].parts.append("\t")
+            elif local in ("br", "cr") and paragraphs:
+                paragraphs[-1].parts.append("\n")
+            elif local == "noBreakHyphen" and paragraphs:
+                paragraphs[-1].parts.append("-")
+            elif local == "instrText" and paragraphs:
+                match = _FIELD_HYPERLINK.search(elem.text or "")
+                if match:
+                    paragraphs[-1].field_url = match.group(1)
+                    paragraphs[-1].field_start = len(paragraphs[-1].parts)
+            elif local == "fldChar" and paragraphs:
+                paragraph = paragraphs[-1]
+                field_type = next((v for k, v in elem.attrib.items() if _split_tag(k)[1] == "fldCharType"), "")
+                if field_type == "end" and paragraph.field_url:
+                    _append_link(paragraph, paragraph.field_start, paragraph.field_url)
+                    paragraph.field_url = None
+            elif local in ("hyperlink", "fldSimple") and paragraphs and paragraphs[-1].links:
+                start, url = paragraphs[-1].links.pop()
+                _append_link(paragraphs[-1], start, url)
+            elif local == "p" and paragraphs:
+                line = paragraphs.pop().text()
+                if cells:
+                    if line.strip():
+                        cells[-1].lines.append(line.strip())
+                else:
+                    yield line
+            elif local == "tc" and cells:
+                cell = cells.pop()
+                if rows:
+                    rows[-1].append(" ".join(" ".join(cell.lines).split()))
+            elif local == "tr" and rows:
+                line = CELL_SEPARATOR.join(text for text in rows.pop() if text)
+                if cells:
+                    # Tabel bersarang: baris-barisnya menjadi isi sel luar
+                    if line:
+                        cells[-1].lines.append(line)
+                elif line:
+                    yield line
+
+            # Anak langsung body sudah selesai diproses: lepaskan dari tree (memori tetap kecil)
+            if body is not None and depth == body_depth:
+                body.clear()
+
+
+def _header_footer_parts(archive: zipfile.ZipFile) -> Dict[str, List[str]]:
+    parts = {"header": [], "footer": []}
+    for rel in read_relationships(archive, DOCUMENT_PART).values():
+        if rel["type"] in parts and rel["target"] in archive.namelist():
+            parts[rel["type"]].append(rel["target"])
+    return parts
+
+
+def _unique_block_lines(archive: zipfile.ZipFile, part_names: List[str], seen: set) -> List[str]:
+    # Header first/even/default sering berisi teks yang sama; ambil sekali saja
+    lines = []
+    for part in part_names:
+        block = [line for line in iter_part_lines(archive, part) if line.strip()]
+        key = "\n".join(block)
+        if block and key not in seen:
+            seen.add(key)
+            lines.extend(block)
+    return lines
+
+
+def extract_docx_text(source) -> str:
+    """
+    Ekstraksi DOCX tanpa membangun object model python-docx: baca zip langsung dan
+    iterparse XML-nya. Header (biasanya nama & kontak di template CV) diletakkan di awal, footer di akhir.
+    `source` boleh path atau file handle.
+    """
+    with zipfile.ZipFile(source) as archive:
+        parts = _header_footer_parts(archive)
+        seen = set()
+        lines = _unique_block_lines(archive, parts["header"], seen)
+        lines.extend(iter_part_lines(archive, DOCUMENT_PART))
+        lines.extend(_unique_block_lines(archive, parts["footer"], seen))
+    return "".join(line + "\n" for line in lines)
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+# --- KONFIGURASI CACHE EKSTRAKSI ---
+# Budget memori (bytes) untuk tier LRU in-memory. Default 64 MB.
+EXTRACT_CACHE_MAX_BYTES = int(os.getenv("EXTRACT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Path file SQLite untuk tier disk. Kosong = tier disk nonaktif.
+EXTRACT_CACHE_DB = os.getenv("EXTRACT_CACHE_DB", "")
+
+
+def make_cache_key_from_digest(digest: str, content_type: str, version: str) -> str:
+    """
+    Key berbasis isi file (content-addressed): sha256 upload (dihitung saat upload diterima) + versi extractor.
+    Naikkan versi extractor setiap kali format output berubah agar entry lama tidak terpakai.
+    """
+    return f"{version}:{content_type}:{digest}"
+
+
+class ExtractionCache:
+    """
+    Cache dua tingkat untuk hasil ekstraksi teks CV.
+    - Tier 1: LRU in-memory dengan batas total bytes.
+    - Tier 2 (opsional): SQLite di disk agar hasil tetap ada setelah restart.
+    """
+
+    def __init__(self, max_bytes: int = EXTRACT_CACHE_MAX_BYTES, db_path: str = EXTRACT_CACHE_DB):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Ekstraksi berjalan di threadpool, jadi koneksi dipakai lintas thread (dijaga oleh _lock)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extracted_text (key TEXT PRIMARY KEY, text TEXT NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Extract Cache: disk tier disabled ({e})")
+            self._db = None
+
+    @staticmethod
+    def _entry_size(key: str, text: str) -> int:
+        return len(key) + len(text.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT text FROM extracted_text WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Extract Cache: disk read failed ({e})")
+                    row = None
+                if row is not None:
+                    self.disk_hits += 1
+                    self._store_memory(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, text: str):
+        with self._lock:
+            self._store_memory(key, text)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO extracted_text (key, text) VALUES (?, ?)", (key, text)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Extract Cache: disk write failed ({e})")
+
+    def _store_memory(self, key: str, text: str):
+        size = self._entry_size(key, text)
+        if size > self.max_bytes:
+            # Entry lebih besar dari seluruh budget: jangan simpan di memori
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= self._entry_size(key, old)
+
+        self._entries[key] = text
+        self._size += size
+
+        while self._size > self.max_bytes and self._entries:
+            old_key, old_text = self._entries.popitem(last=False)
+            self._size -= self._entry_size(old_key, old_text)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM extracted_text")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "memory_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self._db is not None,
+            }
+
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,313 @@
+import os
+import time
+import signal
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from src.services.extract_cache import extraction_cache, make_cache_key_from_digest
+from src.services.extractor import EXTRACTOR_VERSION, extract_text_from_source
+from src.services.upload import SpooledUpload
+from src.services.metrics import observe_stage
+
+# --- KONFIGURASI PROCESS POOL EKSTRAKSI ---
+# Jumlah worker process. 0 = nonaktif (fallback ke threadpool seperti sebelumnya).
+# Tiap worker web (WEB_CONCURRENCY) punya pool sendiri: default CPU dibagi rata di antara mereka
+_WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, max(1, (os.cpu_count() or 1) // _WEB_WORKERS)))))
+# Batas waktu total (detik) untuk satu dokumen
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+# Batas jumlah halaman PDF yang diterima
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "50"))
+# Dokumen dengan halaman lebih dari ini dipecah per rentang halaman dan diproses paralel
+EXTRACT_PAGES_PER_CHUNK = int(os.getenv("EXTRACT_PAGES_PER_CHUNK", "4"))
+
+PDF_CONTENT_TYPE = "application/pdf"
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Fungsi yang dijalankan di dalam worker process (harus top-level agar bisa di-pickle)
+# ---------------------------------------------------------------------------
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("Ekstraksi melebihi batas waktu.")
+
+
+def _run_with_deadline(deadline: float, fn, *args):
+    """
+    Menjalankan `fn` dengan batas waktu absolut di dalam worker.
+    SIGALRM memutus parsing yang macet sehingga worker bisa dipakai request lain.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise ExtractionTimeout("Ekstraksi melebihi batas waktu.")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return fn(*args)
+    except Exception as e:
+        # Parser kadang membungkus exception dari SIGALRM; normalisasi menjadi timeout
+        if time.time() >= deadline:
+            raise ExtractionTimeout("Ekstraksi melebihi batas waktu.") from e
+        raise
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _init_worker():
+    # Dijalankan sekali di setiap worker saat spawn: import modul berat sebelum task pertama
+    import pdfplumber  # noqa: F401
+    from src.services import docx_stream  # noqa: F401
+    from src.services import pdf_layout  # noqa: F401
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def _open_source(source):
+    """Worker menerima bytes (upload kecil) atau path file temp (upload besar, jauh lebih murah untuk di-pickle)."""
+    import io
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def _pdf_pages_text(pages, deadline: Optional[float] = None) -> str:
+    from src.services.pdf_layout import layout_page_text
+    texts = []
+    for page in pages:
+        # Di thread (tanpa SIGALRM) deadline dicek per halaman
+        if deadline is not None and time.time() >= deadline:
+            raise ExtractionTimeout("Ekstraksi melebihi batas waktu.")
+        texts.append(layout_page_text(page.extract_words(), page.hyperlinks))
+    return "".join(texts)
+
+
+def _extract_pdf_head(source, chunk_size: int, max_pages: int, deadline: Optional[float] = None) -> Tuple[int, str]:
+    """
+    Satu kali parse: jumlah halaman + teks rentang pertama. Dokumen pendek (mayoritas CV)
+    selesai di sini; sisanya baru dipecah ke worker lain oleh parent.
+    """
+    import pdfplumber
+    try:
+        with pdfplumber.open(_open_source(source)) as pdf:
+            page_count = len(pdf.pages)
+            if page_count > max_pages:
+                raise ValueError(f"Dokumen terlalu panjang ({page_count} halaman, maksimal {max_pages}).")
+            return page_count, _pdf_pages_text(pdf.pages[:chunk_size], deadline)
+    except (ExtractionTimeout, ValueError):
+        raise
+    except Exception as e:
+        raise ValueError(f"Gagal mengekstrak teks: {str(e)}")
+
+
+def _extract_pdf_range(source, start: int, end: int) -> str:
+    import pdfplumber
+    try:
+        with pdfplumber.open(_open_source(source)) as pdf:
+            return _pdf_pages_text(pdf.pages[start:end])
+    except ExtractionTimeout:
+        raise
+    except Exception as e:
+        raise ValueError(f"Gagal mengekstrak teks: {str(e)}")
+
+
+def _worker_extract_pdf_head(deadline: float, source, chunk_size: int, max_pages: int) -> Tuple[int, str]:
+    return _run_with_deadline(deadline, _extract_pdf_head, source, chunk_size, max_pages)
+
+
+def _worker_extract_range(deadline: float, source, start: int, end: int) -> str:
+    return _run_with_deadline(deadline, _extract_pdf_range, source, start, end)
+
+
+def _worker_extract_document(deadline: float, source, content_type: str) -> str:
+    return _run_with_deadline(deadline, extract_text_from_source, _open_source(source), content_type)
+
+
+def _extract_in_thread(source, content_type: str, max_pages: int, deadline: float) -> str:
+    """Fallback EXTRACT_WORKERS=0: batas halaman sama dengan worker, deadline dicek per halaman PDF."""
+    if content_type == PDF_CONTENT_TYPE:
+        _, text = _extract_pdf_head(source, max_pages, max_pages, deadline)
+        return text
+    return extract_text_from_source(_open_source(source), content_type)
+
+
+def page_ranges(page_count: int, chunk_size: int) -> List[Tuple[int, int]]:
+    chunk_size = max(1, chunk_size)
+    return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+
+# ---------------------------------------------------------------------------
+# Pool manager (dipakai dari event loop)
+# ---------------------------------------------------------------------------
+
+class ExtractionPool:
+    """ProcessPoolExecutor yang di-pre-warm untuk ekstraksi PDF/DOCX (CPU-bound, bebas dari GIL)."""
+
+    def __init__(self, workers: int = EXTRACT_WORKERS, timeout: float = EXTRACT_TIMEOUT,
+                 max_pages: int = EXTRACT_MAX_PAGES, pages_per_chunk: int = EXTRACT_PAGES_PER_CHUNK):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.pages_per_chunk = pages_per_chunk
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # start/restart/shutdown diserialkan; generation mencegah pool yang sama di-restart berkali-kali
+        self._lock = asyncio.Lock()
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # "spawn" agar worker tidak mewarisi state thread/event loop dari uvicorn
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    async def start(self):
+        async with self._lock:
+            await self._start()
+
+    async def _start(self):
+        if not self.enabled or self._executor is not None:
+            return
+        executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        # Pre-warm: paksa semua worker spawn (initializer meng-import modul ekstraksi) sebelum request pertama
+        try:
+            await asyncio.gather(*[
+                loop.run_in_executor(executor, _warmup) for _ in range(self.workers)
+            ])
+        except BaseException:
+            await run_in_threadpool(executor.shutdown, wait=True, cancel_futures=True)
+            raise
+        self._executor = executor
+        self._generation += 1
+        print(f"Extraction pool ready: {self.workers} workers")
+
+    async def shutdown(self):
+        async with self._lock:
+            await self._shutdown()
+
+    async def _shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # wait=True: worker process & queue-nya di-join, tidak ada semaphore/proses yatim setelah exit
+            await run_in_threadpool(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _restart(self, generation: int):
+        """Restart pool yang rusak; request lain yang melihat pool yang sama hanya menunggu restart ini."""
+        async with self._lock:
+            if generation != self._generation:
+                return
+            await self._shutdown()
+            await self._start()
+
+    async def _acquire(self) -> Tuple[ProcessPoolExecutor, int]:
+        """
+        Snapshot executor + generation-nya. Jika pool sedang di-restart (executor None di antara
+        shutdown & start), tunggu lock sampai pool baru siap: executor None tidak pernah diteruskan
+        ke `run_in_executor` (yang diam-diam memakai thread default, tanpa SIGALRM & batas waktu).
+        """
+        executor = self._executor
+        if executor is None:
+            async with self._lock:
+                await self._start()
+                executor = self._executor
+            if executor is None:
+                raise RuntimeError("Extraction pool tidak aktif (EXTRACT_WORKERS=0).")
+        return executor, self._generation
+
+    @staticmethod
+    async def _submit(executor: ProcessPoolExecutor, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except RuntimeError as e:
+            # Executor snapshot sudah di-shutdown oleh restart dari request lain
+            raise BrokenProcessPool(str(e)) from e
+
+    async def _extract_pdf(self, executor: ProcessPoolExecutor, source, deadline: float) -> str:
+        chunk_size = max(1, self.pages_per_chunk)
+        page_count, head = await self._submit(
+            executor, _worker_extract_pdf_head, deadline, source, chunk_size, self.max_pages
+        )
+        if page_count <= chunk_size:
+            return head
+
+        chunks = await asyncio.gather(*[
+            self._submit(executor, _worker_extract_range, deadline, source, start, end)
+            for start, end in page_ranges(page_count, chunk_size)[1:]
+        ])
+        return head + "".join(chunks)
+
+    async def _extract_in_threadpool(self, source, content_type: str, deadline: float) -> str:
+        try:
+            # Thread tidak bisa dihentikan paksa: wait_for melepas request, cek deadline per halaman menghentikan parsing
+            text = await asyncio.wait_for(
+                run_in_threadpool(_extract_in_thread, source, content_type, self.max_pages, deadline),
+                timeout=self.timeout,
+            )
+        except (ExtractionTimeout, asyncio.TimeoutError):
+            raise ValueError(f"Ekstraksi melebihi batas waktu {self.timeout:.0f} detik.")
+        return text.strip()
+
+    async def extract(self, source, content_type: str) -> str:
+        """
+        `source` berupa bytes atau path file (dibuka langsung oleh worker).
+        EXTRACT_WORKERS=0: dijalankan di threadpool dengan batas halaman & waktu yang sama.
+        """
+        deadline = time.time() + self.timeout
+        if not self.enabled:
+            return await self._extract_in_threadpool(source, content_type, deadline)
+
+        executor, generation = await self._acquire()
+        try:
+            if content_type == PDF_CONTENT_TYPE:
+                coro = self._extract_pdf(executor, source, deadline)
+            else:
+                coro = self._submit(executor, _worker_extract_document, deadline, source, content_type)
+            # Batas waktu di sisi parent sebagai pengaman tambahan (SIGALRM di worker adalah yang utama)
+            text = await asyncio.wait_for(coro, timeout=self.timeout + 1)
+        except (ExtractionTimeout, asyncio.TimeoutError):
+            raise ValueError(f"Ekstraksi melebihi batas waktu {self.timeout:.0f} detik.")
+        except BrokenProcessPool:
+            print("Extraction pool broken, restarting workers")
+            await self._restart(generation)
+            raise ValueError("Worker ekstraksi berhenti secara tidak terduga.")
+
+        return text.strip()
+
+
+extraction_pool = ExtractionPool()
+
+
+async def extract_upload(upload: SpooledUpload) -> str:
+    """
+    Entry point ekstraksi untuk endpoint: cek cache (hash sudah dihitung saat upload diterima),
+    lalu jalankan di process pool (atau threadpool jika EXTRACT_WORKERS=0).
+    Upload besar dibaca worker langsung dari path-nya; upload kecil dikirim sebagai bytes.
+    """
+    key = make_cache_key_from_digest(upload.sha256, upload.content_type, EXTRACTOR_VERSION)
+    cached = extraction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with observe_stage("extraction", upload.content_type):
+        text = await extraction_pool.extract(upload.source, upload.content_type)
+
+    extraction_cache.set(key, text)
+    return text
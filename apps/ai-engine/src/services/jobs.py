@@ -0,0 +1,254 @@
+import os
+import hmac
+import json
+import math
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from src.services.deadline import deadline_scope
+from src.services.rate_limit import backoff_delay
+from src.services.scraper import get_http_client
+
+# --- KONFIGURASI JOB QUEUE (submit/poll) ---
+# Jumlah worker yang memproses job secara paralel (batas kerja LLM bersamaan dari jalur job)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Kapasitas antrean; jika penuh submit ditolak 429 + Retry-After
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# Lama hasil job disimpan setelah selesai (detik)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+# Retry-After default saat belum ada data durasi job
+JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "10"))
+# Webhook penyelesaian job
+JOB_WEBHOOK_TIMEOUT = float(os.getenv("JOB_WEBHOOK_TIMEOUT", "10"))
+JOB_WEBHOOK_RETRIES = int(os.getenv("JOB_WEBHOOK_RETRIES", "3"))
+# Jika diisi, payload webhook ditandatangani HMAC-SHA256 (header X-Webhook-Signature)
+JOB_WEBHOOK_SECRET = os.getenv("JOB_WEBHOOK_SECRET", "")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Antrean job penuh.")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, kind: str, run: Callable[[], Awaitable[Any]], webhook_url: Optional[str] = None,
+                 cleanup: Optional[Callable[[], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.webhook_url = webhook_url
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[Dict[str, Any]] = None
+        self._run = run
+        self._cleanup = cleanup
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+def _serialize(result: Any) -> Any:
+    if hasattr(result, "model_dump"):
+        return result.model_dump()
+    return result
+
+
+def _error_payload(error: Exception) -> Dict[str, Any]:
+    if isinstance(error, HTTPException):
+        return {"status_code": error.status_code, "detail": error.detail}
+    return {"status_code": 500, "detail": str(error)}
+
+
+class JobQueue:
+    """
+    Antrean kerja in-process dengan kapasitas terbatas (admission control) + N worker.
+    Hasil job disimpan selama `result_ttl` detik untuk di-poll, opsional dikirim ke webhook.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_SIZE, result_ttl: int = JOB_RESULT_TTL):
+        self.workers = workers
+        self.max_size = max_size
+        self.result_ttl = result_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running = 0
+        # Rata-rata bergerak durasi job, untuk estimasi Retry-After
+        self._avg_duration: Optional[float] = None
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            # Bersihkan file temp milik job yang belum sempat jalan
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                self._release(job)
+        self._queue = None
+
+    def retry_after(self) -> int:
+        if self._avg_duration is None:
+            return JOB_RETRY_AFTER
+        # Saat antrean penuh, satu slot kosong setiap ~(durasi rata-rata / jumlah worker) detik
+        return max(1, min(300, math.ceil(self._avg_duration / max(1, self.workers))))
+
+    def check_capacity(self):
+        """
+        Cek murah sebelum menerima upload, agar isi request yang pasti ditolak tidak dibaca.
+        Raise QueueFull (dihitung sebagai rejected, sama seperti `submit`) jika antrean penuh.
+        """
+        if self._queue is not None and self._queue.full():
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    def submit(self, kind: str, run: Callable[[], Awaitable[Any]], webhook_url: Optional[str] = None,
+               cleanup: Optional[Callable[[], None]] = None) -> Job:
+        job = Job(kind, run, webhook_url, cleanup)
+        if self._queue is None:
+            self._release(job)
+            raise RuntimeError("Job queue belum dijalankan.")
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self._release(job)
+            raise QueueFull(self.retry_after())
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def _release(self, job: Job):
+        if job._cleanup is not None:
+            try:
+                job._cleanup()
+            except Exception as e:
+                print(f"Job Cleanup Error ({job.id}): {e}")
+            job._cleanup = None
+        job._run = None
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                # Deadline dihitung sejak job mulai dikerjakan (waktu antre tidak termasuk)
+                with deadline_scope():
+                    job.result = _serialize(await job._run())
+                job.status = SUCCEEDED
+                self.succeeded += 1
+            except asyncio.CancelledError:
+                job.status = FAILED
+                job.error = {"status_code": 503, "detail": "Server dimatikan sebelum job selesai."}
+                raise
+            except Exception as e:
+                print(f"Job Error ({job.kind} {job.id}): {e}")
+                job.status = FAILED
+                job.error = _error_payload(e)
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                self._running -= 1
+                self._release(job)
+                self._queue.task_done()
+                duration = job.finished_at - job.started_at
+                self._avg_duration = duration if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * duration
+
+            if job.webhook_url:
+                task = asyncio.create_task(self._notify(job))
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _notify(self, job: Job):
+        body = json.dumps(job.to_dict(), ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if JOB_WEBHOOK_SECRET:
+            signature = hmac.new(JOB_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Webhook-Signature"] = f"sha256={signature}"
+
+        client = get_http_client()
+        for attempt in range(JOB_WEBHOOK_RETRIES):
+            try:
+                response = await client.post(job.webhook_url, content=body, headers=headers, timeout=JOB_WEBHOOK_TIMEOUT)
+                if response.status_code < 500:
+                    return
+                print(f"Webhook ({job.id}) Attempt {attempt+1}/{JOB_WEBHOOK_RETRIES}: status {response.status_code}")
+            except Exception as e:
+                print(f"Webhook ({job.id}) Attempt {attempt+1}/{JOB_WEBHOOK_RETRIES} failed: {e}")
+            if attempt < JOB_WEBHOOK_RETRIES - 1:
+                await asyncio.sleep(backoff_delay(attempt))
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        # Job disisipkan berurutan; yang paling lama ada di depan
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job.done and job.finished_at < cutoff:
+                del self._jobs[job_id]
+            elif job.created_at >= cutoff:
+                break
+
+    async def _janitor(self):
+        while True:
+            await asyncio.sleep(min(60, max(1, self.result_ttl)))
+            self._purge_expired()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_size": self.max_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "retained": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "avg_duration": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+        }
+
+
+job_queue = JobQueue()
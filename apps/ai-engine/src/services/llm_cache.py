@@ -0,0 +1,264 @@
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+# --- KONFIGURASI CACHE RESPONSE LLM ---
+# Backend: "memory" | "sqlite" | "none"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+# Mode: "record" (baca + tulis), "replay" (hanya dari cache, tanpa panggilan ke Gemini), "off"
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "record")
+# Default hanya panggilan deterministik (temperature 0) yang disimpan.
+# Aktifkan ini untuk merekam semua panggilan (mis. saat menyiapkan fixture replay untuk test).
+LLM_CACHE_RECORD_ALL = os.getenv("LLM_CACHE_RECORD_ALL", "false").lower() == "true"
+
+
+class LLMCacheMiss(Exception):
+    """Dilempar pada mode replay jika response untuk prompt tersebut belum pernah direkam."""
+
+
+class CachedResponse:
+    """Pengganti minimal untuk response SDK: menyediakan `.text` dan `.parsed`."""
+
+    def __init__(self, text: str, schema=None):
+        self.text = text
+        self.parsed = None
+        self.usage_metadata = None
+        if schema is not None and hasattr(schema, "model_validate_json"):
+            try:
+                self.parsed = schema.model_validate_json(text)
+            except Exception:
+                # Biarkan caller memakai fallback clean_json_text(response.text)
+                self.parsed = None
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _describe_contents(contents) -> list:
+    if isinstance(contents, str):
+        return [["user", _normalize_text(contents)]]
+
+    described = []
+    for content in contents:
+        if isinstance(content, str):
+            described.append(["user", _normalize_text(content)])
+            continue
+        parts = [_normalize_text(getattr(part, "text", "") or "") for part in (content.parts or [])]
+        described.append([content.role or "user", parts])
+    return described
+
+
+def _describe_schema(schema) -> Any:
+    if schema is None:
+        return None
+    if hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema()
+    return repr(schema)
+
+
+def make_llm_cache_key(model_name: str, contents, config) -> str:
+    """Key = hash dari (nama model, prompt yang dinormalisasi, response schema, generation config)."""
+    schema = getattr(config, "response_schema", None)
+    if config is not None and hasattr(config, "model_dump"):
+        config_dump = config.model_dump(exclude_none=True, exclude={"response_schema"})
+    else:
+        config_dump = config
+
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "contents": _describe_contents(contents),
+            "schema": _describe_schema(schema),
+            "config": config_dump,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(config) -> bool:
+    if LLM_CACHE_RECORD_ALL:
+        return True
+    temperature = getattr(config, "temperature", None)
+    return temperature is not None and temperature <= 0
+
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, text = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def set(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = (time.time(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    blocking = True
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            text, created_at = row
+            now = time.time()
+            if self.ttl and now - created_at > self.ttl:
+                self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.evictions += 1
+                return None
+            self._db.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return text
+
+    def set(self, key: str, text: str):
+        with self._lock:
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, text, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, text, now, now),
+            )
+            if self.ttl:
+                cursor = self._db.execute(
+                    "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,)
+                )
+                self.evictions += max(cursor.rowcount, 0)
+            # Eviksi berdasarkan ukuran: buang entry yang paling lama tidak diakses
+            cursor = self._db.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+def create_backend(name: str = LLM_CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend(LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    if name == "sqlite":
+        return SQLiteBackend(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    return None
+
+
+class LLMResponseCache:
+    """Cache response Gemini dengan dukungan mode record/replay."""
+
+    def __init__(self, backend=None, mode: str = LLM_CACHE_MODE):
+        self.backend = backend
+        self.mode = mode if backend is not None else "off"
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    @property
+    def replay_only(self) -> bool:
+        return self.mode == "replay"
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def lookup(self, model_name: str, contents, config) -> Tuple[str, Optional[CachedResponse]]:
+        key = make_llm_cache_key(model_name, contents, config)
+        if not self.enabled:
+            return key, None
+
+        text = await self._call(self.backend.get, key)
+        if text is None:
+            self.misses += 1
+            if self.replay_only:
+                raise LLMCacheMiss(f"No recorded response for {model_name} (key {key[:12]})")
+            return key, None
+
+        self.hits += 1
+        return key, CachedResponse(text, getattr(config, "response_schema", None))
+
+    async def store(self, key: str, config, response):
+        if self.mode != "record" or not is_cacheable(config):
+            return
+        text = getattr(response, "text", None)
+        if not text:
+            return
+        await self._call(self.backend.set, key, text)
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "entries": len(self.backend) if self.backend is not None else 0,
+        }
+
+
+llm_cache = LLMResponseCache(create_backend(), LLM_CACHE_MODE)
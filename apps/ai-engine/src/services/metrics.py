@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import threading
+import anyio.to_thread
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Bucket latency (detik): dari operasi regex/cache (ms) sampai panggilan REASONING_MODEL (puluhan detik)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label: [count per bucket (non-kumulatif, + slot +Inf), sum]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Format teks Prometheus (exposition format 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "ai_engine_stage_seconds", "Latency per tahap pipeline (upload, ekstraksi, scrape JD, parsing JSON).", ("stage",)
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "ai_engine_http_request_seconds", "Latency request HTTP (sampai header response dikirim).", ("method", "path", "status")
+))
+GEMINI_ATTEMPT_SECONDS = registry.register(Histogram(
+    "ai_engine_gemini_attempt_seconds", "Latency per percobaan panggilan Gemini.", ("model", "outcome")
+))
+GEMINI_TOKENS = registry.register(Counter(
+    "ai_engine_gemini_tokens_total", "Token Gemini dari usage_metadata (cached_input termasuk dalam input).", ("model", "direction")
+))
+GEMINI_RETRIES = registry.register(Counter(
+    "ai_engine_gemini_retries_total", "Jumlah retry panggilan Gemini (setelah percobaan gagal).", ("model",)
+))
+GEMINI_HEDGES = registry.register(Counter(
+    "ai_engine_gemini_hedges_total", "Percobaan hedge yang dikirim karena percobaan pertama melewati percentile latency.", ("model",)
+))
+GEMINI_FALLBACKS = registry.register(Counter(
+    "ai_engine_gemini_fallbacks_total", "Panggilan yang dialihkan ke FAST_MODEL karena sisa deadline menipis.", ("model",)
+))
+GEMINI_FAILURES = registry.register(Counter(
+    "ai_engine_gemini_failures_total", "Panggilan Gemini yang tetap gagal setelah semua retry.", ("model",)
+))
+
+STARTUP_SECONDS = registry.register(Gauge(
+    "ai_engine_startup_seconds", "Durasi fase startup worker: import modul & pre-warm lifespan.", ("phase",)
+))
+# Diisi saat /metrics di-scrape (lihat observe_runtime)
+THREADPOOL_CAPACITY = registry.register(Gauge(
+    "ai_engine_threadpool_capacity", "Jumlah thread maksimal threadpool default (run_in_threadpool)."
+))
+THREADPOOL_BUSY = registry.register(Gauge(
+    "ai_engine_threadpool_busy", "Thread threadpool yang sedang dipakai."
+))
+THREADPOOL_WAITING = registry.register(Gauge(
+    "ai_engine_threadpool_waiting", "Task yang menunggu slot threadpool (saturasi)."
+))
+PROCESS_RSS = registry.register(Gauge(
+    "ai_engine_process_resident_memory_bytes", "Resident memory proses server (tanpa worker ekstraksi)."
+))
+
+
+def _resident_memory_bytes() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Non-Linux: hanya puncak RSS yang tersedia
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            return None
+
+
+def observe_runtime():
+    """Snapshot threadpool & memori; dipanggil dari endpoint async /metrics (butuh event loop aktif)."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_CAPACITY.set(limiter.total_tokens)
+    THREADPOOL_BUSY.set(statistics.borrowed_tokens)
+    THREADPOOL_WAITING.set(statistics.tasks_waiting)
+    rss = _resident_memory_bytes()
+    if rss is not None:
+        PROCESS_RSS.set(rss)
+
+
+# --- TIMING PER REQUEST (header Server-Timing) ---
+# List dibagikan ke task turunan (asyncio.gather menyalin context, bukan isi list-nya)
+_request_timings: ContextVar[Optional[List[Tuple[str, float, Optional[str]]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> List[Tuple[str, float, Optional[str]]]:
+    timings: List[Tuple[str, float, Optional[str]]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def record_timing(name: str, seconds: float, desc: Optional[str] = None):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds, desc))
+
+
+def server_timing_header(timings: List[Tuple[str, float, Optional[str]]], total: Optional[float] = None) -> str:
+    entries = []
+    for name, seconds, desc in timings:
+        entry = name
+        if desc:
+            entry += f';desc="{_escape(desc)}"'
+        entries.append(f"{entry};dur={seconds * 1000:.1f}")
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+@contextmanager
+def observe_stage(stage: str, desc: Optional[str] = None):
+    """Catat durasi blok ke histogram `ai_engine_stage_seconds` dan ke Server-Timing request aktif."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record_timing(stage, elapsed, desc)
+
+
+def record_gemini_attempt(model_name: str, attempt: int, seconds: float, outcome: str = "ok", hedge: bool = False):
+    """outcome: ok | error | cancelled (hedge yang kalah / timeout)."""
+    GEMINI_ATTEMPT_SECONDS.observe(seconds, model=model_name, outcome=outcome)
+    label = f"{model_name} attempt {attempt}{' hedge' if hedge else ''}{'' if outcome == 'ok' else ' ' + outcome}"
+    record_timing("gemini", seconds, label)
+
+
+def record_usage(model_name: str, usage_metadata):
+    """Tambahkan token input/output dari `usage_metadata` response Gemini (jika ada)."""
+    if usage_metadata is None:
+        return
+    prompt_tokens = getattr(usage_metadata, "prompt_token_count", None) or 0
+    # Token "thinking" ditagih sebagai output
+    output_tokens = (getattr(usage_metadata, "candidates_token_count", None) or 0) + \
+        (getattr(usage_metadata, "thoughts_token_count", None) or 0)
+    if prompt_tokens:
+        GEMINI_TOKENS.inc(prompt_tokens, model=model_name, direction="input")
+    if output_tokens:
+        GEMINI_TOKENS.inc(output_tokens, model=model_name, direction="output")
+    # Bagian input yang dilayani dari cache (implicit caching atau cached content), ditagih lebih murah
+    cached_tokens = getattr(usage_metadata, "cached_content_token_count", None) or 0
+    if cached_tokens:
+        GEMINI_TOKENS.inc(cached_tokens, model=model_name, direction="cached_input")
@@ -0,0 +1,80 @@
+from bisect import bisect_left
+from typing import List, Dict, Any
+
+# Toleransi vertikal (pt) untuk menganggap dua kata berada di baris yang sama
+LINE_TOLERANCE = 5.0
+
+
+def attach_links(words: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> List[str]:
+    """
+    Menempelkan URL hyperlink ke teks kata dalam format "Text [URL]".
+
+    Setiap link di-inject ke kata TERAKHIR (urutan asli `extract_words`) yang bbox-nya
+    bersinggungan dengan bbox link. Pencarian kandidat memakai index interval vertikal
+    (kata diurutkan berdasarkan `top` + bisect), bukan cek semua kata untuk setiap link.
+
+    Mengembalikan list teks kata (index sama dengan `words`).
+    """
+    texts = [word['text'] for word in words]
+    if not words or not links:
+        return texts
+
+    order = sorted(range(len(words)), key=lambda i: words[i]['top'])
+    tops = [words[i]['top'] for i in order]
+    # Kata dengan bottom > link.top pasti punya top > link.top - tinggi_maks.
+    # Margin 1pt untuk menghindari selisih pembulatan float; filter akhir tetap pakai cek eksak.
+    max_height = max(word['bottom'] - word['top'] for word in words) + 1.0
+
+    for link in links:
+        start = bisect_left(tops, link['top'] - max_height)
+        end = bisect_left(tops, link['bottom'])
+
+        last_index = -1
+        for pos in range(start, end):
+            i = order[pos]
+            word = words[i]
+            if (word['x0'] < link['x1'] and word['x1'] > link['x0'] and
+                word['top'] < link['bottom'] and word['bottom'] > link['top']):
+                if i > last_index:
+                    last_index = i
+
+        if last_index >= 0:
+            marker = f"[{link['uri']}]"
+            if marker not in texts[last_index]:  # Prevent duplicates
+                texts[last_index] += f" {marker}"
+
+    return texts
+
+
+def build_lines(words: List[Dict[str, Any]], texts: List[str], line_tolerance: float = LINE_TOLERANCE) -> List[str]:
+    """
+    Mengurutkan kata sekali (top, lalu x0) dan mengelompokkannya menjadi baris.
+    Baris baru dimulai jika jarak vertikal dari awal baris melebihi `line_tolerance`.
+    """
+    if not words:
+        return []
+
+    order = sorted(range(len(words)), key=lambda i: (words[i]['top'], words[i]['x0']))
+
+    lines = []
+    current_top = words[order[0]]['top']
+    line_words = []
+    for i in order:
+        top = words[i]['top']
+        if abs(top - current_top) > line_tolerance:
+            lines.append(" ".join(line_words).strip())
+            line_words = []
+            current_top = top
+        line_words.append(texts[i])
+
+    lines.append(" ".join(line_words).strip())
+    return lines
+
+
+def layout_page_text(words: List[Dict[str, Any]], links: List[Dict[str, Any]], line_tolerance: float = LINE_TOLERANCE) -> str:
+    """Rekonstruksi teks satu halaman PDF (setiap baris diakhiri newline, atau string kosong)."""
+    if not words:
+        return ""
+    texts = attach_links(words, links)
+    lines = build_lines(words, texts, line_tolerance)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,239 @@
+import os
+import re
+from typing import List, Tuple
+
+from src.services.cv_parser import section_blocks
+
+# --- KONFIGURASI BUDGET INPUT ---
+# Rata-rata karakter per token (heuristik untuk teks Latin; cukup untuk budgeting, bukan billing)
+CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))
+# Batas maksimal token untuk JD, berapapun sisa budget model
+JD_MAX_TOKENS = int(os.getenv("JD_MAX_TOKENS", "3000"))
+# Batas minimal token untuk JD agar konteks pekerjaan tidak hilang total
+JD_MIN_TOKENS = int(os.getenv("JD_MIN_TOKENS", "400"))
+# Batas minimal token untuk CV: CV tidak pernah dipangkas di bawah ini walau instruksi + JD besar
+CV_MIN_TOKENS = int(os.getenv("CV_MIN_TOKENS", "1500"))
+
+# Kata kunci heading yang wajib dipertahankan (EN + ID)
+_PRIORITY_HEADINGS = re.compile(
+    r"requirement|qualification|responsibilit|what you.ll do|what you will do|duties|"
+    r"skill|must have|nice to have|about the role|the role|job description|role overview|"
+    r"kualifikasi|persyaratan|tanggung jawab|deskripsi pekerjaan|keahlian|syarat",
+    re.IGNORECASE,
+)
+# Heading yang paling aman dibuang lebih dulu
+_LOW_PRIORITY_HEADINGS = re.compile(
+    r"about us|about the company|who we are|benefit|perks|what we offer|how to apply|"
+    r"equal opportunity|privacy|tentang kami|tentang perusahaan|fasilitas|cara melamar",
+    re.IGNORECASE,
+)
+# Section yang dibuang seluruhnya (daftar lowongan lain, dsb.)
+_DROP_HEADINGS = re.compile(
+    r"related jobs|similar jobs|more jobs|other jobs|recommended jobs|people also viewed|"
+    r"lowongan (lain|serupa|terkait)|share this job|bagikan",
+    re.IGNORECASE,
+)
+# Baris boilerplate umum hasil scraping (cookie banner, navigasi, footer). Dicocokkan ke seluruh baris
+# (bukan substring) agar requirement seperti "Experience with sign-in/SSO flows" tidak ikut terbuang.
+_BOILERPLATE_LINE = re.compile(
+    r"^[\W_]*(?:"
+    r"(?:accept|reject|allow|manage)(?: all)?(?: cookies?)?|cookie (?:settings|preferences|policy)|"
+    r"we use cookies\b.*|this (?:site|website) uses cookies\b.*|"
+    r"privacy policy|terms of (?:service|use)|(?:©|copyright\b).*|.*\ball rights reserved\.?|"
+    r"(?:sign|log) ?in(?: to (?:apply|continue|save|view)\b.*)?|sign up(?: (?:for|to)\b.*)?|"
+    r"subscribe(?: (?:to|for)\b.*)?|skip to (?:main )?content|back to (?:top|jobs|search)|"
+    r"download (?:the )?app|follow us(?: on\b.*)?|kebijakan privasi|syarat dan ketentuan|daftar sekarang"
+    r")[\W_]*$",
+    re.IGNORECASE,
+)
+_JINA_HEADER = re.compile(r"^(URL Source|Published Time|Markdown Content|Warning):", re.IGNORECASE)
+_HEADING = re.compile(r"^\s*(#{1,6}\s+.+|\*\*[^*]{2,80}\*\*:?|[A-Z][A-Za-z /&'-]{2,60}:)\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def _is_link_only(line: str) -> bool:
+    """Baris navigasi: isinya hampir seluruhnya link markdown."""
+    links = re.findall(r"\[[^\]]*\]\([^)]*\)", line)
+    if not links:
+        return False
+    remainder = re.sub(r"\[[^\]]*\]\([^)]*\)", "", line)
+    return len(re.sub(r"[\s*|•·\-–>]", "", remainder)) < 5
+
+
+def strip_markdown_boilerplate(text: str) -> str:
+    """Buang gambar, navigasi, banner cookie, footer, dan daftar lowongan lain dari markdown Jina."""
+    lines = []
+    dropping = False
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        stripped = line.strip()
+
+        if _JINA_HEADER.match(stripped):
+            continue
+        if _HEADING.match(stripped):
+            dropping = bool(_DROP_HEADINGS.search(stripped))
+        if dropping:
+            continue
+
+        if _is_link_only(stripped):
+            continue
+        # Gambar dibuang, link dijadikan teks biasa
+        line = re.sub(r"!\[[^\]]*\]\([^)]*\)", "", line)
+        line = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", line)
+        stripped = line.strip()
+
+        # Boilerplate biasanya baris pendek; kalimat panjang yang kebetulan memuat kata kunci tetap dipakai
+        if stripped and len(stripped) < 120 and _BOILERPLATE_LINE.match(stripped):
+            continue
+        lines.append(line)
+
+    cleaned = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", cleaned).strip()
+
+
+def dedupe_blocks(text: str) -> str:
+    """Hapus paragraf yang berulang (mis. ringkasan lowongan yang muncul di header & footer)."""
+    seen = set()
+    blocks = []
+    for block in re.split(r"\n\s*\n", text):
+        key = re.sub(r"\W+", " ", block).strip().lower()
+        if not key:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        blocks.append(block.strip("\n"))
+    return "\n\n".join(blocks)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Pecah teks menjadi (heading, isi). Teks sebelum heading pertama memakai heading kosong."""
+    sections = []
+    heading = ""
+    body: List[str] = []
+    for line in text.splitlines():
+        if _HEADING.match(line.strip()):
+            if heading or any(l.strip() for l in body):
+                sections.append((heading, "\n".join(body)))
+            heading = line.strip()
+            body = []
+        else:
+            body.append(line)
+    if heading or any(l.strip() for l in body):
+        sections.append((heading, "\n".join(body)))
+    return sections
+
+
+def _section_priority(heading: str) -> int:
+    if _PRIORITY_HEADINGS.search(heading):
+        return 0
+    if not heading:
+        # Intro (judul + ringkasan posisi) biasanya penting
+        return 1
+    if _LOW_PRIORITY_HEADINGS.search(heading):
+        return 3
+    return 2
+
+
+def _truncate_lines(text: str, max_tokens: int) -> str:
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            # Baris panjang (paragraf satu baris) dipotong di batas kata
+            room = int((max_tokens - used) * CHARS_PER_TOKEN)
+            if room > 40:
+                kept.append(line[:room].rsplit(" ", 1)[0] + " ...")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def _fit_blocks(blocks: List[Tuple[int, str, str]], max_tokens: int) -> str:
+    """`blocks`: (prioritas, heading, teks blok). Prioritas kecil dipertahankan lebih dulu; urutan asli dijaga."""
+    order = sorted(range(len(blocks)), key=lambda i: (blocks[i][0], i))
+
+    chosen = {}
+    remaining = max_tokens
+    for i in order:
+        _, heading, block = blocks[i]
+        cost = estimate_tokens(block + "\n\n")
+        if cost <= remaining:
+            chosen[i] = block
+            remaining -= cost
+        elif remaining > estimate_tokens(heading) + 20:
+            # Section terakhir yang muat sebagian: potong per baris
+            truncated = _truncate_lines(block, remaining)
+            if truncated.strip() != heading:
+                chosen[i] = truncated
+                break
+
+    return "\n\n".join(chosen[i] for i in sorted(chosen))
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Truncation berbasis section: section requirement/responsibility dipertahankan lebih dulu,
+    section "about us"/benefit dibuang lebih dulu. Urutan asli section tetap dijaga.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    blocks = []
+    for heading, body in split_sections(text):
+        block = f"{heading}\n{body}".strip() if heading else body.strip()
+        blocks.append((_section_priority(heading), heading, block))
+    return _fit_blocks(blocks, max_tokens)
+
+
+# Prioritas section CV (lihat cv_parser.SECTION_HEADINGS); None = header nama/kontak sebelum section pertama
+_CV_SECTION_PRIORITY = {
+    None: 0, "experience": 0, "skills": 0,
+    "summary": 1, "education": 1, "soft_skills": 1,
+    "projects": 2, "certifications": 2,
+    "other": 3,
+}
+
+
+def fit_cv_to_budget(cv_text: str, max_tokens: int) -> str:
+    """
+    Truncation CV per section (teks per baris hasil extractor, sebelum sanitize): header kontak,
+    pengalaman & skill dipertahankan lebih dulu; section lain-lain dibuang lebih dulu.
+    """
+    if estimate_tokens(cv_text) <= max_tokens:
+        return cv_text
+
+    lines = [line.strip() for line in cv_text.splitlines() if line.strip()]
+    blocks = []
+    for section, block_lines in section_blocks(lines):
+        heading = block_lines[0] if section is not None else ""
+        blocks.append((_CV_SECTION_PRIORITY.get(section, 2), heading, "\n".join(block_lines)))
+    return _fit_blocks(blocks, max_tokens)
+
+
+def distill_job_description(text: str, max_tokens: int) -> str:
+    # Boilerplate hanya dibuang dari markdown Jina (scraper.py); teks JD dari user dipakai apa adanya
+    return fit_to_budget(dedupe_blocks(text), max_tokens)
+
+
+def jd_budget_for(model_budget: int, reserved_tokens: int) -> int:
+    """Sisa budget model setelah CV + instruksi, dijepit ke [JD_MIN_TOKENS, JD_MAX_TOKENS]."""
+    return max(JD_MIN_TOKENS, min(JD_MAX_TOKENS, model_budget - reserved_tokens))
+
+
+def cv_budget_for(model_budget: int, reserved_tokens: int) -> int:
+    """Sisa budget model setelah instruksi + JD/konteks, minimal CV_MIN_TOKENS."""
+    return max(CV_MIN_TOKENS, model_budget - reserved_tokens)
+
+
+def log_prompt_size(label: str, before: int, after: int, budget: int):
+    """Ukuran prompt utuh (instruksi template + semua input) sebelum & sesudah budgeting."""
+    over = ", melebihi budget" if after > budget else ""
+    print(f"Prompt Budget [{label}]: {before} -> {after} / {budget} tokens (est.){over}")
@@ -0,0 +1,50 @@
+import hashlib
+import re
+import textwrap
+
+from src.services.prompt_budget import estimate_tokens
+
+
+class Prompt:
+    """Hasil render template: instruksi statis (prefix) + isi variabel request (suffix)."""
+
+    def __init__(self, template: "PromptTemplate", text: str):
+        self.template = template
+        self.text = text
+
+    @property
+    def instructions(self) -> str:
+        return self.template.instructions
+
+    def full_text(self) -> str:
+        """Satu teks utuh (prefix statis lebih dulu), untuk logging & estimasi token."""
+        return f"{self.instructions}\n\n{self.text}"
+
+
+class PromptTemplate:
+    """
+    Template prompt dengan layout prefix-stabil: instruksi, aturan, dan format output tidak
+    pernah diinterpolasi sehingga identik byte-per-byte di setiap request; tanggal, JD, dan CV
+    hanya muncul di bagian `request` yang dirender belakangan.
+    Prefix yang sama bisa di-cache model (implicit caching / cached content, lihat context_cache.py).
+    """
+
+    def __init__(self, name: str, instructions: str, request: str):
+        self.name = name
+        self.instructions = textwrap.dedent(instructions).strip()
+        self.request = textwrap.dedent(request).strip()
+        self.fingerprint = hashlib.sha256(self.instructions.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def static_tokens(self) -> int:
+        """Estimasi token bagian tetap prompt (instruksi + kerangka request tanpa nilai variabel)."""
+        skeleton = re.sub(r"\{\w+\}", "", self.request)
+        return estimate_tokens(f"{self.instructions}\n\n{skeleton}")
+
+    def render(self, **values) -> Prompt:
+        # Nilai tidak di-format ulang: kurung kurawal di CV/JD aman
+        return Prompt(self, self.request.format(**values))
+
+    def __repr__(self) -> str:
+        return f"<PromptTemplate {self.name} {self.fingerprint}>"
+
@@ -0,0 +1,123 @@
+import re
+import time
+import random
+import asyncio
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket async: `rate` token per detik, maksimal `capacity` token (burst).
+    rate <= 0 berarti tanpa batas.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        # Lock menjaga urutan FIFO: penunggu berikutnya baru dihitung setelah yang sekarang dapat token
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ModelLimiter:
+    """Gabungan semaphore (jumlah panggilan paralel) + token bucket (request per menit) untuk satu model."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float, burst: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self._bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.in_flight = 0
+
+    async def __aenter__(self):
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            if self._semaphore is not None:
+                self._semaphore.release()
+            raise
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+# Status yang layak di-retry: rate limit, timeout, dan error sisi server
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def error_status(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = error_status(error)
+    # Error tanpa status HTTP (network, timeout SDK) tetap di-retry
+    return status is None or status in RETRYABLE_STATUS
+
+
+def _parse_duration(value) -> Optional[float]:
+    if value is None:
+        return None
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*s?\s*$", str(value))
+    return float(match.group(1)) if match else None
+
+
+def retry_after_hint(error: Exception) -> Optional[float]:
+    """
+    Ambil hint backoff dari error Gemini:
+    header `Retry-After` atau `google.rpc.RetryInfo.retryDelay` di detail error (mis. "21s").
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            hint = _parse_duration(headers.get("retry-after"))
+        except Exception:
+            hint = None
+        if hint is not None:
+            return hint
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        details = details.get("error", details).get("details", [])
+    if isinstance(details, list):
+        for item in details:
+            if isinstance(item, dict) and "retryDelay" in item:
+                hint = _parse_duration(item["retryDelay"])
+                if hint is not None:
+                    return hint
+    return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, hint: Optional[float] = None) -> float:
+    """
+    Exponential backoff dengan full jitter; jika server memberi hint, tunggu minimal selama hint
+    (+ jitter kecil agar request yang tertahan tidak serentak kembali).
+    """
+    if hint is not None:
+        return min(cap * 2, hint + random.uniform(0, base))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
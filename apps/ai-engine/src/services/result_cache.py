@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# --- KONFIGURASI CACHE HASIL ENDPOINT ---
+# Hasil /api/analyze & /api/customize yang identik disimpan sebentar (double-click, retry BullMQ, resubmit form)
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+
+
+def normalize_job_text(text: Optional[str]) -> str:
+    """Spasi/baris baru tidak mengubah isi JD, jadi tidak boleh mengubah key."""
+    return " ".join((text or "").split())
+
+
+def normalize_url(url: Optional[str]) -> str:
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    # Skema & host case-insensitive; fragment tidak pernah dikirim ke server
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+def make_request_key(kind: str, file_sha256: str, current_date: Optional[str], **params: Optional[str]) -> str:
+    """
+    Key request: (jenis endpoint, hash file, tanggal, parameter ternormalisasi).
+    Tanggal kosong diisi hari ini, sama seperti yang dilakukan analyze_cv/customize_cv.
+    """
+    payload = {
+        "kind": kind,
+        "file": file_sha256,
+        "date": (current_date or datetime.now().strftime("%Y-%m-%d")).strip(),
+        "params": {name: value or "" for name, value in sorted(params.items())},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class RequestResultCache:
+    """
+    Single-flight + cache TTL untuk hasil endpoint.
+    Request identik yang datang saat request pertama masih berjalan menunggu task yang sama
+    (tanpa memicu panggilan Gemini tambahan); hasil yang selesai disimpan selama `ttl` detik.
+    """
+
+    def __init__(self, ttl: int = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_run(self, key: str, run: Callable[[], Awaitable[Any]],
+                         release: Optional[Callable[[], None]] = None,
+                         should_store: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        `release` membersihkan resource milik request ini (mis. file upload). Jika request ini yang
+        menjalankan task, release dipanggil setelah task selesai, bukan saat request batal,
+        agar request lain yang ikut menunggu tetap bisa membaca file-nya.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            if release is not None:
+                release()
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            if release is not None:
+                release()
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._run_and_store(key, run, release, should_store))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run_and_store(self, key: str, run, release, should_store) -> Any:
+        try:
+            value = await run()
+            # Hasil fallback (Gemini gagal) tidak disimpan agar request berikutnya mencoba lagi
+            if should_store(value):
+                self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+            if release is not None:
+                release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+
+result_cache = RequestResultCache()
@@ -1,27 +1,155 @@
+import os
+import time
+import asyncio
 import httpx
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException
+from src.services.metrics import observe_stage
+from src.services.prompt_budget import strip_markdown_boilerplate
 
-async def scrape_job_with_jina(url: str) -> str:
+# --- KONFIGURASI HTTP CLIENT & CACHE JD ---
+JINA_CONNECT_TIMEOUT = float(os.getenv("JINA_CONNECT_TIMEOUT", "5"))
+JINA_READ_TIMEOUT = float(os.getenv("JINA_READ_TIMEOUT", "60"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+JD_CACHE_TTL = int(os.getenv("JD_CACHE_TTL", "3600"))
+JD_CACHE_MAX_ENTRIES = int(os.getenv("JD_CACHE_MAX_ENTRIES", "500"))
+# Prefix Jina Reader; bisa diarahkan ke reader palsu untuk load test
+JINA_READER_URL = os.getenv("JINA_READER_URL", "https://r.jina.ai/")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(JINA_READ_TIMEOUT, connect=JINA_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+async def start_http_client():
+    """Dipanggil dari lifespan app: satu client bersama dengan koneksi keep-alive."""
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # Fallback jika dipanggil di luar lifespan (mis. script/test)
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+class JobDescriptionCache:
     """
-    Mengambil konten website menggunakan Jina AI Reader API.
-    Outputnya adalah teks format Markdown yang bersih.
+    Cache JD per URL dengan TTL + single-flight:
+    request bersamaan untuk URL yang sama hanya memicu satu fetch ke Jina.
     """
-    jina_url = f"https://r.jina.ai/{url}"
-    
 
-    async with httpx.AsyncClient() as client:
+    def __init__(self, ttl: int = JD_CACHE_TTL, max_entries: int = JD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if time.monotonic() > expires_at:
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return text
+
+    def set(self, url: str, text: str):
+        self._entries[url] = (time.monotonic() + self.ttl, text)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, url: str, fetch) -> str:
+        cached = self.get(url)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(url)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch_and_store(url, fetch))
+            # Ambil exception walau semua penunggu sudah batal (hindari warning "never retrieved")
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[url] = task
+        # shield: pembatalan satu request tidak membatalkan fetch yang ditunggu request lain
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, url: str, fetch) -> str:
         try:
-           
-            response = await client.get(jina_url, timeout=120)
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Jina AI gagal mengambil URL. Status: {response.status_code}"
-                )
-            
-           
-            return response.text
-
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=400, detail=f"Gagal koneksi ke URL: {str(e)}")
\ No newline at end of file
+            text = await fetch(url)
+            if text and text.strip():
+                self.set(url, text)
+            return text
+        finally:
+            self._inflight.pop(url, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+
+jd_cache = JobDescriptionCache()
+
+
+async def _fetch_with_jina(url: str) -> str:
+    jina_url = f"{JINA_READER_URL.rstrip('/')}/{url}"
+    client = get_http_client()
+
+    try:
+        response = await client.get(jina_url)
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Jina AI gagal mengambil URL. Status: {response.status_code}"
+            )
+
+        # Banner cookie, navigasi & footer halaman lowongan dibuang sebelum masuk cache
+        return strip_markdown_boilerplate(response.text)
+
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=400, detail=f"Gagal koneksi ke URL: {str(e)}")
+
+
+async def scrape_job_with_jina(url: str) -> str:
+    """
+    Mengambil konten website menggunakan Jina AI Reader API.
+    Outputnya adalah teks format Markdown yang bersih (banner, navigasi & footer sudah dibuang).
+    Hasil di-cache per URL (TTL) dan fetch bersamaan untuk URL yang sama digabung.
+    """
+    with observe_stage("jd_scrape"):
+        return await jd_cache.get_or_fetch(url.strip(), _fetch_with_jina)
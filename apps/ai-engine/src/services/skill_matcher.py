@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import threading
+from collections import deque, Counter
+from typing import Dict, List, Optional, Tuple, Iterator
+
+from src.schemas import CriticalGap, QuickScoreResponse
+
+# --- KONFIGURASI LEXICON SKILL ---
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skill_lexicon.json")
+SKILL_LEXICON_PATH = os.getenv("SKILL_LEXICON_PATH", DEFAULT_LEXICON_PATH)
+# Bobot soft skill terhadap hard skill saat menghitung skor (soft skill jarang jadi penentu screening)
+SOFT_SKILL_WEIGHT = float(os.getenv("QUICK_SCORE_SOFT_SKILL_WEIGHT", "0.5"))
+# Maksimal gap yang dikembalikan (urut sesuai frekuensi di JD)
+QUICK_SCORE_MAX_GAPS = int(os.getenv("QUICK_SCORE_MAX_GAPS", "10"))
+
+_WORD = re.compile(r"\w+")
+_ID_STOPWORDS = {"dan", "yang", "di", "untuk", "dengan", "dalam", "pada", "sebagai", "dari", "ke"}
+_EN_STOPWORDS = {"and", "the", "for", "with", "in", "of", "as", "to", "from", "on"}
+
+
+class AhoCorasick:
+    """
+    Automaton Aho-Corasick: semua pattern dicocokkan dalam satu kali scan teks (O(n + jumlah match)),
+    berapapun ukuran lexicon. Dibangun sekali saat import, lalu dipakai read-only.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # goto[state] = {char: state}, output[state] = [(panjang pattern, skill kanonik)]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, canonical in patterns.items():
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = nxt
+            self._output[state].append((len(pattern), canonical))
+
+        # BFS: failure link tiap state = suffix terpanjang yang juga prefix pattern lain
+        # (anak langsung root tetap ber-failure link ke root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, skill kanonik) untuk setiap kemunculan pattern di `text`."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, canonical in output[state]:
+                yield index - length + 1, index + 1, canonical
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    # Pattern harus berdiri sebagai kata utuh: "java" tidak boleh cocok di dalam "javascript"
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class SkillLexicon:
+    def __init__(self, path: str = SKILL_LEXICON_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.version = data.get("version", 1)
+        self.soft_skills = set(data.get("soft_skills", []))
+        # Kata umum yang kebetulan nama skill ("go", "excel", "swift") hanya dicocokkan lewat sinonimnya
+        ambiguous = {term.lower() for term in data.get("ambiguous_terms", [])}
+        patterns = {}
+        for canonical, synonyms in data["skills"].items():
+            for term in [canonical, *synonyms]:
+                term = term.strip().lower()
+                if len(term) > 1 and term not in ambiguous:
+                    patterns.setdefault(term, canonical)
+        self.pattern_count = len(patterns)
+        self._automaton = AhoCorasick(patterns)
+
+    def count_skills(self, text: str) -> Counter:
+        """Jumlah kemunculan tiap skill kanonik; match yang tumpang tindih diambil yang terpanjang."""
+        lowered = text.lower()
+        matches = [m for m in self._automaton.iter_matches(lowered) if _is_boundary(lowered, m[0], m[1])]
+        # "react native" menang atas "react" di posisi yang sama
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        counts: Counter = Counter()
+        covered_until = -1
+        for start, end, canonical in matches:
+            if start < covered_until:
+                continue
+            counts[canonical] += 1
+            covered_until = end
+        return counts
+
+    def weight(self, skill: str) -> float:
+        return SOFT_SKILL_WEIGHT if skill in self.soft_skills else 1.0
+
+
+def _is_indonesian(text: str) -> bool:
+    words = Counter(w.lower() for w in _WORD.findall(text[:5000]))
+    return sum(words[w] for w in _ID_STOPWORDS) > sum(words[w] for w in _EN_STOPWORDS)
+
+
+def _gap_action(skill: str, soft: bool, indonesian: bool) -> str:
+    if indonesian:
+        if soft:
+            return f"Tunjukkan {skill} lewat pencapaian konkret di bagian pengalaman (mis. memimpin, berkolaborasi, mempresentasikan)."
+        return f"Tambahkan proyek atau pengalaman yang menggunakan {skill} dan cantumkan kata kunci '{skill}' secara eksplisit di CV."
+    if soft:
+        return f"Demonstrate {skill} with a concrete achievement in your experience section (e.g., leading, collaborating, presenting)."
+    return f"Add a project or experience bullet that uses {skill} and list '{skill}' explicitly in your skills section."
+
+
+def quick_score(cv_text: str, job_desc: str, lexicon: "SkillLexicon" = None) -> QuickScoreResponse:
+    """
+    Skor cepat & deterministik tanpa LLM: skill JD yang ditemukan di CV (berbobot),
+    gap skill yang hilang, dan kepadatan kata kunci JD di CV (per 100 kata).
+    """
+    lexicon = lexicon or get_skill_lexicon()
+    jd_skills = lexicon.count_skills(job_desc)
+    cv_skills = lexicon.count_skills(cv_text)
+
+    matched = [skill for skill in jd_skills if skill in cv_skills]
+    missing = [skill for skill, _ in jd_skills.most_common() if skill not in cv_skills]
+
+    total_weight = sum(lexicon.weight(skill) for skill in jd_skills)
+    matched_weight = sum(lexicon.weight(skill) for skill in matched)
+    skill_score = round(100 * matched_weight / total_weight) if total_weight else 0
+
+    cv_words = len(_WORD.findall(cv_text))
+    keyword_hits = sum(cv_skills[skill] for skill in jd_skills)
+    keyword_density = round(100 * keyword_hits / cv_words, 2) if cv_words else 0.0
+
+    indonesian = _is_indonesian(cv_text)
+    gaps = [
+        CriticalGap(gap=skill, action=_gap_action(skill, skill in lexicon.soft_skills, indonesian))
+        for skill in missing[:QUICK_SCORE_MAX_GAPS]
+    ]
+
+    return QuickScoreResponse(
+        skill_score=skill_score,
+        ats_keyword_density=keyword_density,
+        matched_skills=sorted(matched, key=lambda s: -jd_skills[s]),
+        missing_skills=missing,
+        critical_gaps=gaps,
+        jd_skill_count=len(jd_skills),
+        cv_skill_count=len(cv_skills),
+    )
+
+
+_skill_lexicon: Optional[SkillLexicon] = None
+_lexicon_lock = threading.Lock()
+
+
+def get_skill_lexicon() -> SkillLexicon:
+    """Lexicon + automaton dibangun sekali saat pertama dipakai (atau saat pre-warm), bukan saat import."""
+    global _skill_lexicon
+    if _skill_lexicon is None:
+        with _lexicon_lock:
+            if _skill_lexicon is None:
+                _skill_lexicon = SkillLexicon()
+    return _skill_lexicon
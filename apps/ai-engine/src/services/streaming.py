@@ -0,0 +1,73 @@
+import json
+from typing import Any, List, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format satu event Server-Sent Events (data selalu JSON satu baris)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class PartialJSONFields:
+    """
+    Parser inkremental untuk object JSON yang di-stream oleh model.
+    Setiap kali chunk baru masuk, mengembalikan pasangan (field, value) top-level yang sudah lengkap.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+
+    def _skip_ws(self, pos: int) -> int:
+        while pos < len(self.buffer) and self.buffer[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        fields = []
+
+        while not self._done:
+            pos = self._skip_ws(self._pos)
+            if pos >= len(self.buffer):
+                break
+
+            if not self._started:
+                start = self.buffer.find("{", pos)
+                if start < 0:
+                    break
+                self._started = True
+                self._pos = start + 1
+                continue
+
+            if self.buffer[pos] == ",":
+                pos = self._skip_ws(pos + 1)
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == "}":
+                self._done = True
+                break
+
+            try:
+                key, pos = _decoder.raw_decode(self.buffer, pos)
+                pos = self._skip_ws(pos)
+                if pos >= len(self.buffer) or self.buffer[pos] != ":":
+                    break
+                pos = self._skip_ws(pos + 1)
+                value, end = _decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                # Value belum lengkap, tunggu chunk berikutnya
+                break
+
+            # Angka di ujung buffer mungkin masih terpotong (mis. "8" dari "85")
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and end >= len(self.buffer):
+                break
+
+            fields.append((key, value))
+            self._pos = end
+
+        return fields
@@ -0,0 +1,156 @@
+import os
+import hashlib
+import tempfile
+from typing import Dict, Optional, Union
+
+from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from src.services.metrics import observe_stage
+
+# --- KONFIGURASI UPLOAD ---
+# Ukuran maksimal file CV (bytes). Default 10 MB.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Direktori untuk file spool. Kosong = direktori temp default sistem.
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+# Upload sampai ukuran ini (batas spool memori Starlette) dipakai langsung sebagai bytes, tanpa file temp
+UPLOAD_INLINE_BYTES = int(os.getenv("UPLOAD_INLINE_BYTES", str(1024 * 1024)))
+# Ruang untuk boundary multipart & field form lain di atas ukuran file
+UPLOAD_FORM_OVERHEAD_BYTES = int(os.getenv("UPLOAD_FORM_OVERHEAD_BYTES", str(256 * 1024)))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(413, f"Ukuran file melebihi batas {round(max_bytes / (1024 * 1024), 1)} MB.")
+
+
+class BodySizeLimitMiddleware:
+    """
+    Batas ukuran body request, ditegakkan sebelum Starlette mem-parse & men-spool multipart:
+    Content-Length di atas batas langsung dijawab 413, body tanpa Content-Length (chunked)
+    dihentikan begitu melewati batas. `limits`: path -> batas byte; path lain memakai `default`.
+    """
+
+    def __init__(self, app, default: int, limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.default = default
+        self.limits = limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope["path"], self.default)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            response = JSONResponse(status_code=413, content={
+                "detail": f"Ukuran request melebihi batas {round(limit / (1024 * 1024), 1)} MB."
+            })
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # HTTPException diteruskan FastAPI apa adanya dari parsing body -> response 413
+                    raise HTTPException(413, f"Ukuran request melebihi batas {round(limit / (1024 * 1024), 1)} MB.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class SpooledUpload:
+    """
+    Isi upload yang tetap bisa dibaca setelah request selesai (job, result cache, worker ekstraksi).
+    `source` berupa bytes (upload kecil, tanpa file temp) atau path file sementara di disk;
+    sha256 dihitung sekali saat upload diterima.
+    """
+
+    def __init__(self, source: Union[bytes, str], size: int, sha256: str, content_type: str,
+                 filename: Optional[str] = None):
+        self.source = source
+        self.size = size
+        self.sha256 = sha256
+        self.content_type = content_type
+        self.filename = filename
+
+    def cleanup(self):
+        if not isinstance(self.source, str):
+            return
+        try:
+            os.unlink(self.source)
+        except FileNotFoundError:
+            pass
+
+    async def __aenter__(self) -> "SpooledUpload":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.cleanup()
+
+
+def _read_inline(source, max_bytes: int):
+    source.seek(0)
+    content = source.read(max_bytes + 1)
+    if len(content) > max_bytes:
+        raise UploadTooLarge()
+    return content, len(content), hashlib.sha256(content).hexdigest()
+
+
+def _spool_to_disk(source, max_bytes: int, chunk_size: int, tmp_dir: Optional[str]):
+    """Salin stream per-chunk ke file sementara; memori per request tetap sebesar satu chunk."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="cv-upload-", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            source.seek(0)
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, size, digest.hexdigest()
+
+
+async def receive_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """
+    Pengganti `await file.read()` dengan batas ukuran per file (batas body request ada di
+    BodySizeLimitMiddleware). Upload kecil masih di memori Starlette dan dipakai langsung;
+    hanya upload besar (sudah di file temp anonim Starlette) disalin ke file bernama agar
+    bisa dibuka worker ekstraksi dan bertahan setelah request selesai.
+    Pakai sebagai `async with await receive_upload(file) as upload:` agar file temp dihapus.
+    """
+    # Tolak lebih awal jika ukuran sudah diketahui dari multipart parser
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    try:
+        with observe_stage("upload_read"):
+            if file.size is not None and file.size <= UPLOAD_INLINE_BYTES:
+                source, size, sha256 = await run_in_threadpool(_read_inline, file.file, max_bytes)
+            else:
+                source, size, sha256 = await run_in_threadpool(
+                    _spool_to_disk, file.file, max_bytes, UPLOAD_CHUNK_SIZE, UPLOAD_TMP_DIR
+                )
+    except UploadTooLarge:
+        raise _too_large(max_bytes)
+
+    return SpooledUpload(source, size, sha256, file.content_type, file.filename)
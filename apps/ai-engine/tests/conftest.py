@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# Test dijalankan dari apps/ai-engine (`python -m pytest tests`) atau root repo: modul diimport sebagai `src.services...`
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Client Gemini tidak pernah dipanggil sungguhan di test; nilai ini hanya agar import tidak gagal
+os.environ.setdefault("GEMINI_API_KEY", "test")
+# Response model tidak boleh dilayani/direkam cache antar test
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGeminiClient:
+    """
+    Pengganti `genai.Client` untuk `client.aio.models`: perilaku tiap panggilan ditentukan test lewat
+    `on_generate(model, contents, config)` / `on_stream(model, contents, config)`; semua panggilan dicatat.
+    """
+
+    def __init__(self):
+        self.aio = self
+        self.models = self
+        self.calls = []
+        self.on_generate = None
+        self.on_stream = None
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append((model, config))
+        return await self.on_generate(model, contents, config)
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls.append((model, config))
+        return self.on_stream(model, contents, config)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    from src.services import ai_engine
+    client = FakeGeminiClient()
+    monkeypatch.setattr(ai_engine, "get_client", lambda: client)
+    monkeypatch.setattr(ai_engine, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(ai_engine, "RETRY_MAX_DELAY", 0.01)
+    return client
@@ -0,0 +1,336 @@
+import asyncio
+
+import pytest
+from google.genai import types
+
+from src.services import ai_engine, context_cache
+from src.services.context_cache import ContextCacheManager, is_stale_cache_error, MIN_HANDLE_LIFETIME
+from conftest import FakeChunk
+
+MODEL = "fake-cache-model"
+INSTRUCTIONS = "You are a strict CV reviewer. " * 20
+
+
+class MemoryCacheBackend:
+    """Backend cached content di memori: mencatat create/refresh/delete seperti `client.aio.caches`."""
+
+    def __init__(self):
+        self.entries = {}
+        self.created = []
+        self.refreshed = []
+        self.deleted = []
+        self.fail_create = False
+        self.create_gate = None
+
+    async def create(self, model_name, instructions, ttl):
+        if self.create_gate is not None:
+            await self.create_gate.wait()
+        if self.fail_create:
+            raise RuntimeError("quota exceeded")
+        name = f"cachedContents/{len(self.created)}"
+        self.entries[name] = (model_name, instructions, ttl)
+        self.created.append(name)
+        return name
+
+    async def refresh(self, name, ttl):
+        self.refreshed.append(name)
+
+    async def delete(self, name):
+        self.entries.pop(name, None)
+        self.deleted.append(name)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Hanya jam milik context_cache yang diganti; event loop tetap memakai time.monotonic asli
+    fake = FakeClock()
+    monkeypatch.setattr(context_cache, "time", fake)
+    return fake
+
+
+def make_manager(backend, **kwargs):
+    options = {"mode": "explicit", "ttl": 100, "refresh_margin": 40, "min_tokens": 10, "max_entries": 8}
+    options.update(kwargs)
+    return ContextCacheManager(backend, **options)
+
+
+def config(instructions=INSTRUCTIONS):
+    return types.GenerateContentConfig(system_instruction=instructions, temperature=0.1)
+
+
+async def settle(manager):
+    while manager._pending:
+        await asyncio.gather(*list(manager._pending.values()), return_exceptions=True)
+
+
+async def ready_handle(manager, model=MODEL, instructions=INSTRUCTIONS):
+    manager.apply(model, config(instructions))
+    await settle(manager)
+    return manager.apply(model, config(instructions))
+
+
+def test_create_in_background_then_use_handle(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+
+    async def run():
+        backend.create_gate = asyncio.Event()
+        original = config()
+        # Request pertama (dan yang datang selama create berjalan) tetap inline, create hanya sekali
+        assert manager.apply(MODEL, original) is original
+        assert manager.apply(MODEL, config()).system_instruction == INSTRUCTIONS
+        backend.create_gate.set()
+        await settle(manager)
+        return manager.apply(MODEL, original)
+
+    cached = asyncio.run(run())
+    assert backend.created == ["cachedContents/0"]
+    assert backend.entries["cachedContents/0"] == (MODEL, INSTRUCTIONS, 100)
+    assert cached.cached_content == "cachedContents/0"
+    assert cached.system_instruction is None
+    assert cached.temperature == 0.1
+    assert manager.stats()["hits"] == 1
+    assert manager.stats()["misses"] == 2
+
+
+def test_short_instructions_and_disabled_mode_stay_inline(clock):
+    backend = MemoryCacheBackend()
+
+    async def run():
+        small = config("Short prompt.")
+        assert make_manager(backend).apply(MODEL, small) is small
+        disabled = make_manager(backend, mode="off")
+        original = config()
+        assert disabled.apply(MODEL, original) is original
+        await settle(disabled)
+
+    asyncio.run(run())
+    assert backend.created == []
+
+
+def test_handles_are_per_model(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+
+    async def run():
+        first = await ready_handle(manager, "model-a")
+        second = await ready_handle(manager, "model-b")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.cached_content != second.cached_content
+    assert len(backend.created) == 2
+
+
+def test_refresh_near_expiry_and_expire_unused_handle(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+
+    async def run():
+        await ready_handle(manager)
+        handle = next(iter(manager._handles.values()))
+        assert handle.expires_at == 1100
+
+        # Di luar margin refresh: dipakai tanpa refresh
+        clock.now += 50
+        manager.apply(MODEL, config())
+        await settle(manager)
+        assert backend.refreshed == []
+
+        # Sisa umur < refresh_margin: handle tetap dipakai, TTL diperpanjang di background
+        clock.now += 20
+        assert manager.apply(MODEL, config()).cached_content == handle.name
+        await settle(manager)
+        assert backend.refreshed == [handle.name]
+        assert handle.expires_at == 1170
+
+        # Tidak dipakai sampai hampir habis: tidak dipakai lagi, dibuat ulang
+        clock.now = handle.expires_at - MIN_HANDLE_LIFETIME + 1
+        original = config()
+        assert manager.apply(MODEL, original) is original
+        await settle(manager)
+
+    asyncio.run(run())
+    assert manager.stats()["refreshed"] == 1
+    assert manager.stats()["expired"] == 1
+    assert backend.created == ["cachedContents/0", "cachedContents/1"]
+
+
+def test_lru_eviction_deletes_least_recently_used(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend, max_entries=2)
+
+    async def run():
+        first = await ready_handle(manager, instructions=INSTRUCTIONS + "A")
+        await ready_handle(manager, instructions=INSTRUCTIONS + "B")
+        # A dipakai lagi sehingga B menjadi yang paling lama tidak dipakai
+        assert manager.apply(MODEL, config(INSTRUCTIONS + "A")).cached_content == first.cached_content
+        await ready_handle(manager, instructions=INSTRUCTIONS + "C")
+
+    asyncio.run(run())
+    assert backend.deleted == ["cachedContents/1"]
+    assert sorted(backend.entries) == ["cachedContents/0", "cachedContents/2"]
+    assert manager.stats()["entries"] == 2
+
+
+def test_failed_create_waits_before_retrying(clock):
+    backend = MemoryCacheBackend()
+    backend.fail_create = True
+    manager = make_manager(backend)
+
+    async def run():
+        original = config()
+        manager.apply(MODEL, original)
+        await settle(manager)
+        backend.fail_create = False
+        # Masih dalam jeda retry: tidak ada create baru
+        assert manager.apply(MODEL, original) is original
+        assert not manager._pending
+        clock.now += context_cache.CONTEXT_CACHE_RETRY_AFTER + 1
+        return await ready_handle(manager)
+
+    assert asyncio.run(run()).cached_content == "cachedContents/0"
+    assert manager.stats()["errors"] == 1
+
+
+def test_invalidate_drops_stale_handle(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+
+    async def run():
+        stale = await ready_handle(manager)
+        manager.invalidate(stale)
+        original = config()
+        assert manager.apply(MODEL, original) is original
+        await settle(manager)
+        return manager.apply(MODEL, original)
+
+    assert asyncio.run(run()).cached_content == "cachedContents/1"
+    assert manager.stats()["invalidated"] == 1
+
+
+def test_shutdown_cancels_pending_and_deletes_handles(clock):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+
+    async def run():
+        await ready_handle(manager, instructions=INSTRUCTIONS + "A")
+        await ready_handle(manager, instructions=INSTRUCTIONS + "B")
+        backend.create_gate = asyncio.Event()
+        manager.apply(MODEL, config(INSTRUCTIONS + "C"))
+        pending = list(manager._pending.values())
+        await manager.shutdown()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return pending
+
+    pending = asyncio.run(run())
+    assert all(task.cancelled() for task in pending)
+    assert sorted(backend.deleted) == ["cachedContents/0", "cachedContents/1"]
+    assert backend.entries == {}
+    assert manager.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("error, stale", [
+    (FakeAPIError(404, "Not found"), True),
+    (FakeAPIError(400, "Cached content not found: cachedContents/abc"), True),
+    (FakeAPIError(403, "CachedContent has expired"), True),
+    (FakeAPIError(400, "Invalid JSON payload"), False),
+    (FakeAPIError(429, "Resource exhausted"), False),
+    (RuntimeError("cached content not found"), False),
+])
+def test_is_stale_cache_error(error, stale):
+    assert is_stale_cache_error(error) is stale
+
+
+# ---------------------------------------------------------------------------
+# ai_engine: handle yang ditolak API dikirim ulang inline tanpa menggagalkan request
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parsed = None
+        self.usage_metadata = None
+
+
+@pytest.fixture
+def cached_engine(gemini, clock, monkeypatch):
+    backend = MemoryCacheBackend()
+    manager = make_manager(backend)
+    monkeypatch.setattr(ai_engine, "context_cache", manager)
+    return manager
+
+
+def test_generate_resends_inline_after_stale_cache(gemini, cached_engine):
+    async def on_generate(model, contents, config):
+        if config.cached_content:
+            raise FakeAPIError(404, "CachedContent not found")
+        return FakeResponse("{\"ok\": true}")
+
+    gemini.on_generate = on_generate
+
+    async def run():
+        await ready_handle(cached_engine)
+        gemini.calls.clear()
+        return await ai_engine.generate_with_retry("cv", config(), MODEL)
+
+    assert asyncio.run(run()).text == "{\"ok\": true}"
+    (_, first), (_, second) = gemini.calls
+    assert first.cached_content == "cachedContents/0" and first.system_instruction is None
+    assert second.cached_content is None and second.system_instruction == INSTRUCTIONS
+    assert cached_engine.stats()["invalidated"] == 1
+
+
+def test_generate_does_not_swallow_other_errors(gemini, cached_engine):
+    async def on_generate(model, contents, config):
+        raise FakeAPIError(400, "Invalid argument")
+
+    gemini.on_generate = on_generate
+
+    async def run():
+        await ready_handle(cached_engine)
+        gemini.calls.clear()
+        with pytest.raises(FakeAPIError):
+            await ai_engine.generate_with_retry("cv", config(), MODEL)
+
+    asyncio.run(run())
+    assert len(gemini.calls) == 1
+    assert cached_engine.stats()["invalidated"] == 0
+
+
+def test_stream_resends_inline_after_stale_cache(gemini, cached_engine):
+    def on_stream(model, contents, config):
+        if config.cached_content:
+            raise FakeAPIError(400, "Cached content cachedContents/0 not found")
+
+        async def chunks():
+            yield FakeChunk("{\"ok\": ")
+            yield FakeChunk("true}")
+        return chunks()
+
+    gemini.on_stream = on_stream
+
+    async def run():
+        await ready_handle(cached_engine)
+        gemini.calls.clear()
+        return [text async for text in ai_engine.stream_with_retry("cv", config(), MODEL)]
+
+    assert "".join(asyncio.run(run())) == "{\"ok\": true}"
+    (_, first), (_, second) = gemini.calls
+    assert first.cached_content == "cachedContents/0"
+    assert second.system_instruction == INSTRUCTIONS and second.cached_content is None
+    assert cached_engine.stats()["invalidated"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from src.schemas import ImprovedCVResult, CVContactInfo, CVExperience, CVEducation
+from src.services import ai_engine
+from src.services.result_cache import RequestResultCache
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parsed = None
+        self.usage_metadata = None
+
+
+def make_cv(summary: str) -> ImprovedCVResult:
+    return ImprovedCVResult(
+        full_name="Budi Santoso",
+        professional_summary=summary,
+        contact_info=CVContactInfo(email="budi@example.com", phone="", location="Jakarta"),
+        hard_skills=["Python", "FastAPI"],
+        soft_skills=["Komunikasi"],
+        work_experience=[CVExperience(
+            title="Backend Engineer", company="Tokopedia", dates="2020 - Sekarang",
+            achievements=["Membangun API pembayaran", "Menurunkan latency 40%", "Mentoring 3 engineer"],
+        )],
+        education=[CVEducation(institution="Universitas Indonesia", degree="S1 Ilmu Komputer", year="2018")],
+        projects=[],
+    )
+
+
+@pytest.fixture
+def sections(gemini, monkeypatch):
+    """Jalankan customize per section dengan model palsu; kembalikan {section: konten JSON yang dikirim}."""
+    monkeypatch.setattr(ai_engine, "section_cache", RequestResultCache(60, 100))
+    sent = {}
+    by_instructions = {template.instructions: section for section, template in ai_engine.SECTION_TEMPLATES.items()}
+    replies = {
+        "summary": {"professional_summary": "Backend engineer dengan 5 tahun pengalaman."},
+        "experience": {
+            "title": "Backend Engineer", "company": "Tokopedia", "dates": "2020 - Sekarang",
+            "achievements": ["Membangun API pembayaran untuk 1 juta transaksi/hari"],
+        },
+        "skills": {"hard_skills": ["FastAPI", "Python"], "soft_skills": ["Komunikasi"]},
+    }
+
+    async def on_generate(model, contents, config):
+        section = by_instructions[config.system_instruction]
+        request = contents[0].parts[0].text
+        sent[section] = json.loads(request.split("ORIGINAL SECTION (JSON):", 1)[1])
+        return FakeResponse(json.dumps(replies[section]))
+
+    gemini.on_generate = on_generate
+    return sent
+
+
+def _customize(monkeypatch, cv):
+    async def structure_cv(cv_text):
+        return cv
+
+    monkeypatch.setattr(ai_engine, "structure_cv", structure_cv)
+    return asyncio.run(ai_engine.customize_cv_sections("cv", "TARGET JOB DESCRIPTION: Backend", "goal", "2026-01-01"))
+
+
+def test_missing_summary_is_written_from_structured_cv(sections, monkeypatch):
+    result = _customize(monkeypatch, make_cv(""))
+
+    assert result.professional_summary == "Backend engineer dengan 5 tahun pengalaman."
+    seed = sections["summary"]
+    assert seed["professional_summary"] == ""
+    assert seed["work_experience"][0]["company"] == "Tokopedia"
+    assert seed["work_experience"][0]["achievements"] == ["Membangun API pembayaran", "Menurunkan latency 40%"]
+    assert seed["hard_skills"] == ["Python", "FastAPI"]
+    assert seed["education"][0]["institution"] == "Universitas Indonesia"
+    assert result.work_experience[0].achievements == ["Membangun API pembayaran untuk 1 juta transaksi/hari"]
+
+
+def test_existing_summary_is_rewritten_alone(sections, monkeypatch):
+    result = _customize(monkeypatch, make_cv("Engineer backend."))
+
+    assert sections["summary"] == {"professional_summary": "Engineer backend."}
+    assert result.professional_summary == "Backend engineer dengan 5 tahun pengalaman."
+    assert set(sections) == {"summary", "experience", "skills"}
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from src.services.extract_pool import ExtractionPool
+from src.services.extractor import extract_text_from_bytes
+from test_pdf_layout import make_pdf, multi_column_page, tall_link_page
+
+PDF = "application/pdf"
+
+
+@pytest.fixture(scope="module")
+def document() -> bytes:
+    # 5 halaman: dengan pages_per_chunk=2 jalur fan-out ikut terpakai
+    return make_pdf([multi_column_page(), tall_link_page(), multi_column_page(), tall_link_page(), multi_column_page()])
+
+
+def test_pool_matches_in_process_extraction(document):
+    async def run():
+        pool = ExtractionPool(workers=2, pages_per_chunk=2)
+        try:
+            return await pool.extract(document, PDF)
+        finally:
+            await pool.shutdown()
+
+    assert asyncio.run(run()) == extract_text_from_bytes(document, PDF)
+
+
+def test_restart_between_head_and_fan_out_never_uses_default_executor(document, monkeypatch):
+    async def run():
+        pool = ExtractionPool(workers=1, pages_per_chunk=2)
+        await pool.start()
+        loop = asyncio.get_running_loop()
+        original = loop.run_in_executor
+        executors = []
+        holder = []
+
+        async def restart_window():
+            # Request lain sedang me-restart pool: executor lama sudah di-shutdown, yang baru belum ada
+            async with pool._lock:
+                await pool._shutdown()
+                await asyncio.sleep(0.3)
+                await pool._start()
+
+        async def head_then_restart(future):
+            result = await future
+            holder.append(asyncio.create_task(restart_window()))
+            await asyncio.sleep(0)
+            return result
+
+        def run_in_executor(executor, fn, *args):
+            executors.append(executor)
+            future = original(executor, fn, *args)
+            return head_then_restart(future) if len(executors) == 1 else future
+
+        monkeypatch.setattr(loop, "run_in_executor", run_in_executor)
+        try:
+            try:
+                text = await pool.extract(document, PDF)
+            except ValueError as e:
+                # Executor snapshot ikut mati karena restart: gagal eksplisit, bukan lari ke thread default
+                assert "berhenti" in str(e)
+                text = None
+            await holder[0]
+            assert None not in executors
+            monkeypatch.setattr(loop, "run_in_executor", original)
+            # Setelah restart selesai pool kembali normal
+            assert await pool.extract(document, PDF) == extract_text_from_bytes(document, PDF)
+        finally:
+            await pool.shutdown()
+        return text
+
+    assert asyncio.run(run()) in (None, extract_text_from_bytes(document, PDF))
+
+
+def test_extract_waits_for_restart_in_progress(document):
+    async def run():
+        pool = ExtractionPool(workers=1)
+        await pool.start()
+        try:
+            async with pool._lock:
+                await pool._shutdown()
+                task = asyncio.create_task(pool.extract(document, PDF))
+                await asyncio.sleep(0.2)
+                assert not task.done()
+                await pool._start()
+            return await asyncio.wait_for(task, 30)
+        finally:
+            await pool.shutdown()
+
+    assert asyncio.run(run()) == extract_text_from_bytes(document, PDF)
+
+
+def test_broken_pool_restarts_once_for_concurrent_requests(document):
+    async def run():
+        pool = ExtractionPool(workers=2, pages_per_chunk=2)
+        await pool.start()
+        try:
+            generation = pool._generation
+            for process in list(pool._executor._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+            await asyncio.sleep(0.5)
+            results = await asyncio.gather(*[pool.extract(document, PDF) for _ in range(4)], return_exceptions=True)
+            for result in results:
+                assert isinstance(result, ValueError)
+                assert "berhenti" in str(result)
+            assert pool._generation == generation + 1
+            # Pool hasil restart langsung bisa dipakai lagi
+            return await pool.extract(document, PDF)
+        finally:
+            await pool.shutdown()
+
+    assert asyncio.run(run()) == extract_text_from_bytes(document, PDF)
+
+
+def test_threadpool_fallback_applies_page_cap_and_timeout(document, tmp_path):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(document)
+
+    async def run():
+        pool = ExtractionPool(workers=0)
+        assert await pool.extract(document, PDF) == extract_text_from_bytes(document, PDF)
+        assert await pool.extract(str(path), PDF) == extract_text_from_bytes(document, PDF)
+
+        with pytest.raises(ValueError, match="terlalu panjang"):
+            await ExtractionPool(workers=0, max_pages=3).extract(document, PDF)
+        with pytest.raises(ValueError, match="batas waktu"):
+            await ExtractionPool(workers=0, timeout=0).extract(document, PDF)
+
+    asyncio.run(run())
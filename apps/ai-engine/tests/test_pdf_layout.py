@@ -0,0 +1,267 @@
+"""
+Kesetaraan layout engine (pdf_layout.py) dengan implementasi nested-loop lama di extractor.py.
+Referensi di bawah disalin dari versi sebelum index interval; output keduanya harus identik byte-per-byte.
+"""
+import io
+import random
+
+import pdfplumber
+import pytest
+
+from src.services.extractor import extract_text_from_bytes
+from src.services.pdf_layout import layout_page_text
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+
+# ---------------------------------------------------------------------------
+# Referensi: mapping link & rekonstruksi baris versi lama (nested loop)
+# ---------------------------------------------------------------------------
+
+def reference_page_text(words, links) -> str:
+    words = [dict(word) for word in words]
+    for link in links:
+        link_uri = link['uri']
+        matched_words = []
+        for word in words:
+            if (word['x0'] < link['x1'] and word['x1'] > link['x0'] and
+                word['top'] < link['bottom'] and word['bottom'] > link['top']):
+                matched_words.append(word)
+        if matched_words:
+            last_word = matched_words[-1]
+            if f"[{link_uri}]" not in last_word['text']:
+                last_word['text'] += f" [{link_uri}]"
+
+    page_text = ""
+    if words:
+        words.sort(key=lambda w: (w['top'], w['x0']))
+        current_top = words[0]['top']
+        line_text = ""
+        for word in words:
+            if abs(word['top'] - current_top) > 5:
+                page_text += line_text.strip() + "\n"
+                line_text = ""
+                current_top = word['top']
+            line_text += word['text'] + " "
+        page_text += line_text.strip() + "\n"
+    return page_text
+
+
+def reference_document_text(content: bytes) -> str:
+    text = ""
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        for page in pdf.pages:
+            text += reference_page_text(page.extract_words(), page.hyperlinks)
+    return text.strip()
+
+
+# ---------------------------------------------------------------------------
+# Generator PDF: teks di posisi bebas + anotasi /Link URI (koordinat PDF, origin kiri bawah)
+# ---------------------------------------------------------------------------
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages) -> bytes:
+    """`pages`: list of (texts, links); texts = [(x, y, size, teks)], links = [((x0, y0, x1, y1), uri)]."""
+    objects = []
+
+    def add(body: str) -> int:
+        objects.append(body.encode("latin-1"))
+        return len(objects)
+
+    catalog = add("")
+    pages_obj = add("")
+    font = add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for texts, links in pages:
+        ops = ["BT"]
+        for x, y, size, text in texts:
+            ops.append(f"/F1 {size} Tf 1 0 0 1 {x} {y} Tm ({_escape(text)}) Tj")
+        ops.append("ET")
+        stream = "\n".join(ops)
+        content = add(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        annots = [
+            add(f"<< /Type /Annot /Subtype /Link /Border [0 0 0] /Rect [{x0} {y0} {x1} {y1}] "
+                f"/A << /S /URI /URI ({_escape(uri)}) >> >>")
+            for (x0, y0, x1, y1), uri in links
+        ]
+        annot_refs = " ".join(f"{a} 0 R" for a in annots)
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R /Annots [{annot_refs}] >>"
+        ))
+
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode("latin-1")
+    kids = " ".join(f"{p} 0 R" for p in page_ids)
+    objects[pages_obj - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _width(text: str, size: float) -> float:
+    # Perkiraan lebar Helvetica; cukup agar rect link menutupi kata yang dimaksud
+    return len(text) * size * 0.55
+
+
+def multi_column_page():
+    texts, links = [], []
+    for row in range(30):
+        y = 720 - row * 14
+        # Kolom kanan sedikit bergeser vertikal: menguji toleransi baris 5pt di kedua arah
+        texts.append((72, y, 10, f"Left column line {row} python fastapi"))
+        texts.append((330, y + (row % 4) - 1.5, 10, f"Right {row} kubernetes docker"))
+        if row % 5 == 0:
+            links.append(((72, y - 2, 72 + _width("Left column", 10), y + 10), f"https://example.com/left/{row}"))
+            right = 330 + _width(f"Right {row} kubernetes", 10)
+            links.append(((330, y - 2, right, y + 10), f"https://example.com/right/{row}"))
+    return texts, links
+
+
+def overlapping_links_page():
+    texts = [
+        (72, 700, 11, "GitHub Portfolio LinkedIn"),
+        (72, 680, 11, "Certificate Demo"),
+        (300, 680, 11, "Publication"),
+    ]
+    links = [
+        ((72, 698, 200, 712), "https://github.com/budi"),
+        # Tumpang tindih dengan link pertama di kata tengah
+        ((110, 698, 250, 712), "https://budi.dev"),
+        # URL sama dua kali pada kata yang sama: marker tidak boleh dobel
+        ((72, 678, 140, 692), "https://example.com/cert"),
+        ((80, 678, 130, 692), "https://example.com/cert"),
+        # Rect yang menutupi kedua kolom sekaligus
+        ((60, 676, 400, 694), "https://example.com/all"),
+    ]
+    return texts, links
+
+
+def adjacent_links_page():
+    texts, links = [], []
+    x = 72
+    for index, word in enumerate(["One", "Two", "Three", "Four", "Five"]):
+        texts.append((x, 600, 12, word))
+        right = x + _width(word, 12) + 4
+        # Rect bersebelahan persis (x1 == x0 berikutnya): overlap harus ketat (<, >)
+        links.append(((x, 598, right, 612), f"https://example.com/adjacent/{index}"))
+        x = right
+    # Link dengan tepi bawah tepat di atas kata baris berikut
+    texts.append((72, 585, 12, "Below"))
+    links.append(((72, 597.5, 140, 598), "https://example.com/edge"))
+    return texts, links
+
+
+def tall_link_page():
+    texts = [(72, 500 - row * 12, 9, f"Project {row} designed implemented delivered") for row in range(6)]
+    # Huruf besar: tinggi kata tidak seragam (index memakai tinggi kata maksimum)
+    texts.append((320, 470, 24, "HEADLINE"))
+    links = [
+        # Satu link setinggi beberapa baris
+        ((72, 430, 180, 505), "https://example.com/projects"),
+        ((300, 460, 500, 500), "https://example.com/headline"),
+        # Link kecil di tengah kata besar
+        ((340, 472, 350, 480), "https://example.com/inner"),
+    ]
+    return texts, links
+
+
+def empty_page():
+    return [], []
+
+
+def empty_page_with_link():
+    return [], [((72, 700, 200, 712), "https://example.com/orphan")]
+
+
+def random_page(rng: random.Random):
+    texts, links = [], []
+    for _ in range(rng.randint(0, 60)):
+        size = rng.choice([8, 9, 10, 11, 12, 16, 20])
+        x = rng.uniform(40, 450)
+        y = rng.uniform(60, 740)
+        words = " ".join(rng.choice(["alpha", "beta", "gamma", "delta", "api", "python", "sql"])
+                         for _ in range(rng.randint(1, 5)))
+        texts.append((round(x, 2), round(y, 2), size, words))
+    for index in range(rng.randint(0, 15)):
+        x0 = rng.uniform(40, 500)
+        y0 = rng.uniform(60, 740)
+        links.append(((round(x0, 2), round(y0, 2), round(x0 + rng.uniform(5, 200), 2),
+                       round(y0 + rng.uniform(2, 60), 2)), f"https://example.com/r/{rng.randint(0, 8)}/{index % 3}"))
+    return texts, links
+
+
+SCENARIOS = {
+    "multi_column": [multi_column_page()],
+    "overlapping_links": [overlapping_links_page()],
+    "adjacent_links": [adjacent_links_page()],
+    "tall_links": [tall_link_page()],
+    "empty_pages": [empty_page(), multi_column_page(), empty_page_with_link(), empty_page()],
+    "all_empty": [empty_page(), empty_page_with_link()],
+    "mixed": [overlapping_links_page(), empty_page(), tall_link_page(), adjacent_links_page()],
+}
+
+
+def _assert_pages_identical(content: bytes):
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        for page in pdf.pages:
+            expected = reference_page_text(page.extract_words(), page.hyperlinks)
+            assert layout_page_text(page.extract_words(), page.hyperlinks) == expected
+    assert extract_text_from_bytes(content, "application/pdf") == reference_document_text(content)
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_layout_matches_nested_loop_reference(name):
+    _assert_pages_identical(make_pdf(SCENARIOS[name]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_layout_matches_reference_on_random_pdfs(seed):
+    rng = random.Random(seed)
+    _assert_pages_identical(make_pdf([random_page(rng) for _ in range(rng.randint(1, 3))]))
+
+
+def test_scenarios_actually_attach_links():
+    # Jaga agar korpus tetap menguji jalur link (bukan hanya teks polos)
+    text = extract_text_from_bytes(make_pdf(SCENARIOS["mixed"]), "application/pdf")
+    assert "[https://budi.dev]" in text
+    assert "[https://example.com/projects]" in text
+    assert text.count("[https://example.com/cert]") == 1
+    assert "orphan" not in extract_text_from_bytes(make_pdf(SCENARIOS["all_empty"]), "application/pdf")
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_layout_matches_reference_on_random_word_boxes(seed):
+    # Tanpa pdfplumber: bbox float acak, termasuk tinggi kata berbeda dan link yang menyentuh tepi kata
+    rng = random.Random(seed)
+    words = []
+    for index in range(rng.randint(0, 80)):
+        top = round(rng.uniform(0, 700), rng.choice([0, 1, 3]))
+        height = rng.choice([6.0, 9.5, 12.0, 30.0])
+        x0 = round(rng.uniform(0, 550), 1)
+        words.append({"text": f"w{index}", "x0": x0, "x1": x0 + rng.uniform(5, 60), "top": top, "bottom": top + height})
+    links = []
+    for index in range(rng.randint(0, 20)):
+        if words and rng.random() < 0.3:
+            # Rect persis sama dengan bbox kata lain
+            word = rng.choice(words)
+            box = (word["x0"], word["top"], word["x1"], word["bottom"])
+        else:
+            top = rng.uniform(0, 700)
+            x0 = rng.uniform(0, 550)
+            box = (x0, top, x0 + rng.uniform(1, 300), top + rng.uniform(0.5, 80))
+        links.append({"x0": box[0], "top": box[1], "x1": box[2], "bottom": box[3], "uri": f"u{index % 4}"})
+    assert layout_page_text(words, links) == reference_page_text(words, links)
@@ -0,0 +1,86 @@
+from src.services import ai_engine
+from src.services.ai_engine import sanitize_content
+from src.services.prompt_budget import estimate_tokens, fit_cv_to_budget
+
+
+def make_cv(experience_jobs=3, awards=0, projects=0) -> str:
+    lines = ["Budi Santoso", "budi@example.com | +62 812 0000 0000 | Jakarta"]
+    lines += ["Summary", "Backend engineer with 6 years of experience building Python APIs."]
+    lines.append("Work Experience")
+    for index in range(experience_jobs):
+        lines.append(f"Senior Engineer {index} - Company {index} (Jan 2020 - Present)")
+        lines += [f"- Built service {index}.{bullet} handling millions of requests with FastAPI" for bullet in range(6)]
+    lines += ["Skills", "Python, FastAPI, PostgreSQL, Redis, Docker, Kubernetes"]
+    if projects:
+        lines.append("Projects")
+        lines += [f"Project {index}: internal tooling rewrite with measurable impact" for index in range(projects)]
+    if awards:
+        lines.append("Awards")
+        lines += [f"Award {index}: hackathon winner with a long description of the event" for index in range(awards)]
+    lines += ["Education", "Universitas Indonesia - S1 Ilmu Komputer (2014 - 2018)"]
+    return "\n".join(lines)
+
+
+def long_jd(requirements=400) -> str:
+    lines = ["## About Us", "We are a company. " * 200, "## Requirements"]
+    lines += [f"- Requirement {index}: experience with distributed systems" for index in range(requirements)]
+    return "\n".join(lines)
+
+
+def test_short_cv_is_untouched():
+    cv = make_cv()
+    assert fit_cv_to_budget(cv, 10_000) == cv
+
+
+def test_cv_trimmed_by_section_priority():
+    cv = make_cv(experience_jobs=3, awards=200, projects=200)
+    budget = estimate_tokens(make_cv(experience_jobs=3)) + 100
+    trimmed = fit_cv_to_budget(cv, budget)
+
+    assert estimate_tokens(trimmed) <= budget
+    # Header kontak, pengalaman, skill & pendidikan dipertahankan; section lain-lain dibuang lebih dulu
+    for kept in ["Budi Santoso", "budi@example.com", "Senior Engineer 2", "Python, FastAPI", "Universitas Indonesia"]:
+        assert kept in trimmed
+    assert "Award 0" not in trimmed
+    # Urutan asli section tetap dijaga
+    assert trimmed.index("Work Experience") < trimmed.index("Skills") < trimmed.index("Education")
+
+
+def test_analysis_prompt_fits_reasoning_budget():
+    cv = make_cv(experience_jobs=60, awards=100, projects=100)
+    jd = long_jd()
+    clean_cv, prepared_jd = ai_engine.prepare_analysis_inputs(cv, jd, "test")
+
+    budget = ai_engine.model_input_budget(ai_engine.REASONING_MODEL)
+    total = ai_engine._analysis_static_tokens() + estimate_tokens(clean_cv) + estimate_tokens(prepared_jd)
+    assert estimate_tokens(sanitize_content(cv)) + estimate_tokens(jd) > budget
+    assert total <= budget
+    assert "Requirement 0" in prepared_jd
+    assert "Budi Santoso" in clean_cv and "Python, FastAPI" in clean_cv
+
+    # Prompt yang benar-benar dikirim ikut muat (estimasi dari hasil render template)
+    if ai_engine.ANALYSIS_MODE == "split":
+        prompt = ai_engine.build_job_fit_prompt(clean_cv, prepared_jd, "2026-01-01")
+        quality = ai_engine.build_cv_quality_prompt(clean_cv)
+        assert estimate_tokens(quality.full_text()) <= ai_engine.model_input_budget(ai_engine.FAST_MODEL)
+    else:
+        prompt = ai_engine.build_analysis_prompt(clean_cv, prepared_jd, "2026-01-01")
+    assert estimate_tokens(prompt.full_text()) <= budget
+
+
+def test_analysis_inputs_unchanged_when_under_budget():
+    cv = make_cv()
+    clean_cv, prepared_jd = ai_engine.prepare_analysis_inputs(cv, "## Requirements\n- Python", "test")
+    assert clean_cv == sanitize_content(cv)
+    assert prepared_jd == "## Requirements\n- Python"
+
+
+def test_customize_feedback_and_cv_fit_budget():
+    cv = make_cv(experience_jobs=60, awards=100)
+    feedback = "\n".join(f"Weakness {index}: missing quantified impact in bullet points" for index in range(2000))
+    mode_context, goal, clean_cv = ai_engine.customize_target("feedback", feedback, cv)
+
+    prompt = ai_engine.CUSTOMIZE_TEMPLATE.render(current_date="2026-01-01", mode_context=mode_context, goal=goal, cv=clean_cv)
+    assert estimate_tokens(prompt.full_text()) <= ai_engine.model_input_budget(ai_engine.REASONING_MODEL)
+    assert mode_context.startswith("ANALYSIS FEEDBACK: Weakness 0")
+    assert "Senior Engineer 0" in clean_cv
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from google.genai import types
+
+from src.services import ai_engine
+from src.services.deadline import DeadlineExceeded
+from conftest import FakeChunk
+
+MODEL = "fake-stream-model"
+
+
+async def _collect(stream):
+    out = []
+    async for text in stream:
+        out.append(text)
+    return out
+
+
+def _stalling_stream(closed, texts=()):
+    async def stream():
+        try:
+            for text in texts:
+                yield FakeChunk(text)
+            await asyncio.sleep(3600)
+        finally:
+            closed.append(True)
+    return stream()
+
+
+def test_stalled_stream_fails_at_deadline_and_is_closed(gemini, monkeypatch):
+    closed = []
+    gemini.on_stream = lambda model, contents, config: _stalling_stream(closed, ["Hello"])
+    monkeypatch.setattr(ai_engine, "attempt_timeout", lambda: 0.2)
+    received = []
+
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            async for text in ai_engine.stream_with_retry("cv", types.GenerateContentConfig(), MODEL):
+                received.append(text)
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    # Chunk sudah terkirim ke caller: tidak di-retry, stream ditutup, slot limiter dilepas
+    assert received == ["Hello"]
+    assert closed == [True]
+    assert len(gemini.calls) == 1
+    assert ai_engine._limiter_for(MODEL).in_flight == 0
+
+
+def test_stream_stalled_before_first_chunk_is_retried(gemini, monkeypatch):
+    closed = []
+    attempts = []
+
+    async def healthy():
+        yield FakeChunk("{\"ok\": ")
+        yield FakeChunk("true}")
+
+    def on_stream(model, contents, config):
+        attempts.append(model)
+        return _stalling_stream(closed) if len(attempts) == 1 else healthy()
+
+    gemini.on_stream = on_stream
+    monkeypatch.setattr(ai_engine, "attempt_timeout", lambda: 0.2)
+
+    out = asyncio.run(asyncio.wait_for(
+        _collect(ai_engine.stream_with_retry("cv", types.GenerateContentConfig(), MODEL)), 5
+    ))
+    assert "".join(out) == "{\"ok\": true}"
+    assert len(attempts) == 2
+    assert closed == [True]
+
+
+def test_slow_consumer_does_not_hold_limiter_slot(gemini):
+    async def fast():
+        for text in ["{\"a\": ", "1, ", "\"b\": 2}"]:
+            yield FakeChunk(text)
+
+    gemini.on_stream = lambda model, contents, config: fast()
+    limiter = ai_engine._limiter_for(MODEL)
+    in_flight = []
+
+    async def run():
+        out = []
+        async for text in ai_engine.stream_with_retry("cv", types.GenerateContentConfig(), MODEL):
+            out.append(text)
+            # Consumer SSE lambat: model sudah selesai, slot harus sudah kembali ke limiter
+            await asyncio.sleep(0.05)
+            in_flight.append(limiter.in_flight)
+        return out
+
+    assert "".join(asyncio.run(asyncio.wait_for(run(), 5))) == "{\"a\": 1, \"b\": 2}"
+    assert in_flight == [0, 0, 0]
+
+
+def test_consumer_leaving_early_closes_model_stream(gemini):
+    closed = []
+    gemini.on_stream = lambda model, contents, config: _stalling_stream(closed, ["Hello"])
+
+    async def run():
+        stream = ai_engine.stream_with_retry("cv", types.GenerateContentConfig(), MODEL)
+        assert await stream.__anext__() == "Hello"
+        # Client disconnect: generator ditutup sebelum model selesai
+        await stream.aclose()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert closed == [True]
+    assert ai_engine._limiter_for(MODEL).in_flight == 0